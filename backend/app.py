@@ -1,79 +1,627 @@
 import os
+import json
 import logging
-from flask import Flask, jsonify, request
+import threading
+from datetime import datetime
+from flask import Flask, Blueprint, current_app, jsonify, request, send_file, Response
 from flask_cors import CORS
-from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.local import LocalProxy
 from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('backend.log')
-    ]
+from pdf_engine import PdfJobQueue, JOB_QUEUED, JOB_PROCESSING, JOB_COMPLETED, JOB_FAILED
+from guide_store import GuideStore, RevisionConflict
+from json_patch import JsonPatchError
+from preview_engine import PreviewRenderer
+from search_index import SpeciesSearchIndex
+from region_index import RegionBitmapIndex, RegionExpressionError
+from facet_index import FacetIndex, FACETS
+from result_cache import ResultCache
+from response_format import requested_fields, requested_layout, shape, encode
+from db_pool import engine_options, install_sqlite_pragmas, instance_relative_url, pool_metrics, sqlite_pragmas
+from db_routing import ReplicaRouter
+from metrics import MetricsRegistry, RequestMetrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from slow_query import SlowQueryLog
+from single_flight import SingleFlight
+from logging_setup import configure_logging
+from models import (
+    db, Species, Illustrations, Names, Frequency, DataVersion, PdfJob, Guide, GuideSnapshot, GuidePatch,
+    get_data_version, bump_data_version
 )
+
 logger = logging.getLogger(__name__)
 
-# Create Flask app
-app = Flask(__name__)
-CORS(app)
+# Every route is registered on each app built by create_app()
+api = Blueprint('api', __name__)
+
+def _service(name):
+    """Proxy to the current app's instance of a service, like flask.current_app"""
+    return LocalProxy(lambda: current_app.extensions['pocketguide'][name])
+
+replica_router = _service('replica_router')
+metrics_registry = _service('metrics_registry')
+slow_queries = _service('slow_queries')
+log_handler = _service('log_handler')
+pdf_queue = _service('pdf_queue')
+guide_store = _service('guide_store')
+preview_renderer = _service('preview_renderer')
+search_index = _service('search_index')
+region_index = _service('region_index')
+facet_index = _service('facet_index')
+ranking_cache = _service('ranking_cache')
+grouped_flight = _service('grouped_flight')
+
+def create_app(config=None):
+    """
+    Build the API app.
+
+    Settings come from the environment (and .env); ``config`` overrides
+    them, e.g. ``create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///other.db'})``.
+    Each app gets its own engines, indexes, caches and job queues, so several
+    can run in one process; the models and ``db`` in models.py are shared.
+    """
+    load_dotenv()
+
+    # Configure logging once per process: queued, rotated and optionally sampled (LOG_* variables)
+    handler = configure_logging()
+
+    app = Flask(__name__)
+    CORS(app)
+
+    # Database configuration
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
+        'DATABASE_URL',
+        'sqlite:///pocketguide.db'
+    )
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Optional read replicas (comma-separated URLs); GET requests read from them
+    app.config['SQLALCHEMY_BINDS'] = {
+        f"replica_{i}": dict(engine_options(url), url=url)
+        for i, url in enumerate(u.strip() for u in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if u.strip())
+    }
+    app.config['DEBUG'] = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
+    app.config.update(config or {})
+    # 'sqlite:///instance/x.db' means backend/instance/x.db, not instance/instance/x.db
+    app.config['SQLALCHEMY_DATABASE_URI'] = instance_relative_url(
+        app.config['SQLALCHEMY_DATABASE_URI'], app.instance_path)
+    for bind in app.config['SQLALCHEMY_BINDS'].values():
+        if isinstance(bind, dict) and 'url' in bind:
+            bind['url'] = instance_relative_url(bind['url'], app.instance_path)
+    # Pool size/overflow/recycle/pre-ping from DB_POOL_* variables, with checkout metrics
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+
+    db.init_app(app)
+    with app.app_context():
+        engines = list(db.engines.values())
+    # WAL, synchronous=NORMAL, mmap and cache size on every SQLite connection
+    for engine in engines:
+        install_sqlite_pragmas(engine)
+
+    router = ReplicaRouter(
+        app, db, list(app.config['SQLALCHEMY_BINDS']),
+        pin_seconds=int(os.getenv('REPLICA_PIN_SECONDS', '10')),
+        check_interval=int(os.getenv('REPLICA_CHECK_INTERVAL', '15')),
+        retry_seconds=int(os.getenv('REPLICA_RETRY_SECONDS', '30')),
+        max_lag_seconds=float(os.getenv('REPLICA_MAX_LAG_SECONDS')) if os.getenv('REPLICA_MAX_LAG_SECONDS') else None
+    )
+
+    # Per-route latency and SQL counts, served with the other gauges at /metrics
+    registry = MetricsRegistry('pocketguide')
+    request_metrics = RequestMetrics(app, registry, engines)
+    for collect in (_cache_metrics, _pool_metrics, _job_metrics, _catalogue_metrics, _log_metrics):
+        registry.collector(collect)
+
+    app.extensions['pocketguide'] = {
+        'replica_router': router,
+        'metrics_registry': registry,
+        'request_metrics': request_metrics,
+        # Statements slower than SLOW_QUERY_MS are logged and explained once per shape
+        'slow_queries': SlowQueryLog(
+            engines,
+            threshold_ms=float(os.getenv('SLOW_QUERY_MS', '200')),
+            explain=os.getenv('SLOW_QUERY_EXPLAIN', 'true').lower() == 'true'
+        ),
+        'log_handler': handler,
+        'pdf_queue': PdfJobQueue(app, db, PdfJob, _build_pdf_payload),
+        'guide_store': GuideStore(db, Guide, GuidePatch, GuideSnapshot),
+        'preview_renderer': PreviewRenderer(
+            os.getenv('PREVIEW_OUTPUT_DIR', os.path.join(app.instance_path, 'previews'))),
+        'search_index': SpeciesSearchIndex(_load_search_rows),
+        'region_index': RegionBitmapIndex(_load_region_rows),
+        'facet_index': FacetIndex(_load_region_rows),
+        'ranking_cache': ResultCache(int(os.getenv('RANKING_CACHE_SIZE', '256'))),
+        # Identical concurrent region queries share one computation (across workers with SINGLE_FLIGHT_DIR)
+        'grouped_flight': SingleFlight(
+            lock_dir=os.getenv('SINGLE_FLIGHT_DIR'),
+            timeout=float(os.getenv('SINGLE_FLIGHT_TIMEOUT', '30')),
+            result_ttl=float(os.getenv('SINGLE_FLIGHT_RESULT_TTL', '5'))
+        )
+    }
+    app.register_blueprint(api)
+
+    logger.info(f"App initialized with DEBUG={app.config['DEBUG']}")
+    return app
+
+_default_app = None
+_default_app_lock = threading.Lock()
+
+def __getattr__(name):
+    """``from app import app`` (wsgi.py, gunicorn, scripts) builds the default app on first use"""
+    global _default_app
+    if name == 'app':
+        with _default_app_lock:
+            if _default_app is None:
+                _default_app = create_app()
+        return _default_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _build_pdf_payload(job):
+    """Resolve a PDF job request into the plain dict the render workers expect"""
+    request_data = json.loads(job.request_data)
+    state = request_data.get('state')
+    district = request_data.get('district')
+    species_names = request_data.get('species') or []
+
+    query = db.session.query(
+        Species.id,
+        Species.english_name,
+        Species.scientific_name,
+        Species.type,
+        Species.taxa,
+        Species.size,
+        Illustrations.image_link
+    ).outerjoin(
+        Illustrations,
+        (Species.id == Illustrations.species_id) &
+        (Illustrations.is_default == True)
+    )
+
+    frequency = {}
+    if state:
+        frequency_query = db.session.query(
+            Species.english_name,
+            Frequency.frequency_rank,
+            Frequency.seasonality
+        ).join(Species, Frequency.species_id == Species.id).filter(Frequency.state == state)
+        if district and district != 'Statewide':
+            frequency_query = frequency_query.filter(Frequency.district == district)
+        else:
+            frequency_query = frequency_query.filter(Frequency.district.like('%Statewide%'))
+        frequency = {f.english_name: f for f in frequency_query.order_by(Frequency.frequency_rank).all()}
+
+    if species_names:
+        query = query.filter(Species.english_name.in_(species_names))
+        order = species_names
+    else:
+        query = query.filter(Species.english_name.in_(list(frequency.keys())))
+        order = list(frequency.keys())
 
-# Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
-    'DATABASE_URL',
-    'sqlite:///pocketguide.db'
+    rows = {row.english_name: row for row in query.all()}
+    english_names = {row.id: row.english_name for row in rows.values()}
+    names = {}
+    for n in db.session.execute(names_query(list(english_names))).all():
+        names.setdefault(english_names[n.species_id], {})[n.language] = n.name
+
+    birds = []
+    for english_name in order:
+        row = rows.get(english_name)
+        if not row:
+            continue
+        freq = frequency.get(english_name)
+        birds.append({
+            'english_name': row.english_name,
+            'scientific_name': row.scientific_name,
+            'type': row.type,
+            'taxa': row.taxa,
+            'size': row.size,
+            'image_link': row.image_link,
+            'frequency_rank': freq.frequency_rank if freq else None,
+            'seasonality': freq.seasonality if freq else None,
+            'names': names.get(english_name, {})
+        })
+
+    if not birds:
+        raise ValueError('No species found for this guide')
+
+    return {
+        'title': request_data.get('title'),
+        'location': request_data.get('location') or ', '.join(p for p in [district, state] if p),
+        'creator': request_data.get('creator'),
+        'options': request_data.get('options', {}),
+        'data_version': get_data_version(),
+        'birds': birds
+    }
+
+def _catalogue_species():
+    """Every species with its default illustration, in a stable order"""
+    return [{
+        'english_name': row.english_name,
+        'scientific_name': row.scientific_name,
+        'type': row.type,
+        'taxa': row.taxa,
+        'size': row.size,
+        'image_link': row.image_link,
+        'image_name': row.image_name,
+        'sex': row.sex,
+        'breeding_status': row.breeding_status,
+        'subspecies': row.subspecies
+    } for row in db.session.query(
+        Species.english_name,
+        Species.scientific_name,
+        Species.type,
+        Species.taxa,
+        Species.size,
+        Illustrations.image_link,
+        Illustrations.image_name,
+        Illustrations.sex,
+        Illustrations.breeding_status,
+        Illustrations.subspecies
+    ).outerjoin(
+        Illustrations,
+        (Species.id == Illustrations.species_id) &
+        (Illustrations.is_default == True)
+    ).order_by(Species.english_name).all()]
+
+def _load_search_rows():
+    """Catalogue rows for the in-memory name search index"""
+    names = db.session.query(Species.english_name, Names.language, Names.name) \
+        .join(Species, Names.species_id == Species.id).all()
+    regions = db.session.query(Species.english_name, Frequency.state, Frequency.district) \
+        .join(Species, Frequency.species_id == Species.id).distinct().all()
+    return _catalogue_species(), names, regions
+
+def _load_region_rows():
+    """Catalogue rows for the region bitmap index, with names attached like /api/birds/grouped"""
+    species = _catalogue_species()
+    names = {row['english_name']: {'English': row['english_name']} for row in species}
+    for english_name, language, name in db.session.query(Species.english_name, Names.language, Names.name) \
+            .join(Species, Names.species_id == Species.id).all():
+        names[english_name][language] = name
+    for row in species:
+        row['names'] = names[row['english_name']]
+    frequency = db.session.query(
+        Species.english_name,
+        Frequency.state,
+        Frequency.district,
+        Frequency.frequency_rank,
+        Frequency.observation_count,
+        Frequency.seasonality
+    ).join(Species, Frequency.species_id == Species.id).all()
+    return species, frequency
+
+def _merged_ranking(regions, method):
+    """
+    Rank species across several (state, district) regions in SQL.
+
+    'count' ranks by total observations; 'share' by the sum of each region's
+    share of its own observations, so a small district weighs as much as a
+    large one. Returns bird dicts ordered by the combined rank.
+    """
+    observations = db.func.coalesce(Frequency.observation_count, 0)
+    per_region = db.session.query(
+        Frequency.species_id,
+        Frequency.frequency_rank,
+        Frequency.seasonality,
+        observations.label('observations'),
+        db.func.sum(observations).over(partition_by=(Frequency.state, Frequency.district)).label('region_total')
+    ).filter(db.or_(*[
+        (Frequency.state == state) & (Frequency.district == district) for state, district in regions
+    ])).subquery()
+
+    merged = db.session.query(
+        per_region.c.species_id,
+        db.func.sum(per_region.c.observations).label('observations'),
+        db.func.sum(per_region.c.observations * 1.0 / db.func.nullif(per_region.c.region_total, 0)).label('share'),
+        db.func.count().label('region_count'),
+        db.func.min(per_region.c.frequency_rank).label('best_rank'),
+        db.func.min(per_region.c.seasonality).label('seasonality_min'),
+        db.func.max(per_region.c.seasonality).label('seasonality_max')
+    ).group_by(per_region.c.species_id).subquery()
+
+    score = db.func.coalesce(merged.c.share, 0) if method == 'share' else merged.c.observations
+    ranked = db.session.query(
+        merged,
+        db.func.rank().over(order_by=score.desc()).label('combined_rank')
+    ).subquery()
+
+    rows = db.session.query(
+        ranked,
+        Species.english_name,
+        Species.scientific_name,
+        Species.type,
+        Species.taxa,
+        Species.size,
+        Illustrations.image_link,
+        Illustrations.image_name,
+        Illustrations.sex,
+        Illustrations.breeding_status,
+        Illustrations.subspecies
+    ).join(
+        Species, ranked.c.species_id == Species.id
+    ).outerjoin(
+        Illustrations,
+        (Species.id == Illustrations.species_id) &
+        (Illustrations.is_default == True)
+    ).order_by(ranked.c.combined_rank, Species.english_name).all()
+
+    names_by_species = {}
+    for name in db.session.execute(names_query([r.species_id for r in rows])).all():
+        names_by_species.setdefault(name.species_id, {})[name.language] = name.name
+
+    birds = []
+    for row in rows:
+        names_dict = {'English': row.english_name}
+        names_dict.update(names_by_species.get(row.species_id, {}))
+        birds.append({
+            'english_name': row.english_name,
+            'scientific_name': row.scientific_name,
+            'type': row.type,
+            'taxa': row.taxa,
+            'size': row.size,
+            'frequency_rank': row.combined_rank,
+            'best_region_rank': row.best_rank,
+            'observation_count': row.observations,
+            'observation_share': round(row.share or 0, 6),
+            'region_count': row.region_count,
+            'seasonality': row.seasonality_min if row.seasonality_min == row.seasonality_max else 'Varies',
+            'image_link': row.image_link,
+            'image_name': row.image_name,
+            'sex': row.sex,
+            'breeding_status': row.breeding_status,
+            'subspecies': row.subspecies,
+            'names': names_dict
+        })
+    return birds
+
+BIRD_FIELDS = (
+    'english_name', 'scientific_name', 'type', 'taxa', 'size', 'frequency_rank',
+    'observation_count', 'seasonality', 'image_link', 'image_name', 'sex',
+    'breeding_status', 'subspecies', 'names'
+)
+SPECIES_FIELDS = ('english_name', 'scientific_name', 'type', 'taxa', 'size', 'illustrations', 'names')
+CATALOGUE_FIELDS = (
+    'english_name', 'scientific_name', 'type', 'taxa', 'size', 'image_link', 'image_name',
+    'sex', 'breeding_status', 'subspecies', 'names'
 )
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['DEBUG'] = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
-
-# Initialize SQLAlchemy
-db = SQLAlchemy(app)
-
-logger.info(f"App initialized with DEBUG={app.config['DEBUG']}")
-
-# Define models
-class Species(db.Model):
-    __tablename__ = 'species'
-    english_name = db.Column(db.String(255), primary_key=True)
-    scientific_name = db.Column(db.String(255), nullable=False)
-    type = db.Column(db.String(100), nullable=False)
-    taxa = db.Column(db.String(100), nullable=False)
-    size = db.Column(db.String(50))
-
-class Illustrations(db.Model):
-    __tablename__ = 'illustrations'
-    id = db.Column(db.Integer, primary_key=True)
-    image_name = db.Column(db.String(255), nullable=False)
-    image_link = db.Column(db.String(512), nullable=False)
-    species_english_name = db.Column(db.String(255), db.ForeignKey('species.english_name'))
-    sex = db.Column(db.String(10))
-    breeding_status = db.Column(db.String(20))
-    subspecies = db.Column(db.String(100))
-    is_default = db.Column(db.Boolean, nullable=False, default=False)
-
-class Names(db.Model):
-    __tablename__ = 'names'
-    id = db.Column(db.Integer, primary_key=True)
-    species_english_name = db.Column(db.String(255), db.ForeignKey('species.english_name'))
-    language = db.Column(db.String(50), nullable=False)
-    name = db.Column(db.String(255), nullable=False)
-
-class Frequency(db.Model):
-    __tablename__ = 'frequency'
-    id = db.Column(db.Integer, primary_key=True)
-    english_name = db.Column(db.String(255), db.ForeignKey('species.english_name'))
-    state = db.Column(db.String(100), nullable=False)
-    district = db.Column(db.String(100))
-    frequency_rank = db.Column(db.Integer, nullable=False)
-    observation_count = db.Column(db.Integer)
-    seasonality = db.Column(db.String(50))
-
-@app.route('/api/birds/grouped')
+SEARCH_FIELDS = CATALOGUE_FIELDS + ('score', 'matched')
+
+def _positive_int_arg(name, allow_zero=False, args=None):
+    """Optional positive integer query parameter; raises ValueError if malformed"""
+    value = (request.args if args is None else args).get(name)
+    if value in (None, ''):
+        return None
+    if not value.isdigit() or int(value) < (0 if allow_zero else 1):
+        raise ValueError(f"{name} must be a {'non-negative' if allow_zero else 'positive'} integer")
+    return int(value)
+
+# Query builders and shaping shared by the Flask routes and the ASGI app
+# (asgi.py): each *_query function returns a statement that runs on either a
+# sync session or an async connection, and the builders turn its rows into
+# the response records.
+
+def grouped_birds_params(args):
+    """
+    Keyword arguments for grouped_birds_query from /api/birds/grouped query
+    parameters. Raises ValueError if state is missing or a cutoff is malformed.
+    """
+    state = args.get('state')
+    if not state:
+        raise ValueError('State parameter is required')
+    max_rank = _positive_int_arg('max_rank', args=args)
+    if max_rank is None:
+        max_rank = _positive_int_arg('frequency_rank', args=args)
+    return {
+        'state': state,
+        'district': args.get('district'),
+        'max_rank': max_rank,
+        'per_type': _positive_int_arg('per_type', args=args),
+        'limit': _positive_int_arg('limit', args=args)
+    }
+
+def grouped_birds_query(state, district=None, max_rank=None, per_type=None, limit=None):
+    """A region's birds with their default illustration, most common first"""
+    query = db.select(
+        Frequency.frequency_rank,
+        Frequency.observation_count,
+        Frequency.seasonality,
+        Species.id.label('species_id'),
+        Species.english_name,
+        Species.scientific_name,
+        Species.type,
+        Species.taxa,
+        Species.size,
+        Illustrations.image_link,
+        Illustrations.image_name,
+        Illustrations.sex,
+        Illustrations.breeding_status,
+        Illustrations.subspecies
+    ).join(
+        Species, Frequency.species_id == Species.id
+    ).outerjoin(
+        Illustrations,
+        (Species.id == Illustrations.species_id) &
+        (Illustrations.is_default == True)
+    ).where(
+        Frequency.state == state
+    )
+
+    if district and district != 'Statewide':
+        query = query.where(Frequency.district == district)
+    else:
+        # For statewide data, filter by district containing 'Statewide'
+        query = query.where(Frequency.district.like('%Statewide%'))
+
+    # Apply the rank cutoffs in SQL so only the requested birds are read
+    if max_rank is not None:
+        query = query.where(Frequency.frequency_rank <= max_rank)
+
+    if per_type is not None:
+        # Number birds within each type, then keep the first N of each
+        query = query.add_columns(
+            db.func.row_number().over(
+                partition_by=Species.type,
+                order_by=(Frequency.frequency_rank, Species.english_name)
+            ).label('type_position')
+        )
+        ranked = query.subquery()
+        query = db.select(ranked).where(ranked.c.type_position <= per_type) \
+            .order_by(ranked.c.frequency_rank)
+    else:
+        query = query.order_by(Frequency.frequency_rank)
+
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def names_query(species_ids):
+    """Local names of the species with the given ids"""
+    return db.select(Names.species_id, Names.language, Names.name) \
+        .where(Names.species_id.in_(species_ids))
+
+def group_birds(rows, name_rows):
+    """Bird records from grouped_birds_query rows, grouped by type"""
+    names_by_species = {}
+    for name in name_rows:
+        names_by_species.setdefault(name.species_id, {})[name.language] = name.name
+
+    grouped_data = {}
+    for result in rows:
+        names_dict = {'English': result.english_name}
+        names_dict.update(names_by_species.get(result.species_id, {}))
+
+        bird_type = result.type or 'Other Birds'
+        grouped_data.setdefault(bird_type, []).append({
+            'english_name': result.english_name,
+            'scientific_name': result.scientific_name,
+            'type': result.type,
+            'taxa': result.taxa,
+            'size': result.size,
+            'frequency_rank': result.frequency_rank,
+            'observation_count': result.observation_count,
+            'seasonality': result.seasonality,
+            'image_link': result.image_link,
+            'image_name': result.image_name,
+            'sex': result.sex,
+            'breeding_status': result.breeding_status,
+            'subspecies': result.subspecies,
+            'names': names_dict
+        })
+    return grouped_data
+
+def locations_query():
+    """Every (state, district) pair with frequency data"""
+    return db.select(Frequency.state, Frequency.district).distinct() \
+        .order_by(Frequency.state, Frequency.district)
+
+def build_locations(rows):
+    """/api/birds/locations response from locations_query rows"""
+    states = []
+    districts = {}
+    for state, district in rows:
+        if state not in districts:
+            states.append(state)
+            districts[state] = []
+        districts[state].append(district)
+    return {'states': states, 'districts': districts}
+
+def species_list_queries(with_illustrations=True, with_names=True):
+    """Statements for /api/admin/species: species, illustrations and names (None when not needed)"""
+    return (
+        db.select(Species.__table__),
+        db.select(Illustrations.__table__) if with_illustrations else None,
+        db.select(Names.__table__) if with_names else None
+    )
+
+def build_species_list(species_rows, illustration_rows, name_rows):
+    """Species records from species_list_queries rows"""
+    illustrations_by_species = {}
+    for i in illustration_rows:
+        illustrations_by_species.setdefault(i.species_id, []).append(
+            {'id': i.id, 'image_name': i.image_name, 'image_link': i.image_link,
+             'is_default': i.is_default})
+    names_by_species = {}
+    for n in name_rows:
+        names_by_species.setdefault(n.species_id, []).append(
+            {'language': n.language, 'name': n.name})
+
+    return [{
+        'english_name': s.english_name,
+        'scientific_name': s.scientific_name,
+        'type': s.type,
+        'taxa': s.taxa,
+        'size': s.size,
+        'illustrations': illustrations_by_species.get(s.id, []),
+        'names': names_by_species.get(s.id, [])
+    } for s in species_rows]
+
+def species_detail_queries(english_name):
+    """Statements for one species' row, illustrations, names and frequency rows"""
+    species_id = db.select(Species.id).where(Species.english_name == english_name).scalar_subquery()
+    return (
+        db.select(Species.__table__).where(Species.english_name == english_name),
+        db.select(Illustrations.__table__).where(Illustrations.species_id == species_id),
+        db.select(Names.__table__).where(Names.species_id == species_id),
+        db.select(Frequency.__table__).where(Frequency.species_id == species_id)
+    )
+
+def build_species_detail(species, illustration_rows, name_rows, frequency_rows):
+    """Species detail record from species_detail_queries rows"""
+    return {
+        'english_name': species.english_name,
+        'scientific_name': species.scientific_name,
+        'type': species.type,
+        'taxa': species.taxa,
+        'size': species.size,
+        'illustrations': [{
+            'id': i.id,
+            'image_name': i.image_name,
+            'image_link': i.image_link,
+            'sex': i.sex,
+            'breeding_status': i.breeding_status,
+            'subspecies': i.subspecies,
+            'is_default': i.is_default
+        } for i in illustration_rows],
+        'names': [{'language': n.language, 'name': n.name} for n in name_rows],
+        'frequency': [{
+            'state': f.state,
+            'district': f.district,
+            'frequency_rank': f.frequency_rank,
+            'observation_count': f.observation_count,
+            'seasonality': f.seasonality
+        } for f in frequency_rows]
+    }
+
+def search_params(args, default_limit, max_limit):
+    """
+    q, limit, state and district for the species search and match endpoints.
+    Raises ValueError if q is missing.
+    """
+    query = args.get('q', '').strip()
+    if not query:
+        raise ValueError('Query parameter q is required')
+    try:
+        limit = int(args.get('limit', default_limit))
+    except ValueError:
+        limit = default_limit
+    return query, max(1, min(limit, max_limit)), args.get('state'), args.get('district')
+
+def build_match_response(query, matches):
+    """/api/species/match response from SpeciesSearchIndex.match results"""
+    return {
+        'query': query,
+        'candidates': [dict(species, score=score, matched=matched) for score, matched, species in matches]
+    }
+
+def _grouped_birds_data(params):
+    """Birds grouped by type for grouped_birds_params, or {} if the region has none"""
+    results = db.session.execute(grouped_birds_query(**params)).all()
+    logger.info(f"Query returned {len(results)} results")
+    if not results:
+        return {}
+    # Get all names for these species in one query
+    name_rows = db.session.execute(names_query([r.species_id for r in results])).all()
+    return group_birds(results, name_rows)
+
+@api.route('/api/birds/grouped')
 def get_grouped_birds():
     """
     Get birds grouped by type for a specific state and optionally district.
@@ -81,153 +629,89 @@ def get_grouped_birds():
     Query Parameters:
     - state (required): The state name (e.g., 'Mizoram')
     - district (optional): The district name (e.g., 'Aizawl') or 'Statewide'
+    - max_rank (optional): Only birds ranked this common or more (frequency_rank
+      is accepted as an alias, as sent by the bird filter)
+    - per_type (optional): Only the top N birds of each type
+    - limit (optional): At most N birds overall, most common first
+    - fields (optional): Comma-separated bird fields to return, e.g. english_name,names,image_link
+    - format (optional): 'table' to send each group as column names plus rows of values
+    
+    Send 'Accept: application/x-msgpack' for a MessagePack response.
     
     Returns:
     - 200 OK: JSON object with birds grouped by type
-    - 400 Bad Request: If state parameter is missing
+    - 400 Bad Request: If state parameter is missing, a cutoff isn't a positive
+      integer, or fields/format are invalid
     - 404 Not Found: If no birds found for the selected region
     - 500 Internal Server Error: For other errors
     """
     try:
-        logger.info(f"API Request: /api/birds/grouped with params: {request.args}")
-        state = request.args.get('state')
-        district = request.args.get('district')
+        logger.info(f"API Request: /api/birds/grouped with params: {request.query_string.decode('utf-8', 'replace')}")
+        try:
+            params = grouped_birds_params(request.args)
+            fields = requested_fields(BIRD_FIELDS)
+            layout = requested_layout()
+        except ValueError as e:
+            logger.warning(f"Invalid /api/birds/grouped request: {e}")
+            return jsonify({'error': str(e)}), 400
 
-        if not state:
-            logger.warning("Missing 'state' parameter in request")
-            return jsonify({'error': 'State parameter is required'}), 400
+        # Requests with the same parameters and data version arriving together share one query
+        key = ('grouped', get_data_version(), tuple(sorted(params.items())))
+        grouped_data = grouped_flight.do(key, lambda: _grouped_birds_data(params))
 
-        # Build the query with explicit joins
-        query = db.session.query(
-            Frequency.frequency_rank,
-            Frequency.observation_count,
-            Frequency.seasonality,
-            Species.english_name,
-            Species.scientific_name,
-            Species.type,
-            Species.taxa,
-            Species.size,
-            Illustrations.image_link,
-            Illustrations.image_name,
-            Illustrations.sex,
-            Illustrations.breeding_status,
-            Illustrations.subspecies
-        ).join(
-            Species, Frequency.english_name == Species.english_name
-        ).outerjoin(
-            Illustrations,
-            (Species.english_name == Illustrations.species_english_name) &
-            (Illustrations.is_default == True)
-        ).filter(
-            Frequency.state == state
-        )
-
-        # Apply district filter if specified
-        if district and district != 'Statewide':
-            query = query.filter(Frequency.district == district)
-            logger.info(f"Filtering by district: {district}")
-        else:
-            # For statewide data, filter by district containing 'Statewide'
-            query = query.filter(Frequency.district.like('%Statewide%'))
-            logger.info("Using statewide data (districts containing 'Statewide')")
-
-        # Order by frequency rank
-        query = query.order_by(Frequency.frequency_rank)
-
-        # Execute query
-        results = query.all()
-        logger.info(f"Query returned {len(results)} results")
-
-        if not results:
-            logger.warning(f"No birds found for state={state}, district={district}")
+        if not grouped_data:
+            logger.warning(f"No birds found for state={params['state']}, district={params['district']}")
             return jsonify({'message': 'No birds found for the selected region'}), 404
 
-        # Process results
-        grouped_data = {}
-
-        for result in results:
-            # Get all names for this species
-            names_query = Names.query.filter_by(species_english_name=result.english_name).all()
-            names_dict = {'English': result.english_name}
-            for name in names_query:
-                names_dict[name.language] = name.name
-
-            # Build bird data object
-            bird_data = {
-                'english_name': result.english_name,
-                'scientific_name': result.scientific_name,
-                'type': result.type,
-                'taxa': result.taxa,
-                'size': result.size,
-                'frequency_rank': result.frequency_rank,
-                'observation_count': result.observation_count,
-                'seasonality': result.seasonality,
-                'image_link': result.image_link,
-                'image_name': result.image_name,
-                'sex': result.sex,
-                'breeding_status': result.breeding_status,
-                'subspecies': result.subspecies,
-                'names': names_dict
-            }
-
-            # Group by type
-            bird_type = result.type or 'Other Birds'
-            if bird_type not in grouped_data:
-                grouped_data[bird_type] = []
-            grouped_data[bird_type].append(bird_data)
-
         logger.info(f"Returning data with {len(grouped_data)} bird types")
-        return jsonify(grouped_data)
+        return encode({bird_type: shape(birds, fields, layout) for bird_type, birds in grouped_data.items()})
 
     except Exception as e:
         logger.error(f"Error in get_grouped_birds: {str(e)}", exc_info=True)
         return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
 
 # Admin endpoints
-@app.route('/api/admin/species')
+@api.route('/api/admin/species')
 def get_all_species():
     """
     Get all species in the database.
     
+    Query Parameters:
+    - fields (optional): Comma-separated species fields to return
+    - format (optional): 'table' for column names plus rows of values
+    
+    Send 'Accept: application/x-msgpack' for a MessagePack response.
+    
     Returns:
     - 200 OK: JSON array of all species
+    - 400 Bad Request: If fields or format are invalid
     - 500 Internal Server Error: For errors
     """
     try:
         logger.info("API Request: /api/admin/species")
-        species = Species.query.all()
-        
-        # Create response with additional information
-        result = []
-        for s in species:
-            # Get illustrations for this species
-            illustrations = Illustrations.query.filter_by(species_english_name=s.english_name).all()
-            illustration_data = [{'id': i.id, 'image_name': i.image_name, 'image_link': i.image_link, 
-                                'is_default': i.is_default} for i in illustrations]
-            
-            # Get names for this species
-            names = Names.query.filter_by(species_english_name=s.english_name).all()
-            names_data = [{'language': n.language, 'name': n.name} for n in names]
-            
-            # Build complete species record
-            species_data = {
-                'english_name': s.english_name,
-                'scientific_name': s.scientific_name,
-                'type': s.type,
-                'taxa': s.taxa,
-                'size': s.size,
-                'illustrations': illustration_data,
-                'names': names_data
-            }
-            result.append(species_data)
+        try:
+            fields = requested_fields(SPECIES_FIELDS)
+            layout = requested_layout()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Load illustrations and names once, only if they will be returned
+        queries = species_list_queries(
+            with_illustrations=not fields or 'illustrations' in fields,
+            with_names=not fields or 'names' in fields
+        )
+        species_rows, illustration_rows, name_rows = (
+            db.session.execute(query).all() if query is not None else [] for query in queries
+        )
+        result = build_species_list(species_rows, illustration_rows, name_rows)
             
         logger.info(f"Returning data for {len(result)} species")
-        return jsonify(result)
+        return encode(shape(result, fields, layout))
     except Exception as e:
         logger.error(f"Error in get_all_species: {str(e)}", exc_info=True)
         return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
 
-@app.route('/api/admin/species/<string:english_name>')
+@api.route('/api/admin/species/<string:english_name>')
 def get_species_detail(english_name):
     """
     Get detailed information for a specific species.
@@ -235,67 +719,40 @@ def get_species_detail(english_name):
     Parameters:
     - english_name: The English name of the species
     
+    Query Parameters:
+    - fields (optional): Comma-separated fields to return
+    
     Returns:
     - 200 OK: JSON object with species details
+    - 400 Bad Request: If fields are invalid
     - 404 Not Found: If species not found
     - 500 Internal Server Error: For errors
     """
     try:
         logger.info(f"API Request: /api/admin/species/{english_name}")
-        species = Species.query.filter_by(english_name=english_name).first()
+        try:
+            fields = requested_fields(SPECIES_FIELDS + ('frequency',))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        species_query, *detail_queries = species_detail_queries(english_name)
+        species = db.session.execute(species_query).first()
         
         if not species:
             logger.warning(f"Species not found: {english_name}")
             return jsonify({'error': 'Species not found'}), 404
         
-        # Get illustrations
-        illustrations = Illustrations.query.filter_by(species_english_name=english_name).all()
-        illustration_data = []
-        for i in illustrations:
-            illustration_data.append({
-                'id': i.id,
-                'image_name': i.image_name,
-                'image_link': i.image_link,
-                'sex': i.sex,
-                'breeding_status': i.breeding_status,
-                'subspecies': i.subspecies,
-                'is_default': i.is_default
-            })
-        
-        # Get names
-        names = Names.query.filter_by(species_english_name=english_name).all()
-        names_data = [{'language': n.language, 'name': n.name} for n in names]
-        
-        # Get frequency data
-        frequencies = Frequency.query.filter_by(english_name=english_name).all()
-        frequency_data = []
-        for f in frequencies:
-            frequency_data.append({
-                'state': f.state,
-                'district': f.district,
-                'frequency_rank': f.frequency_rank,
-                'observation_count': f.observation_count,
-                'seasonality': f.seasonality
-            })
-        
-        # Create detailed response
-        result = {
-            'english_name': species.english_name,
-            'scientific_name': species.scientific_name,
-            'type': species.type,
-            'taxa': species.taxa,
-            'size': species.size,
-            'illustrations': illustration_data,
-            'names': names_data,
-            'frequency': frequency_data
-        }
+        # Illustrations, names and frequency data
+        result = build_species_detail(species, *(db.session.execute(q).all() for q in detail_queries))
+        if fields:
+            result = {f: result[f] for f in fields}
         
-        return jsonify(result)
+        return encode(result)
     except Exception as e:
         logger.error(f"Error in get_species_detail: {str(e)}", exc_info=True)
         return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
 
-@app.route('/api/admin/statistics')
+@api.route('/api/admin/statistics')
 def get_statistics():
     """
     Get statistics about the database.
@@ -315,14 +772,14 @@ def get_statistics():
         
         # Count species by type
         species_by_type = {}
-        for s in db.session.query(Species.type, db.func.count(Species.english_name)).group_by(Species.type).all():
+        for s in db.session.query(Species.type, db.func.count(Species.id)).group_by(Species.type).all():
             species_by_type[s[0]] = s[1]
         
         # Count species with images
-        species_with_images = db.session.query(db.func.count(db.distinct(Illustrations.species_english_name))).scalar()
+        species_with_images = db.session.query(db.func.count(db.distinct(Illustrations.species_id))).scalar()
         
         # Count species with local names
-        species_with_names = db.session.query(db.func.count(db.distinct(Names.species_english_name))).scalar()
+        species_with_names = db.session.query(db.func.count(db.distinct(Names.species_id))).scalar()
         
         # Build statistics response
         stats = {
@@ -352,7 +809,90 @@ def get_statistics():
         logger.error(f"Error in get_statistics: {str(e)}", exc_info=True)
         return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
 
-@app.route('/api/admin/upload-csv', methods=['POST'])
+@api.route('/api/admin/slow-queries')
+def get_slow_queries():
+    """
+    Get statements slower than SLOW_QUERY_MS, aggregated by statement shape.
+    
+    Query Parameters:
+    - sort (optional): 'total_ms' (default), 'max_ms' or 'count'
+    - limit (optional): Number of shapes to return (default 50)
+    
+    Returns:
+    - 200 OK: JSON object with the threshold and, per shape, its normalized SQL,
+      count, total/mean/max time, calling routes, last parameters and query plan
+    - 400 Bad Request: If sort or limit are invalid
+    - 500 Internal Server Error: For errors
+    """
+    try:
+        logger.info("API Request: /api/admin/slow-queries")
+        sort = request.args.get('sort', 'total_ms')
+        if sort not in ('total_ms', 'max_ms', 'count'):
+            return jsonify({'error': "sort must be 'total_ms', 'max_ms' or 'count'"}), 400
+        try:
+            limit = _positive_int_arg('limit') or 50
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(slow_queries.report(sort=sort, limit=limit))
+    except Exception as e:
+        logger.error(f"Error in get_slow_queries: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/admin/slow-queries', methods=['DELETE'])
+def reset_slow_queries():
+    """
+    Clear the slow-query report, e.g. after adding an index.
+    
+    Returns:
+    - 200 OK: JSON confirmation
+    """
+    logger.info("API Request: DELETE /api/admin/slow-queries")
+    slow_queries.reset()
+    return jsonify({'message': 'Slow-query report cleared'})
+
+@api.route('/api/admin/db-pool')
+def get_db_pool_stats():
+    """
+    Get connection pool settings, checkout latency and saturation for this process,
+    and the health of each read replica when DATABASE_REPLICA_URLS is set.
+    
+    Each worker process has its own pool, so under gunicorn successive calls may
+    report different workers (see pid).
+    
+    Returns:
+    - 200 OK: JSON object with pool options, current pool state, checkout counts
+      and latency percentiles, and the SQLite pragmas in effect
+    - 500 Internal Server Error: For errors
+    """
+    try:
+        logger.info("API Request: /api/admin/db-pool")
+        engine = db.engine
+        metrics = pool_metrics(engine)
+        options = current_app.config['SQLALCHEMY_ENGINE_OPTIONS']
+
+        result = {
+            'dialect': engine.dialect.name,
+            'options': {k: v for k, v in options.items() if k != 'poolclass'},
+            'pool': metrics.snapshot(engine.pool) if metrics else {
+                'pool_class': type(engine.pool).__name__, 'status': engine.pool.status()
+            }
+        }
+        if engine.dialect.name == 'sqlite':
+            with engine.connect() as connection:
+                result['sqlite'] = {
+                    name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in sqlite_pragmas()
+                }
+        if replica_router.enabled:
+            result['replicas'] = replica_router.status()
+            for key, replica in result['replicas']['replicas'].items():
+                replica_metrics = pool_metrics(db.engines[key])
+                replica['pool'] = replica_metrics.snapshot(db.engines[key].pool) if replica_metrics else None
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Error in get_db_pool_stats: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/admin/upload-csv', methods=['POST'])
 def upload_csv():
     """
     Upload CSV files for ingestion.
@@ -378,7 +918,7 @@ def upload_csv():
         logger.error(f"Error in upload_csv: {str(e)}", exc_info=True)
         return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
 
-@app.route('/api/birds/locations')
+@api.route('/api/birds/locations')
 def get_locations():
     """
     Get a list of available states and districts.
@@ -390,26 +930,249 @@ def get_locations():
     try:
         logger.info("API Request: /api/birds/locations")
         
-        # Query all distinct states
-        states = [row[0] for row in db.session.query(Frequency.state).distinct().all()]
-        
-        # Query districts for each state
-        districts = {}
-        for state in states:
-            state_districts = [row[0] for row in db.session.query(Frequency.district)
-                                  .filter(Frequency.state == state)
-                                  .distinct().all()]
-            districts[state] = state_districts
-        
-        return jsonify({
-            'states': states,
-            'districts': districts
-        })
+        # All states and their districts in one query
+        return jsonify(build_locations(db.session.execute(locations_query()).all()))
     except Exception as e:
         logger.error(f"Error in get_locations: {str(e)}", exc_info=True)
         return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
 
-@app.route('/api/admin/initialize-db', methods=['POST'])
+@api.route('/api/birds/ranked')
+def get_merged_ranking():
+    """
+    Get birds for several regions with one combined ranking, grouped by type.
+    
+    frequency_rank is only comparable within one region, so the combined rank
+    is computed from observation counts across all the selected regions.
+    Results are cached per region set and data version.
+    
+    Query Parameters:
+    - region (required, repeatable): 'State/District', a district name, or a
+      state name for its statewide records
+    - method (optional): 'count' to rank by total observations (default) or
+      'share' to rank by summed share of each region's observations
+    - limit (optional): Only the N highest-ranked birds
+    - fields, format (optional): As for /api/birds/grouped
+    
+    Returns:
+    - 200 OK: JSON object with birds grouped by type. frequency_rank is the
+      combined rank; best_region_rank, observation_count, observation_share and
+      region_count describe the merge.
+    - 400 Bad Request: If no region is given, a region is unknown, or a
+      parameter is invalid
+    - 404 Not Found: If no birds are recorded in the regions
+    - 500 Internal Server Error: For other errors
+    """
+    try:
+        logger.info(f"API Request: /api/birds/ranked with params: {request.query_string.decode('utf-8', 'replace')}")
+        names = [r for r in request.args.getlist('region') if r.strip()]
+        if not names:
+            return jsonify({'error': 'At least one region parameter is required'}), 400
+        method = request.args.get('method', 'count')
+        if method not in ('count', 'share'):
+            return jsonify({'error': "method must be 'count' or 'share'"}), 400
+        try:
+            limit = _positive_int_arg('limit')
+            fields = requested_fields(BIRD_FIELDS + ('best_region_rank', 'observation_share', 'region_count'))
+            layout = requested_layout()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        data_version = get_data_version()
+        region_index.ensure_current(data_version)
+        try:
+            regions = sorted({region for name in names for region in region_index.regions_for(name)})
+        except RegionExpressionError as e:
+            return jsonify({'error': str(e)}), 400
+
+        cache_key = (tuple(regions), method, data_version)
+        birds = ranking_cache.get(cache_key)
+        if birds is None:
+            birds = _merged_ranking(regions, method)
+            ranking_cache.put(cache_key, birds)
+
+        if limit is not None:
+            birds = birds[:limit]
+        if not birds:
+            return jsonify({'message': 'No birds found for the selected regions'}), 404
+
+        grouped_data = {}
+        for bird in birds:
+            grouped_data.setdefault(bird['type'] or 'Other Birds', []).append(bird)
+        return encode({bird_type: shape(group, fields, layout) for bird_type, group in grouped_data.items()})
+    except Exception as e:
+        logger.error(f"Error in get_merged_ranking: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/birds/regions/query')
+def query_region_set():
+    """
+    Get birds for a set expression over regions, grouped by type.
+    
+    Regions are district names, state names (statewide records) or
+    'State/District', quoted when they contain spaces or hyphens. Operators:
+    | (in either), & (in both), - (in the first but not the second) and
+    parentheses; & binds tighter than | and -.
+    
+    Query Parameters:
+    - expr (required): e.g. "Aizawl" | "Lunglei", or ("Aizawl" & "Lunglei") - "Champhai"
+    
+    Returns:
+    - 200 OK: JSON object with birds grouped by type, as /api/birds/grouped.
+      Each bird has its best rank among the named regions and the regions it
+      was recorded in.
+    - 400 Bad Request: If expr is missing, malformed or names an unknown region
+    - 404 Not Found: If no birds match
+    - 500 Internal Server Error: For other errors
+    """
+    try:
+        logger.info(f"API Request: /api/birds/regions/query with params: {request.query_string.decode('utf-8', 'replace')}")
+        expression = request.args.get('expr', '').strip()
+        if not expression:
+            return jsonify({'error': 'Expression parameter expr is required'}), 400
+
+        region_index.ensure_current(get_data_version())
+        try:
+            birds = region_index.query(expression)
+        except RegionExpressionError as e:
+            return jsonify({'error': 'Invalid region expression', 'message': str(e)}), 400
+
+        if not birds:
+            return jsonify({'message': 'No birds found for the selected regions'}), 404
+
+        grouped_data = {}
+        for bird in birds:
+            grouped_data.setdefault(bird['type'] or 'Other Birds', []).append(bird)
+
+        logger.info(f"Region expression matched {len(birds)} birds in {len(grouped_data)} types")
+        return jsonify(grouped_data)
+    except Exception as e:
+        logger.error(f"Error in query_region_set: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/birds/explore')
+def explore_birds():
+    """
+    Filter the species catalogue by facets and get live counts per facet value.
+    
+    Values within a facet are alternatives (OR); different facets must all
+    match (AND). Repeat a parameter to select several values.
+    
+    Query Parameters:
+    - type, size, seasonality (optional): Facet values, e.g. type=Bulbuls&type=Owls
+    - has_image (optional): 'true' or 'false'
+    - region (optional): 'State/District', e.g. region=Mizoram/Aizawl
+    - q (optional): Only species whose names match this search text
+    - offset, limit (optional): Page through results (default limit: 50, max: 500)
+    - fields, format (optional): As for /api/birds/grouped
+    
+    Returns:
+    - 200 OK: JSON object with total, a page of species and counts per facet
+      value. Each facet's counts apply every other facet's filter, so they show
+      what choosing that value would return.
+    - 400 Bad Request: If paging, fields or format are invalid
+    - 500 Internal Server Error: For errors
+    """
+    try:
+        try:
+            offset = _positive_int_arg('offset', allow_zero=True) or 0
+            limit = min(_positive_int_arg('limit') or 50, 500)
+            fields = requested_fields(CATALOGUE_FIELDS)
+            layout = requested_layout()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        data_version = get_data_version()
+        facet_index.ensure_current(data_version)
+        selected = {facet: request.args.getlist(facet) for facet in FACETS if request.args.getlist(facet)}
+
+        restrict = None
+        query = request.args.get('q', '').strip()
+        if query:
+            search_index.ensure_current(data_version)
+            _, hits = search_index.search(query, limit=facet_index.species_count or 1)
+            restrict = facet_index.bits_for(hit['english_name'] for hit in hits)
+
+        total, results, counts = facet_index.query(selected, restrict=restrict, offset=offset, limit=limit)
+        return encode({
+            'total': total,
+            'offset': offset,
+            'results': shape(results, fields, layout),
+            'facets': counts
+        })
+    except Exception as e:
+        logger.error(f"Error in explore_birds: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/species/search')
+def search_species():
+    """
+    Search species by English, scientific or local (e.g. Mizo) name.
+    
+    Every word of the query must match the start of a word in the species'
+    names; case, hyphens and diacritics are ignored.
+    
+    Query Parameters:
+    - q (required): The search text, e.g. 'blue thr' or 'tlai'
+    - limit (optional): Maximum results (default: 20, max: 100)
+    - state (optional): Only species recorded in this state
+    - district (optional): Only species recorded in this district ('Statewide' for the whole state)
+    - fields (optional): Comma-separated result fields to return
+    - format (optional): 'table' for results as column names plus rows of values
+    
+    Returns:
+    - 200 OK: JSON object with the total match count and ranked results
+    - 400 Bad Request: If q is missing or fields/format are invalid
+    - 500 Internal Server Error: For errors
+    """
+    try:
+        try:
+            query, limit, state, district = search_params(request.args, default_limit=20, max_limit=100)
+            fields = requested_fields(SEARCH_FIELDS)
+            layout = requested_layout()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        search_index.ensure_current(get_data_version())
+        total, results = search_index.search(query, limit=limit, state=state, district=district)
+        return encode({'query': query, 'total': total, 'results': shape(results, fields, layout)})
+    except Exception as e:
+        logger.error(f"Error in search_species: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/species/match')
+def match_species():
+    """
+    Find the species whose names best match a possibly misspelled name.
+    
+    Tolerates typos, phonetic spellings and hyphenation differences
+    (e.g. 'Blue throated barbet', 'tlaiber').
+    
+    Query Parameters:
+    - q (required): The name to match
+    - limit (optional): Maximum candidates (default: 5, max: 50)
+    - min_score (optional): Minimum score between 0 and 1 (default: 0.3)
+    - state / district (optional): Only species recorded in this region
+    
+    Returns:
+    - 200 OK: JSON object with candidates, each with a score and the matched name
+    - 400 Bad Request: If q is missing
+    - 500 Internal Server Error: For errors
+    """
+    try:
+        try:
+            query, limit, state, district = search_params(request.args, default_limit=5, max_limit=50)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        min_score = request.args.get('min_score', 0.3, type=float)
+
+        search_index.ensure_current(get_data_version())
+        matches = search_index.match(query, limit=limit, min_score=min_score, state=state, district=district)
+        return jsonify(build_match_response(query, matches))
+    except Exception as e:
+        logger.error(f"Error in match_species: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/admin/initialize-db', methods=['POST'])
 def initialize_database():
     """Initialize database with sample data for testing"""
     try:
@@ -417,6 +1180,10 @@ def initialize_database():
         
         # Create all tables
         db.create_all()
+
+        # create_all skips indexes added to tables that already exist
+        for index in Frequency.__table__.indexes:
+            index.create(bind=db.engine, checkfirst=True)
         
         # Check if data already exists
         if Species.query.count() > 0:
@@ -435,35 +1202,36 @@ def initialize_database():
             Species(english_name="Pied Kingfisher", scientific_name="Ceryle rudis", type="bird", taxa="birds", size="medium"),
             Species(english_name="Brown-headed Barbet", scientific_name="Psilopogon zeylanicus", type="bird", taxa="birds", size="small"),
         ]
+        species = {s.english_name: s for s in sample_species}
         
         # Add sample frequency data for Mizoram
         sample_frequency = [
-            Frequency(english_name="House Sparrow", state="Mizoram", district="Aizawl", frequency_rank=1, observation_count=150, seasonality="Year-round"),
-            Frequency(english_name="Red-vented Bulbul", state="Mizoram", district="Aizawl", frequency_rank=3, observation_count=120, seasonality="Year-round"),
-            Frequency(english_name="Black Drongo", state="Mizoram", district="Aizawl", frequency_rank=7, observation_count=85, seasonality="Year-round"),
-            Frequency(english_name="White-throated Kingfisher", state="Mizoram", district="Aizawl", frequency_rank=8, observation_count=78, seasonality="Mar-Oct"),
-            Frequency(english_name="Common Myna", state="Mizoram", district="Aizawl", frequency_rank=5, observation_count=95, seasonality="Year-round"),
-            Frequency(english_name="Rose-ringed Parakeet", state="Mizoram", district="Aizawl", frequency_rank=10, observation_count=65, seasonality="Year-round"),
-            Frequency(english_name="Indian Robin", state="Mizoram", district="Aizawl", frequency_rank=12, observation_count=55, seasonality="Nov-Feb"),
-            Frequency(english_name="Asian Paradise Flycatcher", state="Mizoram", district="Aizawl", frequency_rank=15, observation_count=42, seasonality="Apr-Sep"),
-            Frequency(english_name="Pied Kingfisher", state="Mizoram", district="Aizawl", frequency_rank=18, observation_count=35, seasonality="Nov-Mar"),
-            Frequency(english_name="Brown-headed Barbet", state="Mizoram", district="Aizawl", frequency_rank=22, observation_count=28, seasonality="Year-round"),
+            Frequency(species=species["House Sparrow"], state="Mizoram", district="Aizawl", frequency_rank=1, observation_count=150, seasonality="Year-round"),
+            Frequency(species=species["Red-vented Bulbul"], state="Mizoram", district="Aizawl", frequency_rank=3, observation_count=120, seasonality="Year-round"),
+            Frequency(species=species["Black Drongo"], state="Mizoram", district="Aizawl", frequency_rank=7, observation_count=85, seasonality="Year-round"),
+            Frequency(species=species["White-throated Kingfisher"], state="Mizoram", district="Aizawl", frequency_rank=8, observation_count=78, seasonality="Mar-Oct"),
+            Frequency(species=species["Common Myna"], state="Mizoram", district="Aizawl", frequency_rank=5, observation_count=95, seasonality="Year-round"),
+            Frequency(species=species["Rose-ringed Parakeet"], state="Mizoram", district="Aizawl", frequency_rank=10, observation_count=65, seasonality="Year-round"),
+            Frequency(species=species["Indian Robin"], state="Mizoram", district="Aizawl", frequency_rank=12, observation_count=55, seasonality="Nov-Feb"),
+            Frequency(species=species["Asian Paradise Flycatcher"], state="Mizoram", district="Aizawl", frequency_rank=15, observation_count=42, seasonality="Apr-Sep"),
+            Frequency(species=species["Pied Kingfisher"], state="Mizoram", district="Aizawl", frequency_rank=18, observation_count=35, seasonality="Nov-Mar"),
+            Frequency(species=species["Brown-headed Barbet"], state="Mizoram", district="Aizawl", frequency_rank=22, observation_count=28, seasonality="Year-round"),
             
             # Add data for Lunglei district
-            Frequency(english_name="House Sparrow", state="Mizoram", district="Lunglei", frequency_rank=2, observation_count=135, seasonality="Year-round"),
-            Frequency(english_name="Red-vented Bulbul", state="Mizoram", district="Lunglei", frequency_rank=4, observation_count=110, seasonality="Year-round"),
-            Frequency(english_name="Common Myna", state="Mizoram", district="Lunglei", frequency_rank=6, observation_count=88, seasonality="Year-round"),
-            Frequency(english_name="Black Drongo", state="Mizoram", district="Lunglei", frequency_rank=9, observation_count=72, seasonality="Year-round"),
-            Frequency(english_name="White-throated Kingfisher", state="Mizoram", district="Lunglei", frequency_rank=11, observation_count=62, seasonality="Mar-Oct"),
+            Frequency(species=species["House Sparrow"], state="Mizoram", district="Lunglei", frequency_rank=2, observation_count=135, seasonality="Year-round"),
+            Frequency(species=species["Red-vented Bulbul"], state="Mizoram", district="Lunglei", frequency_rank=4, observation_count=110, seasonality="Year-round"),
+            Frequency(species=species["Common Myna"], state="Mizoram", district="Lunglei", frequency_rank=6, observation_count=88, seasonality="Year-round"),
+            Frequency(species=species["Black Drongo"], state="Mizoram", district="Lunglei", frequency_rank=9, observation_count=72, seasonality="Year-round"),
+            Frequency(species=species["White-throated Kingfisher"], state="Mizoram", district="Lunglei", frequency_rank=11, observation_count=62, seasonality="Mar-Oct"),
         ]
         
         # Add sample illustrations
         sample_illustrations = [
-            Illustrations(species_english_name="House Sparrow", image_link="https://images.unsplash.com/photo-1552728089-57bdde30beb3?w=400&h=300&fit=crop", image_name="house_sparrow.jpg", is_default=True, sex="unknown", breeding_status="unknown"),
-            Illustrations(species_english_name="Red-vented Bulbul", image_link="https://images.unsplash.com/photo-1549366021-9f761d040a94?w=400&h=300&fit=crop", image_name="red_vented_bulbul.jpg", is_default=True, sex="unknown", breeding_status="unknown"),
-            Illustrations(species_english_name="Black Drongo", image_link="https://images.unsplash.com/photo-1444927714506-8492d94b5ba0?w=400&h=300&fit=crop", image_name="black_drongo.jpg", is_default=True, sex="unknown", breeding_status="unknown"),
-            Illustrations(species_english_name="White-throated Kingfisher", image_link="https://images.unsplash.com/photo-1578662996442-48f60103fc96?w=400&h=300&fit=crop", image_name="white_throated_kingfisher.jpg", is_default=True, sex="unknown", breeding_status="unknown"),
-            Illustrations(species_english_name="Common Myna", image_link="https://images.unsplash.com/photo-1565002330297-58754c040ddc?w=400&h=300&fit=crop", image_name="common_myna.jpg", is_default=True, sex="unknown", breeding_status="unknown"),
+            Illustrations(species=species["House Sparrow"], image_link="https://images.unsplash.com/photo-1552728089-57bdde30beb3?w=400&h=300&fit=crop", image_name="house_sparrow.jpg", is_default=True, sex="unknown", breeding_status="unknown"),
+            Illustrations(species=species["Red-vented Bulbul"], image_link="https://images.unsplash.com/photo-1549366021-9f761d040a94?w=400&h=300&fit=crop", image_name="red_vented_bulbul.jpg", is_default=True, sex="unknown", breeding_status="unknown"),
+            Illustrations(species=species["Black Drongo"], image_link="https://images.unsplash.com/photo-1444927714506-8492d94b5ba0?w=400&h=300&fit=crop", image_name="black_drongo.jpg", is_default=True, sex="unknown", breeding_status="unknown"),
+            Illustrations(species=species["White-throated Kingfisher"], image_link="https://images.unsplash.com/photo-1578662996442-48f60103fc96?w=400&h=300&fit=crop", image_name="white_throated_kingfisher.jpg", is_default=True, sex="unknown", breeding_status="unknown"),
+            Illustrations(species=species["Common Myna"], image_link="https://images.unsplash.com/photo-1565002330297-58754c040ddc?w=400&h=300&fit=crop", image_name="common_myna.jpg", is_default=True, sex="unknown", breeding_status="unknown"),
         ]
         
         # Add to database
@@ -477,6 +1245,7 @@ def initialize_database():
             db.session.add(illus)
         
         db.session.commit()
+        bump_data_version()
         
         return jsonify({
             'message': 'Database initialized successfully',
@@ -490,5 +1259,585 @@ def initialize_database():
         logger.error(f"Error initializing database: {str(e)}", exc_info=True)
         return jsonify({'error': 'Failed to initialize database', 'message': str(e)}), 500
 
+# PDF job endpoints
+@api.route('/api/pdf/jobs', methods=['POST'])
+def create_pdf_job():
+    """
+    Queue a pocket guide for server-side PDF rendering.
+    
+    Expected JSON body:
+    - title (required): The guide title
+    - species (optional): English names of the species to include, in order
+    - state / district (optional): Region used for ranks, seasonality and,
+      when species is omitted, the species list itself
+    - location, creator (optional): Cover page text
+    - options (optional): include_images, show_scientific_names, languages
+    
+    Returns:
+    - 202 Accepted: JSON object with the queued job
+    - 400 Bad Request: If the title or the species/region selection is missing
+    - 500 Internal Server Error: For errors
+    """
+    try:
+        logger.info("API Request: /api/pdf/jobs (create)")
+        pdf_queue.ensure_started()
+        data = request.get_json(silent=True) or {}
+
+        if not data.get('title'):
+            return jsonify({'error': 'Title is required'}), 400
+        if not data.get('species') and not data.get('state'):
+            return jsonify({'error': 'Either species or state is required'}), 400
+
+        job = PdfJob(
+            title=data['title'],
+            request_data=json.dumps(data),
+            max_attempts=pdf_queue.max_attempts
+        )
+        job.append_log('Job queued')
+        db.session.add(job)
+        db.session.commit()
+        pdf_queue.notify()
+
+        logger.info(f"Queued PDF job {job.id}")
+        return jsonify(job.to_dict()), 202
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in create_pdf_job: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/pdf/jobs')
+def list_pdf_jobs():
+    """
+    List PDF jobs for the Admin > PDF Requests table, newest first.
+    
+    Query Parameters:
+    - status (optional): Only return jobs with this status
+    - limit (optional): Maximum number of jobs to return (default 50)
+    
+    Returns:
+    - 200 OK: JSON array of jobs
+    - 400 Bad Request: If limit is not a positive integer
+    - 500 Internal Server Error: For errors
+    """
+    try:
+        logger.info(f"API Request: /api/pdf/jobs with params: {request.query_string.decode('utf-8', 'replace')}")
+        try:
+            limit = min(_positive_int_arg('limit') or 50, 500)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        pdf_queue.ensure_started()
+        query = PdfJob.query
+        if request.args.get('status'):
+            query = query.filter(PdfJob.status == request.args['status'])
+        jobs = query.order_by(PdfJob.created_at.desc()).limit(limit).all()
+        return jsonify([job.to_dict() for job in jobs])
+    except Exception as e:
+        logger.error(f"Error in list_pdf_jobs: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/pdf/stats')
+def get_pdf_stats():
+    """
+    Aggregate render metrics over recently completed PDF jobs.
+    
+    Query Parameters:
+    - limit (optional): Number of most recent completed jobs to include (default 100)
+    
+    Returns:
+    - 200 OK: JSON object with job counts, render times, file sizes, image reuse and card cache hit ratio
+    - 400 Bad Request: If limit is not a positive integer
+    - 500 Internal Server Error: For errors
+    """
+    try:
+        logger.info("API Request: /api/pdf/stats")
+        try:
+            limit = min(_positive_int_arg('limit') or 100, 1000)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        pdf_queue.ensure_started()
+        jobs = PdfJob.query.filter(PdfJob.status == JOB_COMPLETED, PdfJob.stats != None) \
+            .order_by(PdfJob.finished_at.desc()).limit(limit).all()
+
+        hits = misses = 0
+        render_seconds = []
+        sizes = []
+        images_embedded = image_references = 0
+        for job in jobs:
+            stats = json.loads(job.stats)
+            hits += stats.get('fragment_cache', {}).get('hits', 0)
+            misses += stats.get('fragment_cache', {}).get('misses', 0)
+            render_seconds.append(stats.get('render_seconds', 0))
+            sizes.append(stats.get('bytes', 0))
+            images_embedded += stats.get('images', {}).get('embedded', 0)
+            image_references += stats.get('images', {}).get('references', 0)
+
+        status_counts = dict(db.session.query(PdfJob.status, db.func.count(PdfJob.id))
+                             .group_by(PdfJob.status).all())
+
+        return jsonify({
+            'jobs': status_counts,
+            'sampled_jobs': len(jobs),
+            'fragment_cache': {
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': round(hits / (hits + misses), 3) if hits + misses else None
+            },
+            'render_seconds': {
+                'mean': round(sum(render_seconds) / len(render_seconds), 3) if render_seconds else None,
+                'max': max(render_seconds) if render_seconds else None
+            },
+            'file_bytes': {
+                'mean': round(sum(sizes) / len(sizes)) if sizes else None,
+                'max': max(sizes) if sizes else None
+            },
+            'images': {
+                'embedded': images_embedded,
+                'references': image_references
+            }
+        })
+    except Exception as e:
+        logger.error(f"Error in get_pdf_stats: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/pdf/jobs/<int:job_id>')
+def get_pdf_job(job_id):
+    """
+    Get the status and progress of a PDF job.
+    
+    Returns:
+    - 200 OK: JSON object with the job, including its log
+    - 404 Not Found: If the job doesn't exist
+    - 500 Internal Server Error: For errors
+    """
+    try:
+        pdf_queue.ensure_started()
+        job = db.session.get(PdfJob, job_id)
+        if not job:
+            return jsonify({'error': 'PDF job not found'}), 404
+        result = job.to_dict()
+        result['log'] = job.log.splitlines() if job.log else []
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Error in get_pdf_job: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/pdf/jobs/<int:job_id>/download')
+def download_pdf_job(job_id):
+    """
+    Download the rendered PDF of a completed job.
+    
+    Returns:
+    - 200 OK: The PDF file
+    - 404 Not Found: If the job doesn't exist
+    - 409 Conflict: If the job hasn't completed yet
+    - 500 Internal Server Error: For errors
+    """
+    try:
+        logger.info(f"API Request: /api/pdf/jobs/{job_id}/download")
+        job = db.session.get(PdfJob, job_id)
+        if not job:
+            return jsonify({'error': 'PDF job not found'}), 404
+        if job.status != JOB_COMPLETED or not job.output_path or not os.path.exists(job.output_path):
+            return jsonify({'error': 'PDF is not ready', 'status': job.status}), 409
+
+        filename = ''.join(c if c.isalnum() else '_' for c in (job.title or 'guide')).lower()
+        return send_file(job.output_path, mimetype='application/pdf', as_attachment=True,
+                         download_name=f"{filename}_bird_guide.pdf")
+    except Exception as e:
+        logger.error(f"Error in download_pdf_job: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/pdf/jobs/<int:job_id>/retry', methods=['POST'])
+def retry_pdf_job(job_id):
+    """
+    Re-queue a failed PDF job with a fresh set of attempts.
+    
+    Returns:
+    - 202 Accepted: JSON object with the re-queued job
+    - 404 Not Found: If the job doesn't exist
+    - 409 Conflict: If the job hasn't failed
+    - 500 Internal Server Error: For errors
+    """
+    try:
+        logger.info(f"API Request: /api/pdf/jobs/{job_id}/retry")
+        pdf_queue.ensure_started()
+        job = db.session.get(PdfJob, job_id)
+        if not job:
+            return jsonify({'error': 'PDF job not found'}), 404
+        if job.status != JOB_FAILED:
+            return jsonify({'error': 'Only failed jobs can be retried', 'status': job.status}), 409
+
+        job.status = JOB_QUEUED
+        job.attempts = 0
+        job.progress = 0
+        job.next_attempt_at = None
+        job.updated_at = datetime.utcnow()
+        job.append_log('Manual retry requested')
+        db.session.commit()
+        pdf_queue.notify()
+
+        return jsonify(job.to_dict()), 202
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in retry_pdf_job: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+# Guide persistence endpoints
+@api.route('/api/guides', methods=['POST'])
+@api.route('/api/guides/create', methods=['POST'])
+def create_guide():
+    """
+    Create a new guide.
+    
+    Expected JSON body:
+    - title (required): The guide title
+    - document (optional): The initial guide document (pages, boxes, settings).
+      If omitted, the request body itself is stored as the document.
+    
+    Returns:
+    - 201 Created: JSON object with guide_id, revision and document
+    - 400 Bad Request: If the title is missing
+    - 500 Internal Server Error: For errors
+    """
+    try:
+        logger.info("API Request: /api/guides (create)")
+        guide_store.ensure_tables()
+        data = request.get_json(silent=True) or {}
+        if not data.get('title'):
+            return jsonify({'error': 'Title is required'}), 400
+
+        document = data['document'] if 'document' in data else data
+        guide = guide_store.create(str(data['title'])[:255], document)
+
+        result = guide.to_dict()
+        result['document'] = document
+        return jsonify(result), 201
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in create_guide: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/guides')
+def list_guides():
+    """
+    List guides, most recently edited first (without their documents).
+    
+    Returns:
+    - 200 OK: JSON array of guide summaries
+    - 500 Internal Server Error: For errors
+    """
+    try:
+        logger.info("API Request: /api/guides")
+        guide_store.ensure_tables()
+        guides = Guide.query.order_by(Guide.updated_at.desc()).all()
+        return jsonify([g.to_dict() for g in guides])
+    except Exception as e:
+        logger.error(f"Error in list_guides: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/guides/<int:guide_id>')
+def get_guide(guide_id):
+    """
+    Get a guide document.
+    
+    Query Parameters:
+    - since (optional): A revision the client already has. If the patches
+      after it are still available, only those are returned.
+    
+    Returns:
+    - 200 OK: JSON object with the document, or with patches when since is given
+    - 404 Not Found: If the guide doesn't exist
+    - 500 Internal Server Error: For errors
+    """
+    try:
+        guide_store.ensure_tables()
+        guide = db.session.get(Guide, guide_id)
+        if not guide:
+            return jsonify({'error': 'Guide not found'}), 404
+
+        result = guide.to_dict()
+        since = request.args.get('since', type=int)
+        if since is not None and since <= guide.revision:
+            patches = guide_store.patches_since(guide.id, since, guide.revision)
+            if patches is not None:
+                result['base_revision'] = since
+                result['patches'] = patches
+                return jsonify(result)
+
+        result['document'] = guide_store.load(guide)
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Error in get_guide: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/guides/<int:guide_id>', methods=['PATCH'])
+def autosave_guide(guide_id):
+    """
+    Autosave a guide by applying a JSON Patch (RFC 6902) delta.
+    
+    Expected JSON body:
+    - base_revision (required): The revision the patch was made against
+    - patch (required): List of JSON Patch operations
+    
+    Returns:
+    - 200 OK: JSON object with the new revision
+    - 400 Bad Request: If the body is malformed or the patch doesn't apply
+    - 404 Not Found: If the guide doesn't exist
+    - 409 Conflict: If base_revision is stale; includes the current revision
+      and, when available, the patches needed to catch up
+    - 500 Internal Server Error: For errors
+    """
+    try:
+        guide_store.ensure_tables()
+        data = request.get_json(silent=True) or {}
+        base_revision = data.get('base_revision')
+        patch = data.get('patch')
+        if not isinstance(base_revision, int) or not isinstance(patch, list):
+            return jsonify({'error': 'base_revision (integer) and patch (list) are required'}), 400
+
+        guide = db.session.get(Guide, guide_id)
+        if not guide:
+            return jsonify({'error': 'Guide not found'}), 404
+
+        revision, _ = guide_store.apply(guide, base_revision, patch)
+        return jsonify({'guide_id': guide_id, 'revision': revision})
+    except RevisionConflict as e:
+        logger.info(f"Autosave conflict on guide {guide_id}: base {base_revision}, current {e.current_revision}")
+        return jsonify({
+            'error': 'Revision conflict',
+            'current_revision': e.current_revision,
+            'patches': e.patches
+        }), 409
+    except JsonPatchError as e:
+        db.session.rollback()
+        return jsonify({'error': 'Invalid patch', 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in autosave_guide: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/guides/<int:guide_id>', methods=['PUT'])
+def replace_guide(guide_id):
+    """
+    Replace a guide document wholesale.
+    
+    Expected JSON body:
+    - document (required): The full guide document
+    - base_revision (optional): Reject the save if the guide has moved on
+    
+    Returns:
+    - 200 OK: JSON object with the new revision
+    - 400 Bad Request: If the document is missing
+    - 404 Not Found: If the guide doesn't exist
+    - 409 Conflict: If base_revision is stale
+    - 500 Internal Server Error: For errors
+    """
+    try:
+        guide_store.ensure_tables()
+        data = request.get_json(silent=True) or {}
+        if 'document' not in data:
+            return jsonify({'error': 'Document is required'}), 400
+
+        guide = db.session.get(Guide, guide_id)
+        if not guide:
+            return jsonify({'error': 'Guide not found'}), 404
+
+        revision = guide_store.replace(guide, data.get('base_revision'), data['document'])
+        return jsonify({'guide_id': guide_id, 'revision': revision})
+    except RevisionConflict as e:
+        return jsonify({'error': 'Revision conflict', 'current_revision': e.current_revision}), 409
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in replace_guide: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/guides/<int:guide_id>', methods=['DELETE'])
+def delete_guide(guide_id):
+    """
+    Delete a guide with its snapshots and patches.
+    
+    Returns:
+    - 200 OK: Confirmation message
+    - 404 Not Found: If the guide doesn't exist
+    - 500 Internal Server Error: For errors
+    """
+    try:
+        logger.info(f"API Request: DELETE /api/guides/{guide_id}")
+        guide_store.ensure_tables()
+        guide = db.session.get(Guide, guide_id)
+        if not guide:
+            return jsonify({'error': 'Guide not found'}), 404
+        guide_store.delete(guide)
+        return jsonify({'message': 'Guide deleted', 'guide_id': guide_id})
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in delete_guide: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/guides/<int:guide_id>/previews')
+def get_guide_previews(guide_id):
+    """
+    Get page thumbnails for a guide, rendering the ones that are missing.
+    
+    Thumbnails are keyed by page content, so after an edit only changed pages
+    come back as pending. Poll until every page is ready.
+    
+    Query Parameters:
+    - pages (optional): Comma-separated page indexes, e.g. 0 for the guide grid
+    - retry (optional): Set to 1 to re-render pages that previously failed
+    
+    Returns:
+    - 200 OK: JSON object with the revision and a status and url per page
+    - 400 Bad Request: If pages isn't a list of integers
+    - 404 Not Found: If the guide doesn't exist
+    - 500 Internal Server Error: For errors
+    """
+    try:
+        guide_store.ensure_tables()
+        guide = db.session.get(Guide, guide_id)
+        if not guide:
+            return jsonify({'error': 'Guide not found'}), 404
+
+        pages = None
+        if request.args.get('pages'):
+            try:
+                pages = [int(p) for p in request.args['pages'].split(',')]
+            except ValueError:
+                return jsonify({'error': 'pages must be comma-separated integers'}), 400
+
+        previews = preview_renderer.previews(guide_store.load(guide), pages,
+                                             retry_failed=request.args.get('retry') == '1')
+        for preview in previews:
+            if preview['status'] == 'ready':
+                preview['url'] = f"/api/guides/{guide_id}/previews/{preview['hash']}.png"
+
+        return jsonify({
+            'guide_id': guide_id,
+            'revision': guide.revision,
+            'complete': all(p['status'] == 'ready' for p in previews),
+            'pages': previews
+        })
+    except Exception as e:
+        logger.error(f"Error in get_guide_previews: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/guides/<int:guide_id>/previews/<string:content_hash>.png')
+def get_guide_preview_image(guide_id, content_hash):
+    """
+    Download a page thumbnail. The URL is content-addressed, so it can be
+    cached indefinitely by the browser.
+    
+    Returns:
+    - 200 OK: The PNG thumbnail
+    - 404 Not Found: If the thumbnail hasn't been rendered
+    - 500 Internal Server Error: For errors
+    """
+    try:
+        path = preview_renderer.path_for(content_hash)
+        if len(content_hash) != 40 or not all(c in '0123456789abcdef' for c in content_hash) \
+                or not os.path.exists(path):
+            return jsonify({'error': 'Preview not found'}), 404
+        return send_file(path, mimetype='image/png', max_age=31536000)
+    except Exception as e:
+        logger.error(f"Error in get_guide_preview_image: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@api.route('/api/guides/previews/stats')
+def get_preview_stats():
+    """
+    Get preview renderer counters for this API process.
+    
+    Returns:
+    - 200 OK: JSON object with worker, pending, rendered and reused counts
+    """
+    return jsonify(preview_renderer.stats())
+
+def _cache_metrics():
+    caches = {
+        'ranking': ranking_cache.stats(),
+        'guide_documents': guide_store.cache_stats(),
+    }
+    previews = preview_renderer.stats()
+    caches['page_previews'] = {'hits': previews['reused'], 'misses': previews['rendered']}
+    flights = grouped_flight.stats()
+    yield ('coalesced_requests_total', 'counter', 'Requests that shared an identical in-flight query',
+           [({'endpoint': '/api/birds/grouped', 'source': 'thread'}, flights['followers']),
+            ({'endpoint': '/api/birds/grouped', 'source': 'worker'}, flights['shared_results'])])
+    yield ('cache_hits_total', 'counter', 'Cache hits',
+           [({'cache': name}, stats['hits']) for name, stats in caches.items()])
+    yield ('cache_misses_total', 'counter', 'Cache misses',
+           [({'cache': name}, stats['misses']) for name, stats in caches.items()])
+
+def _pool_metrics():
+    pools = {}
+    for key, engine in db.engines.items():
+        metrics = pool_metrics(engine)
+        if metrics:
+            pools[key or 'primary'] = metrics.snapshot(engine.pool)
+    yield ('db_pool_checked_out', 'gauge', 'Connections in use',
+           [({'database': name}, pool['checked_out']) for name, pool in pools.items()])
+    yield ('db_pool_capacity', 'gauge', 'Pool size plus max overflow',
+           [({'database': name}, pool['capacity']) for name, pool in pools.items()])
+    yield ('db_pool_checkouts_total', 'counter', 'Connection checkouts',
+           [({'database': name}, pool['checkouts']) for name, pool in pools.items()])
+    yield ('db_pool_saturated_checkouts_total', 'counter', 'Checkouts that found every connection in use',
+           [({'database': name}, pool['saturated_checkouts']) for name, pool in pools.items()])
+    yield ('db_pool_timeouts_total', 'counter', 'Checkouts that timed out waiting for a connection',
+           [({'database': name}, pool['timeouts']) for name, pool in pools.items()])
+    yield ('db_pool_checkout_p95_seconds', 'gauge', '95th percentile wait for a connection',
+           [({'database': name}, pool['checkout_ms']['p95'] / 1000 if pool['checkout_ms']['p95'] is not None else None)
+            for name, pool in pools.items()])
+    if replica_router.enabled:
+        yield ('db_replica_healthy', 'gauge', '1 if the replica is in the read rotation',
+               [({'replica': key}, int(replica['healthy']))
+                for key, replica in replica_router.status()['replicas'].items()])
+
+def _job_metrics():
+    try:
+        pdf_jobs = dict(db.session.query(PdfJob.status, db.func.count(PdfJob.id)).group_by(PdfJob.status).all())
+    except SQLAlchemyError:
+        db.session.rollback()  # no PDF job table until the first job is queued
+        pdf_jobs = {}
+    yield ('pdf_jobs', 'gauge', 'PDF jobs by status',
+           [({'status': status}, pdf_jobs.get(status, 0))
+            for status in (JOB_QUEUED, JOB_PROCESSING, JOB_COMPLETED, JOB_FAILED)])
+    previews = preview_renderer.stats()
+    yield ('preview_renders_pending', 'gauge', 'Page previews queued or rendering', [({}, previews['pending'])])
+
+def _catalogue_metrics():
+    version = db.session.get(DataVersion, 1)
+    yield ('data_version', 'gauge', 'Catalogue version, bumped by each ingestion',
+           [({}, version.version if version else 0)])
+    if version and version.updated_at:
+        yield ('data_version_updated_timestamp_seconds', 'gauge', 'When the last ingestion finished',
+               [({}, round((version.updated_at - datetime(1970, 1, 1)).total_seconds()))])
+    yield ('catalogue_rows', 'gauge', 'Rows in the catalogue tables', [
+        ({'table': 'species'}, Species.query.count()),
+        ({'table': 'frequency'}, Frequency.query.count())
+    ])
+
+def _log_metrics():
+    logs = log_handler.stats()
+    yield ('log_records_total', 'counter', 'Log records written by logger',
+           [({'logger': name}, count) for name, count in sorted(logs['written'].items())])
+    yield ('log_records_sampled_out_total', 'counter', 'INFO/DEBUG records skipped by LOG_SAMPLE',
+           [({'logger': name}, count) for name, count in sorted(logs['sampled_out'].items())])
+    yield ('log_records_dropped_total', 'counter', 'Records dropped because the log queue was full',
+           [({}, logs['dropped'])])
+    yield ('log_queue_depth', 'gauge', 'Records waiting to be written', [({}, logs['queued'])])
+
+@api.route('/metrics')
+def get_metrics():
+    """
+    Prometheus metrics for this process.
+    
+    Returns:
+    - 200 OK: Text exposition format with per-route request counts and latency
+      histograms, SQL statements and time per request, cache hits and misses,
+      connection pool usage, PDF job and preview gauges, the catalogue version
+      and log volume
+    """
+    return Response(metrics_registry.render(), content_type=METRICS_CONTENT_TYPE)
+
 if __name__ == '__main__':
-    app.run(debug=True, host='127.0.0.1', port=5000)
+    create_app().run(debug=True, host='127.0.0.1', port=5000)
@@ -0,0 +1,306 @@
+"""
+ASGI app serving the read-only bird and species endpoints on an async
+database driver.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5001 --workers 2
+
+Paths, query parameters and JSON shapes match the Flask routes of the same
+path: both use the query builders and record builders in app.py, and only
+statement execution differs. /api/admin/db-pool has the Flask payload's shape
+but describes this process's async pool (and lists no replicas: reads here
+always use the primary). Identical /api/birds/grouped requests in flight at
+once share one query, as on Flask, but only within a process: the
+cross-worker sharing of SINGLE_FLIGHT_DIR is not used here. Each process holds one async connection pool
+(aiosqlite for SQLite, asyncpg for PostgreSQL), and a connection is checked
+out only while a statement runs, so hundreds of slow clients cost open
+sockets rather than worker threads. Writes and every other endpoint stay on
+the WSGI app; route these paths to this server at the proxy.
+
+Environment variables:
+- ASYNC_DATABASE_URL: defaults to DATABASE_URL with the async driver swapped in
+- ASYNC_POOL_SIZE / ASYNC_POOL_MAX_OVERFLOW: connection pool bounds (default 10 / 20)
+"""
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
+from starlette.routing import Route
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+from app import (
+    create_app,
+    BIRD_FIELDS, SPECIES_FIELDS, SEARCH_FIELDS,
+    grouped_birds_params, grouped_birds_query, names_query, group_birds,
+    locations_query, build_locations,
+    species_list_queries, build_species_list,
+    species_detail_queries, build_species_detail,
+    search_params, build_match_response
+)
+from response_format import requested_fields, requested_layout, shape, wants_msgpack, msgpack
+from db_pool import PoolMetrics, metered_pool_class, install_sqlite_pragmas, pool_metrics, sqlite_pragmas
+from models import db, DataVersion
+
+logger = logging.getLogger(__name__)
+
+# The Flask app supplies configuration and the shared search index
+flask_app = create_app()
+search_index = flask_app.extensions['pocketguide']['search_index']
+
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+
+def async_database_url():
+    """ASYNC_DATABASE_URL, or the Flask app's database URL on its async driver"""
+    if os.getenv('ASYNC_DATABASE_URL'):
+        return os.getenv('ASYNC_DATABASE_URL')
+    with flask_app.app_context():
+        # Resolved by Flask-SQLAlchemy, so relative SQLite paths point into instance/
+        url = db.engine.url
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver configured for {backend}; set ASYNC_DATABASE_URL")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+pool_size = int(os.getenv('ASYNC_POOL_SIZE', '10'))
+max_overflow = int(os.getenv('ASYNC_POOL_MAX_OVERFLOW', '20'))
+# Reported as-is by /api/admin/db-pool
+pool_options = {'pool_size': pool_size, 'max_overflow': max_overflow, 'pool_timeout': 30,
+                'pool_recycle': -1, 'pool_pre_ping': True}
+engine = create_async_engine(
+    async_database_url(),
+    **pool_options,
+    poolclass=metered_pool_class(AsyncAdaptedQueuePool, PoolMetrics(pool_size + max_overflow))
+)
+install_sqlite_pragmas(engine.sync_engine)
+
+
+def json_response(payload, status=200):
+    body = flask_app.json.dumps(payload, separators=(',', ':'))
+    return Response(body, status_code=status, media_type='application/json')
+
+
+def encode(request, payload):
+    """Serialize as MessagePack or JSON depending on the Accept header, like response_format.encode"""
+    accept = parse_accept_header(request.headers.get('accept'), MIMEAccept)
+    if wants_msgpack(accept):
+        response = Response(msgpack.packb(payload, use_bin_type=True), media_type='application/x-msgpack')
+    else:
+        response = json_response(payload)
+    response.headers['Vary'] = 'Accept'
+    return response
+
+
+def server_error(name, e):
+    logger.error(f"Error in {name}: {str(e)}", exc_info=True)
+    return json_response({'error': 'Internal server error', 'message': str(e)}, 500)
+
+
+async def _data_version(connection):
+    try:
+        return (await connection.execute(select(DataVersion.version).where(DataVersion.id == 1))).scalar() or 0
+    except SQLAlchemyError:
+        return 0
+
+
+def _rebuild_search_index(version):
+    with flask_app.app_context():
+        search_index.ensure_current(version)
+
+
+async def _current_search_index():
+    """The shared search index, rebuilt off the event loop if the catalogue changed"""
+    async with engine.connect() as connection:
+        version = await _data_version(connection)
+    if search_index.version != version:
+        await run_in_threadpool(_rebuild_search_index, version)
+    return search_index
+
+
+_grouped_flights = {}
+
+
+async def _coalesced(key, compute):
+    """Await ``compute()``, or the identical call already in flight in this process"""
+    task = _grouped_flights.get(key)
+    if task is None:
+        task = asyncio.ensure_future(compute())
+        _grouped_flights[key] = task
+        task.add_done_callback(lambda _: _grouped_flights.pop(key, None))
+    # A client that disconnects cancels its own wait, not the shared query
+    return await asyncio.shield(task)
+
+
+async def _grouped_birds_data(params):
+    async with engine.connect() as connection:
+        results = (await connection.execute(grouped_birds_query(**params))).all()
+        if not results:
+            return {}
+        name_rows = (await connection.execute(names_query([r.species_id for r in results]))).all()
+    return group_birds(results, name_rows)
+
+
+async def get_grouped_birds(request):
+    """Async /api/birds/grouped; see the Flask route for parameters"""
+    try:
+        logger.info(f"API Request: /api/birds/grouped (async) with params: {dict(request.query_params)}")
+        try:
+            params = grouped_birds_params(request.query_params)
+            fields = requested_fields(BIRD_FIELDS, request.query_params)
+            layout = requested_layout(request.query_params)
+        except ValueError as e:
+            return json_response({'error': str(e)}, 400)
+
+        grouped_data = await _coalesced(tuple(sorted(params.items())), lambda: _grouped_birds_data(params))
+        if not grouped_data:
+            return json_response({'message': 'No birds found for the selected region'}, 404)
+        return encode(request, {bird_type: shape(birds, fields, layout) for bird_type, birds in grouped_data.items()})
+    except Exception as e:
+        return server_error('get_grouped_birds', e)
+
+
+async def get_locations(request):
+    """Async /api/birds/locations"""
+    try:
+        logger.info("API Request: /api/birds/locations (async)")
+        async with engine.connect() as connection:
+            rows = (await connection.execute(locations_query())).all()
+        return json_response(build_locations(rows))
+    except Exception as e:
+        return server_error('get_locations', e)
+
+
+async def get_all_species(request):
+    """Async /api/admin/species"""
+    try:
+        logger.info("API Request: /api/admin/species (async)")
+        try:
+            fields = requested_fields(SPECIES_FIELDS, request.query_params)
+            layout = requested_layout(request.query_params)
+        except ValueError as e:
+            return json_response({'error': str(e)}, 400)
+
+        queries = species_list_queries(
+            with_illustrations=not fields or 'illustrations' in fields,
+            with_names=not fields or 'names' in fields
+        )
+        rows = []
+        async with engine.connect() as connection:
+            for query in queries:
+                rows.append((await connection.execute(query)).all() if query is not None else [])
+        return encode(request, shape(build_species_list(*rows), fields, layout))
+    except Exception as e:
+        return server_error('get_all_species', e)
+
+
+async def get_species_detail(request):
+    """Async /api/admin/species/{english_name}"""
+    english_name = request.path_params['english_name']
+    try:
+        logger.info(f"API Request: /api/admin/species/{english_name} (async)")
+        try:
+            fields = requested_fields(SPECIES_FIELDS + ('frequency',), request.query_params)
+        except ValueError as e:
+            return json_response({'error': str(e)}, 400)
+
+        species_query, *detail_queries = species_detail_queries(english_name)
+        async with engine.connect() as connection:
+            species = (await connection.execute(species_query)).first()
+            if not species:
+                return json_response({'error': 'Species not found'}, 404)
+            detail_rows = [(await connection.execute(query)).all() for query in detail_queries]
+
+        result = build_species_detail(species, *detail_rows)
+        if fields:
+            result = {f: result[f] for f in fields}
+        return encode(request, result)
+    except Exception as e:
+        return server_error('get_species_detail', e)
+
+
+async def get_db_pool_stats(request):
+    """Async /api/admin/db-pool, for this process's async pool"""
+    try:
+        metrics = pool_metrics(engine.sync_engine)
+        result = {
+            'dialect': engine.dialect.name,
+            'options': pool_options,
+            'pool': metrics.snapshot(engine.pool)
+        }
+        if engine.dialect.name == 'sqlite':
+            async with engine.connect() as connection:
+                result['sqlite'] = {
+                    name: (await connection.exec_driver_sql(f"PRAGMA {name}")).scalar() for name in sqlite_pragmas()
+                }
+        return json_response(result)
+    except Exception as e:
+        return server_error('get_db_pool_stats', e)
+
+
+async def search_species(request):
+    """Async /api/species/search; the search itself runs in memory"""
+    try:
+        try:
+            query, limit, state, district = search_params(request.query_params, default_limit=20, max_limit=100)
+            fields = requested_fields(SEARCH_FIELDS, request.query_params)
+            layout = requested_layout(request.query_params)
+        except ValueError as e:
+            return json_response({'error': str(e)}, 400)
+
+        index = await _current_search_index()
+        total, results = index.search(query, limit=limit, state=state, district=district)
+        return encode(request, {'query': query, 'total': total, 'results': shape(results, fields, layout)})
+    except Exception as e:
+        return server_error('search_species', e)
+
+
+async def match_species(request):
+    """Async /api/species/match"""
+    try:
+        try:
+            query, limit, state, district = search_params(request.query_params, default_limit=5, max_limit=50)
+        except ValueError as e:
+            return json_response({'error': str(e)}, 400)
+        try:
+            min_score = float(request.query_params.get('min_score', 0.3))
+        except ValueError:
+            min_score = 0.3
+
+        index = await _current_search_index()
+        matches = index.match(query, limit=limit, min_score=min_score, state=state, district=district)
+        return json_response(build_match_response(query, matches))
+    except Exception as e:
+        return server_error('match_species', e)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await engine.dispose()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/birds/grouped', get_grouped_birds),
+        Route('/api/birds/locations', get_locations),
+        Route('/api/admin/species', get_all_species),
+        Route('/api/admin/species/{english_name}', get_species_detail),
+        Route('/api/species/search', search_species),
+        Route('/api/species/match', match_species),
+        Route('/api/admin/db-pool', get_db_pool_stats),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['GET'])],
+    lifespan=lifespan
+)
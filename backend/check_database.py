@@ -1,7 +1,6 @@
 import os
 import sys
 from sqlalchemy import create_engine, text
-import pandas as pd
 from dotenv import load_dotenv
 
 # Add the current directory to Python path
@@ -3,11 +3,13 @@ import sys
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db, Frequency
+from app import create_app
+from models import db, Frequency
 
 def check_frequency_data():
     """Check the actual frequency data structure"""
     
+    app = create_app()
     with app.app_context():
         print("=" * 60)
         print("🔍 CHECKING FREQUENCY DATA STRUCTURE")
@@ -18,7 +20,7 @@ def check_frequency_data():
         
         print(f"📊 Found {len(mizoram_records)} sample records for Mizoram:")
         for i, record in enumerate(mizoram_records, 1):
-            print(f"{i}. Species: {record.english_name}")
+            print(f"{i}. Species: {record.species.english_name}")
             print(f"   State: '{record.state}'")
             print(f"   District: '{record.district}'")
             print(f"   Rank: {record.frequency_rank}")
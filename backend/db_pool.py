@@ -0,0 +1,213 @@
+"""
+Database engine tuning: connection pool options from the environment,
+connect-time SQLite pragmas, and pool checkout metrics.
+
+Pool options (all optional):
+- DB_POOL_SIZE, DB_MAX_OVERFLOW: connections kept open / extra connections allowed under load
+- DB_POOL_TIMEOUT: seconds a request waits for a free connection before failing
+- DB_POOL_RECYCLE: reconnect connections older than this many seconds (-1 = never)
+- DB_POOL_PRE_PING: 'true' to test each connection on checkout (default on for servers, off for SQLite)
+
+SQLite pragmas, applied to every new connection:
+- SQLITE_JOURNAL_MODE (WAL), SQLITE_SYNCHRONOUS (NORMAL), SQLITE_MMAP_SIZE (bytes),
+  SQLITE_CACHE_SIZE (pages, or KiB when negative), SQLITE_BUSY_TIMEOUT (ms)
+
+WAL lets readers keep answering requests while ingestion writes, and
+synchronous=NORMAL is durable in WAL mode except for the last transactions
+before a power cut.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Checkout waits kept for percentiles
+WAIT_SAMPLES = 2048
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, '') else default
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    return value.lower() in ('1', 'true', 'yes') if value not in (None, '') else default
+
+
+def sqlite_pragmas():
+    """PRAGMA name -> value applied to each new SQLite connection"""
+    return {
+        'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'mmap_size': _env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+        'cache_size': _env_int('SQLITE_CACHE_SIZE', -64 * 1024),
+        'busy_timeout': _env_int('SQLITE_BUSY_TIMEOUT', 5000)
+    }
+
+
+def is_sqlite(url):
+    return make_url(url).get_backend_name() == 'sqlite'
+
+
+def _is_sqlite_memory(url):
+    url = make_url(url)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def instance_relative_url(url, instance_path):
+    """
+    Drop a leading instance-folder segment from a relative SQLite path.
+
+    Flask-SQLAlchemy resolves relative SQLite paths against the instance
+    folder, so ``sqlite:///instance/pocketguide.db`` (the path as seen from
+    the backend directory) would otherwise open instance/instance/pocketguide.db.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != 'sqlite' or _is_sqlite_memory(url) or os.path.isabs(parsed.database):
+        return url
+    folder = os.path.basename(os.path.normpath(instance_path))
+    head, _, rest = parsed.database.replace('\\', '/').partition('/')
+    if head != folder or not rest:
+        return url
+    return parsed.set(database=rest).render_as_string(hide_password=False)
+
+
+class PoolMetrics:
+    """
+    Checkout latency and saturation for a connection pool.
+
+    Latency is the time from asking the pool for a connection to getting one:
+    near zero when one is idle, the connect time when the pool grows, and the
+    queueing delay when every connection is in use.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self.checkouts = 0
+        self.saturated_checkouts = 0
+        self.timeouts = 0
+        self.peak_checked_out = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited, checked_out_before, checked_out_after=None):
+        """One checkout; ``checked_out_after`` is None when it timed out"""
+        with self._lock:
+            if checked_out_after is None:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            if self.capacity is not None and checked_out_before >= self.capacity:
+                self.saturated_checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, checked_out_after)
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            self._waits.append(waited)
+
+    def snapshot(self, pool):
+        """Counters plus the pool's current state"""
+        with self._lock:
+            waits = sorted(self._waits)
+            checkouts = self.checkouts
+
+            def percentile(p):
+                return round(waits[min(len(waits) - 1, int(len(waits) * p))] * 1000, 3) if waits else None
+
+            checked_out = pool.checkedout() if hasattr(pool, 'checkedout') else None
+            return {
+                'pool_class': type(pool).__name__,
+                'pid': os.getpid(),
+                'capacity': self.capacity,
+                'size': pool.size() if hasattr(pool, 'size') else None,
+                'checked_out': checked_out,
+                'checked_in': pool.checkedin() if hasattr(pool, 'checkedin') else None,
+                'overflow': pool.overflow() if hasattr(pool, 'overflow') else None,
+                'utilization': round(checked_out / self.capacity, 3)
+                if self.capacity and checked_out is not None else None,
+                'peak_checked_out': self.peak_checked_out,
+                'checkouts': checkouts,
+                'saturated_checkouts': self.saturated_checkouts,
+                'timeouts': self.timeouts,
+                'checkout_ms': {
+                    'mean': round(self.total_wait / checkouts * 1000, 3) if checkouts else None,
+                    'p50': percentile(0.50),
+                    'p95': percentile(0.95),
+                    'p99': percentile(0.99),
+                    'max': round(self.max_wait * 1000, 3)
+                }
+            }
+
+
+def metered_pool_class(base, metrics):
+    """Subclass of a QueuePool class that reports each checkout to ``metrics``"""
+
+    def _do_get(self):
+        checked_out_before = self.checkedout()
+        started = time.perf_counter()
+        try:
+            connection = base._do_get(self)
+        except PoolTimeoutError:
+            metrics.record(time.perf_counter() - started, checked_out_before)
+            raise
+        metrics.record(time.perf_counter() - started, checked_out_before, self.checkedout())
+        return connection
+
+    # recreate() (on dispose) builds a new pool of the same class, so the
+    # metrics carry over to it
+    return type(f"Metered{base.__name__}", (base,), {'_do_get': _do_get, 'metrics': metrics})
+
+
+def engine_options(database_url, with_metrics=True, poolclass=QueuePool):
+    """
+    create_engine keyword arguments for ``database_url`` from the environment.
+
+    With ``with_metrics`` the pool is a metered subclass of ``poolclass`` and
+    its PoolMetrics is available as ``options['poolclass'].metrics``. In-memory
+    SQLite keeps its single shared connection and gets no pool options.
+    """
+    sqlite = is_sqlite(database_url)
+    options = {
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', not sqlite),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', -1 if sqlite else 1800)
+    }
+    if _is_sqlite_memory(database_url):
+        return options
+
+    pool_size = _env_int('DB_POOL_SIZE', 5)
+    max_overflow = _env_int('DB_MAX_OVERFLOW', 10)
+    options.update(pool_size=pool_size, max_overflow=max_overflow,
+                   pool_timeout=_env_int('DB_POOL_TIMEOUT', 30))
+    if with_metrics:
+        capacity = pool_size + max_overflow if max_overflow >= 0 else None
+        options['poolclass'] = metered_pool_class(poolclass, PoolMetrics(capacity))
+    return options
+
+
+def install_sqlite_pragmas(engine, pragmas=None):
+    """Run the SQLite pragmas on every new connection of ``engine`` (no-op for other backends)"""
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas() if pragmas is None else pragmas
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def pool_metrics(engine):
+    """The PoolMetrics of an engine built with engine_options, or None"""
+    return getattr(engine.pool, 'metrics', None)
@@ -0,0 +1,211 @@
+"""
+Read-replica routing for the Flask-SQLAlchemy session.
+
+GET, HEAD and OPTIONS requests read from a healthy replica. Everything else
+uses the primary: other HTTP methods, any flush (a write inside a GET still goes to the
+primary, and the rest of that request reads from it), and all work outside
+a request, such as ingestion, the PDF job worker and CLI scripts.
+
+Read-your-writes: after a successful write request the client gets a
+``db_pin`` cookie, and its reads go to the primary until the cookie expires,
+so a guide saved a moment ago is never read back from a replica that hasn't
+replayed it yet. API clients without cookies can send ``X-Read-Primary: 1``.
+
+A replica is taken out of rotation when a query on it fails with a
+connection error or a periodic ``SELECT 1`` probe fails (or, on PostgreSQL,
+when its replay lag exceeds the limit). It is probed again after
+``retry_seconds``. With no healthy replica, reads use the primary.
+"""
+
+import itertools
+import logging
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_COOKIE = 'db_pin'
+PRIMARY = 'primary'
+
+
+class RoutingSession(Session):
+    """Session that sends reads made during read requests to the replica router's choice"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing:
+            router = current_app.extensions.get('replica_router')
+            engine = router.read_engine() if router else None
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    """A write during a request moves the rest of it to the current app's primary"""
+    if has_request_context():
+        router = current_app.extensions.get('replica_router')
+        if router is not None:
+            router.note_write()
+
+
+class ReplicaRouter:
+    """
+    Chooses between the primary and the replica binds of a Flask-SQLAlchemy db.
+
+    ``replica_keys`` are SQLALCHEMY_BINDS keys of the replica engines. The db
+    must be created with ``session_options={'class_': RoutingSession}``.
+    """
+
+    def __init__(self, app, db, replica_keys, pin_seconds=10, check_interval=15,
+                 retry_seconds=30, max_lag_seconds=None):
+        self.app = app
+        self.db = db
+        self.replica_keys = list(replica_keys)
+        self.pin_seconds = pin_seconds
+        self.check_interval = check_interval
+        self.retry_seconds = retry_seconds
+        self.max_lag_seconds = max_lag_seconds
+        self._lock = threading.Lock()
+        self._rotation = itertools.cycle(self.replica_keys) if self.replica_keys else None
+        self._health = {key: {'healthy': True, 'checked_at': 0.0, 'failures': 0, 'last_error': None,
+                              'reads': 0} for key in self.replica_keys}
+        self.primary_reads = 0
+
+        app.extensions['replica_router'] = self
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        if self.replica_keys:
+            with app.app_context():
+                for key in self.replica_keys:
+                    event.listen(db.engines[key], 'handle_error', self._error_handler(key))
+
+    @property
+    def enabled(self):
+        return bool(self.replica_keys)
+
+    # Request hooks
+
+    def _pinned(self):
+        if request.headers.get('X-Read-Primary', '').lower() in ('1', 'true', 'yes'):
+            return True
+        try:
+            return float(request.cookies.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def _before_request(self):
+        g.db_read_replica = self.enabled and request.method in READ_METHODS and not self._pinned()
+
+    def note_write(self):
+        """Send the rest of this request to the primary and pin the client to it"""
+        g.db_read_replica = False
+        g.db_wrote = True
+
+    def _after_request(self, response):
+        if not self.enabled:
+            return response
+        wrote = g.get('db_wrote') or request.method not in READ_METHODS
+        if wrote and response.status_code < 400:
+            response.set_cookie(PIN_COOKIE, str(int(time.time() + self.pin_seconds)),
+                                max_age=self.pin_seconds, httponly=True, samesite='Lax')
+        response.headers['X-DB-Route'] = g.get('db_route', PRIMARY)
+        return response
+
+    # Engine selection
+
+    def read_engine(self):
+        """A replica engine for this request's reads, or None for the primary"""
+        if not has_request_context() or not g.get('db_read_replica'):
+            return None
+        key = g.get('db_route')
+        if key is None:
+            key = self._choose()
+            if key is None:
+                # Every replica is down; read from the primary for this request
+                g.db_read_replica = False
+                g.db_route = PRIMARY
+                with self._lock:
+                    self.primary_reads += 1
+                return None
+            g.db_route = key
+            with self._lock:
+                self._health[key]['reads'] += 1
+        return self.db.engines[key]
+
+    def _choose(self):
+        for _ in range(len(self.replica_keys)):
+            with self._lock:
+                key = next(self._rotation)
+                health = self._health[key]
+                age = time.monotonic() - health['checked_at']
+                due = age >= (self.check_interval if health['healthy'] else self.retry_seconds)
+                if not due and not health['healthy']:
+                    continue
+                if due:
+                    # Claim the probe so concurrent requests don't all run it
+                    health['checked_at'] = time.monotonic()
+            if not due or self._probe(key):
+                return key
+        return None
+
+    def _probe(self, key):
+        """Check a replica is reachable (and not lagging too far); record and return the result"""
+        try:
+            with self.db.engines[key].connect() as connection:
+                connection.execute(text('SELECT 1'))
+                if self.max_lag_seconds is not None and connection.dialect.name == 'postgresql':
+                    lag = connection.execute(text(
+                        'SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())'
+                    )).scalar()
+                    if lag is not None and lag > self.max_lag_seconds:
+                        raise RuntimeError(f"replication lag {lag:.1f}s exceeds {self.max_lag_seconds}s")
+        except (SQLAlchemyError, RuntimeError) as e:
+            self.mark_unhealthy(key, e)
+            return False
+        with self._lock:
+            health = self._health[key]
+            if not health['healthy']:
+                logger.info(f"Replica {key} is healthy again")
+            health.update(healthy=True, checked_at=time.monotonic())
+        return True
+
+    def mark_unhealthy(self, key, error):
+        with self._lock:
+            health = self._health[key]
+            if health['healthy']:
+                logger.warning(f"Replica {key} marked unhealthy: {error}")
+            health.update(healthy=False, checked_at=time.monotonic(), last_error=str(error))
+            health['failures'] += 1
+
+    def _error_handler(self, key):
+        def handle_error(context):
+            # Lost connections and failures to connect at all, not query errors
+            if context.is_disconnect or context.connection is None:
+                self.mark_unhealthy(key, context.original_exception)
+        return handle_error
+
+    def status(self):
+        """Health and read counts per replica"""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                'enabled': self.enabled,
+                'pin_seconds': self.pin_seconds,
+                'primary_fallback_reads': self.primary_reads,
+                'replicas': {
+                    key: {
+                        'healthy': health['healthy'],
+                        'seconds_since_check': round(now - health['checked_at'], 1) if health['checked_at'] else None,
+                        'failures': health['failures'],
+                        'last_error': health['last_error'],
+                        'reads': health['reads']
+                    } for key, health in self._health.items()
+                }
+            }
@@ -5,11 +5,13 @@ from pathlib import Path
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db, Species, Illustrations, Names, Frequency
+from app import create_app
+from models import db, Species, Illustrations, Frequency
 
 def debug_api():
     """Debug what our API should actually return"""
     
+    app = create_app()
     with app.app_context():
         print("=" * 60)
         print("🔍 DEBUG: WHAT OUR API SHOULD RETURN")
@@ -34,10 +36,10 @@ def debug_api():
             Illustrations.breeding_status,
             Illustrations.subspecies
         ).join(
-            Species, Frequency.english_name == Species.english_name
+            Species, Frequency.species_id == Species.id
         ).outerjoin(
             Illustrations,
-            (Species.english_name == Illustrations.species_english_name) &
+            (Species.id == Illustrations.species_id) &
             (Illustrations.is_default == True)
         ).filter(
             Frequency.state == state
@@ -5,11 +5,13 @@ import json
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db, Species, Illustrations, Names, Frequency
+from app import create_app
+from models import db, Species, Illustrations, Names, Frequency
 
 def demo_frontend_data():
     """Demonstrate exactly what data the frontend will receive"""
     
+    app = create_app()
     with app.app_context():
         print("=" * 80)
         print("🎯 FRONTEND INTEGRATION DEMO")
@@ -36,10 +38,10 @@ def demo_frontend_data():
             Illustrations.breeding_status,
             Illustrations.subspecies
         ).join(
-            Species, Frequency.english_name == Species.english_name
+            Species, Frequency.species_id == Species.id
         ).outerjoin(
             Illustrations,
-            (Species.english_name == Illustrations.species_english_name) &
+            (Species.id == Illustrations.species_id) &
             (Illustrations.is_default == True)
         ).filter(
             Frequency.state == state
@@ -55,7 +57,7 @@ def demo_frontend_data():
         
         for result in results:
             # Get all names for this species
-            names_query = Names.query.filter_by(species_english_name=result.english_name).all()
+            names_query = Names.query.join(Names.species).filter(Species.english_name == result.english_name).all()
             names_dict = {'English': result.english_name}
             for name in names_query:
                 names_dict[name.language] = name.name
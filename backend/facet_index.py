@@ -0,0 +1,168 @@
+"""
+Precomputed facet postings for the species explorer.
+
+Every facet value (a type, a size, a seasonality, image availability, a
+region) has a bitset over the species catalogue. A query ORs the selected
+values within each facet and ANDs across facets; the count for each facet
+value is one AND plus a popcount against the other facets' filters, so a
+keystroke never runs a GROUP BY. The postings are rebuilt whenever the data
+version changes.
+"""
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+FACETS = ('type', 'size', 'seasonality', 'has_image', 'region')
+UNKNOWN = 'Unknown'
+
+if hasattr(int, 'bit_count'):
+    popcount = int.bit_count
+else:  # Python < 3.10
+    def popcount(bits):
+        return bin(bits).count('1')
+
+
+def _label(value):
+    return str(value).strip() if value not in (None, '') and str(value).strip() else UNKNOWN
+
+
+class FacetIndex:
+    """
+    Filtered species plus per-facet counts in one pass over the postings.
+
+    ``load_rows`` has the same contract as RegionBitmapIndex's: it returns
+    ``(species, frequency)`` with species dicts and ``(english_name, state,
+    district, frequency_rank, observation_count, seasonality)`` tuples.
+    """
+
+    def __init__(self, load_rows):
+        self.load_rows = load_rows
+        self.version = None
+        self._lock = threading.Lock()
+        # Swapped as one tuple so queries never see half a rebuild
+        self._data = ([], {}, 0, {facet: {} for facet in FACETS}, {})
+
+    def ensure_current(self, data_version):
+        """Rebuild the postings if the catalogue changed since they were built"""
+        if self.version == data_version:
+            return
+        with self._lock:
+            if self.version == data_version:
+                return
+            self._build(*self.load_rows())
+            self.version = data_version
+
+    def _build(self, species_rows, frequency_rows):
+        species = list(species_rows)
+        positions = {row['english_name']: i for i, row in enumerate(species)}
+        postings = {facet: {} for facet in FACETS}
+        # Seasonality is recorded per region, so keep it per region as well
+        seasonality_by_region = {}
+
+        def add(facet, value, bit):
+            postings[facet][value] = postings[facet].get(value, 0) | bit
+
+        for position, row in enumerate(species):
+            bit = 1 << position
+            add('type', _label(row.get('type')), bit)
+            add('size', _label(row.get('size')), bit)
+            add('has_image', 'true' if row.get('image_link') else 'false', bit)
+
+        for english_name, state, district, _, _, seasonality in frequency_rows:
+            position = positions.get(english_name)
+            if position is None:
+                continue
+            bit = 1 << position
+            region = f"{state}/{district}"
+            add('region', region, bit)
+            add('seasonality', _label(seasonality), bit)
+            by_value = seasonality_by_region.setdefault(region, {})
+            by_value[_label(seasonality)] = by_value.get(_label(seasonality), 0) | bit
+
+        universe = (1 << len(species)) - 1
+        self._data = (species, positions, universe, postings, seasonality_by_region)
+        logger.info(f"Built facet index: {len(species)} species, "
+                    + ', '.join(f"{len(values)} {facet}" for facet, values in postings.items()))
+
+    @property
+    def species_count(self):
+        return len(self._data[0])
+
+    def bits_for(self, english_names):
+        """Bitset of the given species, e.g. to restrict the explorer to search hits"""
+        _, positions, _, _, _ = self._data
+        bits = 0
+        for name in english_names:
+            if name in positions:
+                bits |= 1 << positions[name]
+        return bits
+
+    def query(self, selected, restrict=None, offset=0, limit=50):
+        """
+        Species matching ``selected`` ({facet: [values]}) and facet counts.
+
+        ``restrict`` is an optional bitset the results must fall within. Facet
+        counts ignore the facet's own selection, so the UI can show how many
+        species each alternative value would add. Returns (total, results,
+        facet counts).
+        """
+        species, _, universe, postings, seasonality_by_region = self._data
+        unknown = [facet for facet in selected if facet not in FACETS]
+        if unknown:
+            raise ValueError(f"Unknown facets: {', '.join(unknown)}. Available: {', '.join(FACETS)}")
+
+        selected_regions = [r for r in selected.get('region', []) if r in postings['region']]
+
+        def seasonality_postings():
+            if not selected.get('region'):
+                return postings['seasonality']
+            # Only count a seasonality recorded in one of the selected regions
+            merged = {}
+            for region in selected_regions:
+                for value, bits in seasonality_by_region.get(region, {}).items():
+                    merged[value] = merged.get(value, 0) | bits
+            return merged
+
+        facet_postings = dict(postings, seasonality=seasonality_postings())
+
+        base = universe if restrict is None else universe & restrict
+        filters = {}
+        for facet, values in selected.items():
+            bits = 0
+            for value in values:
+                bits |= facet_postings[facet].get(value, 0)
+            filters[facet] = bits
+
+        matched = base
+        for bits in filters.values():
+            matched &= bits
+
+        counts = {}
+        for facet in FACETS:
+            others = base
+            for other, bits in filters.items():
+                if other != facet:
+                    others &= bits
+            counts[facet] = {
+                value: count
+                for value, count in sorted(
+                    ((value, popcount(bits & others)) for value, bits in facet_postings[facet].items()),
+                    key=lambda item: (-item[1], item[0])
+                )
+                if count or value in selected.get(facet, [])
+            }
+
+        results = []
+        skipped = 0
+        bits = matched
+        while bits and len(results) < limit:
+            lowest = bits & -bits
+            bits ^= lowest
+            if skipped < offset:
+                skipped += 1
+                continue
+            results.append(species[lowest.bit_length() - 1])
+
+        return popcount(matched), results, counts
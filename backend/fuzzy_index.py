@@ -0,0 +1,117 @@
+"""
+Typo-tolerant name matching with a trigram index.
+
+Names are normalized (case, diacritics, hyphens and punctuation folded) and
+split into padded trigrams. Lookups count shared trigrams through the posting
+lists, so only names sharing at least one trigram with the query are touched;
+the best of those are then re-scored with edit distance. The same index backs
+the match endpoint and name reconciliation during ingestion.
+"""
+
+import re
+from collections import defaultdict
+
+from utils import normalize_name
+
+NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+RESCORE_FACTOR = 4
+
+
+def fold(text):
+    """Normalized form used for matching: 'Blue-throated  Barbet' -> 'blue throated barbet'"""
+    return NON_WORD.sub(' ', normalize_name(text)).strip()
+
+
+def trigrams(text):
+    """Padded word trigrams of a folded string, as a set"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+def edit_distance(a, b):
+    """Levenshtein distance between two strings"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1,
+                               current[j - 1] + 1,
+                               previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+class TrigramIndex:
+    """
+    Maps names to arbitrary values and finds the closest names to a query.
+
+    Values must be hashable. Several names may map to the same value (e.g. a
+    species' English, Latin and Mizo names); results are deduplicated per
+    value, keeping its best-scoring name.
+    """
+
+    def __init__(self):
+        self._names = []
+        self._postings = defaultdict(list)
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, name, value):
+        folded = fold(name)
+        if not folded:
+            return
+        position = len(self._names)
+        grams = trigrams(folded)
+        self._names.append((name, folded, len(grams), value))
+        for gram in grams:
+            self._postings[gram].append(position)
+
+    def search(self, query, limit=5, min_score=0.3):
+        """
+        Closest names as a list of (score, name, value), best first.
+
+        The score is in [0, 1]: the mean of trigram (Dice) similarity and
+        normalized edit-distance similarity. An exact match after folding
+        scores 1.0.
+        """
+        folded_query = fold(query)
+        query_grams = trigrams(folded_query)
+        if not query_grams:
+            return []
+
+        shared = defaultdict(int)
+        for gram in query_grams:
+            for position in self._postings.get(gram, ()):
+                shared[position] += 1
+
+        # Cheap trigram similarity first, edit distance only for the front-runners
+        by_overlap = sorted(
+            ((2 * count / (len(query_grams) + self._names[position][2]), position)
+             for position, count in shared.items()),
+            reverse=True
+        )[:max(limit, 1) * RESCORE_FACTOR]
+
+        best = {}
+        for trigram_score, position in by_overlap:
+            name, folded, _, value = self._names[position]
+            longest = max(len(folded), len(folded_query))
+            edit_score = 1 - edit_distance(folded, folded_query) / longest
+            score = round((trigram_score + edit_score) / 2, 4)
+            if score < min_score:
+                continue
+            if value not in best or score > best[value][0]:
+                best[value] = (score, name, value)
+
+        return sorted(best.values(), key=lambda match: (-match[0], match[1]))[:limit]
+
+    def best(self, query, min_score=0.8):
+        """The single closest (score, name, value), or None below ``min_score``"""
+        matches = self.search(query, limit=1, min_score=min_score)
+        return matches[0] if matches else None
@@ -0,0 +1,226 @@
+"""
+Guide persistence with delta-based autosave.
+
+A guide is stored as a compacted snapshot plus the JSON patches applied since.
+Autosave sends a small patch against the revision the editor last saw; the
+patch is appended and the revision advanced with a single conditional UPDATE,
+so concurrent saves can't interleave. Every ``snapshot_interval`` revisions
+the document is compacted into a new snapshot and older patches are pruned,
+which keeps reads cheap no matter how long a guide has been edited.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from json_patch import apply_patch
+
+logger = logging.getLogger(__name__)
+
+
+class RevisionConflict(Exception):
+    """Raised when a patch targets a revision that is no longer current"""
+
+    def __init__(self, current_revision, patches=None):
+        super().__init__(f"Guide is at revision {current_revision}")
+        self.current_revision = current_revision
+        self.patches = patches
+
+
+class GuideStore:
+    """Loads and saves guide documents for the guide API endpoints"""
+
+    def __init__(self, db, guide_model, patch_model, snapshot_model):
+        self.db = db
+        self.Guide = guide_model
+        self.GuidePatch = patch_model
+        self.GuideSnapshot = snapshot_model
+        self.snapshot_interval = int(os.getenv('GUIDE_SNAPSHOT_INTERVAL', '50'))
+        self.snapshots_kept = int(os.getenv('GUIDE_SNAPSHOTS_KEPT', '5'))
+        self._documents = OrderedDict()
+        self._documents_max = int(os.getenv('GUIDE_DOCUMENT_CACHE_SIZE', '256'))
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._lock = threading.Lock()
+        self._tables_checked = False
+
+    def ensure_tables(self):
+        if self._tables_checked:
+            return
+        for model in (self.Guide, self.GuideSnapshot, self.GuidePatch):
+            model.__table__.create(bind=self.db.engine, checkfirst=True)
+        self._tables_checked = True
+
+    # -- document cache -----------------------------------------------------
+
+    def _cached(self, guide_id, revision):
+        with self._lock:
+            entry = self._documents.get(guide_id)
+            if entry and entry[0] == revision:
+                self._documents.move_to_end(guide_id)
+                self.cache_hits += 1
+                return entry[1]
+            self.cache_misses += 1
+        return None
+
+    def _remember(self, guide_id, revision, document):
+        with self._lock:
+            self._documents[guide_id] = (revision, document)
+            self._documents.move_to_end(guide_id)
+            while len(self._documents) > self._documents_max:
+                self._documents.popitem(last=False)
+
+    def _forget(self, guide_id):
+        with self._lock:
+            self._documents.pop(guide_id, None)
+
+    def cache_stats(self):
+        with self._lock:
+            return {'entries': len(self._documents), 'hits': self.cache_hits, 'misses': self.cache_misses}
+
+    # -- reads --------------------------------------------------------------
+
+    def load(self, guide):
+        """Materialize the current document: latest snapshot plus newer patches"""
+        document = self._cached(guide.id, guide.revision)
+        if document is not None:
+            return document
+
+        snapshot = self.GuideSnapshot.query.filter(
+            self.GuideSnapshot.guide_id == guide.id,
+            self.GuideSnapshot.revision <= guide.revision
+        ).order_by(self.GuideSnapshot.revision.desc()).first()
+        document = json.loads(snapshot.document)
+
+        for patch in self.patches_since(guide.id, snapshot.revision, guide.revision):
+            document = apply_patch(document, patch['patch'])
+
+        self._remember(guide.id, guide.revision, document)
+        return document
+
+    def patches_since(self, guide_id, base_revision, up_to_revision=None):
+        """
+        Patches after ``base_revision`` in order, or None if some of them have
+        already been compacted away.
+        """
+        query = self.GuidePatch.query.filter(
+            self.GuidePatch.guide_id == guide_id,
+            self.GuidePatch.revision > base_revision
+        )
+        if up_to_revision is not None:
+            query = query.filter(self.GuidePatch.revision <= up_to_revision)
+        rows = query.order_by(self.GuidePatch.revision).all()
+
+        expected = base_revision + 1
+        for row in rows:
+            if row.revision != expected:
+                return None
+            expected += 1
+        return [{'revision': row.revision, 'patch': json.loads(row.patch)} for row in rows]
+
+    # -- writes -------------------------------------------------------------
+
+    def create(self, title, document):
+        now = datetime.utcnow()
+        guide = self.Guide(title=title, revision=0, snapshot_revision=0, created_at=now, updated_at=now)
+        self.db.session.add(guide)
+        self.db.session.flush()
+        self.db.session.add(self.GuideSnapshot(
+            guide_id=guide.id, revision=0, document=json.dumps(document), created_at=now
+        ))
+        self.db.session.commit()
+        self._remember(guide.id, 0, document)
+        return guide
+
+    def apply(self, guide, base_revision, patch):
+        """
+        Apply an autosave patch on top of ``base_revision``.
+
+        Returns the new revision and document. Raises RevisionConflict when
+        another save got there first; invalid patches raise
+        json_patch.JsonPatchError from apply_patch.
+        """
+        if base_revision != guide.revision:
+            raise RevisionConflict(guide.revision, self.patches_since(guide.id, base_revision))
+
+        document = apply_patch(self.load(guide), patch)
+        new_revision = base_revision + 1
+        now = datetime.utcnow()
+
+        values = {'revision': new_revision, 'updated_at': now}
+        if isinstance(document, dict) and isinstance(document.get('title'), str):
+            values['title'] = document['title'][:255]
+
+        # Advancing the revision only if it is unchanged makes the save atomic
+        claimed = self.Guide.query.filter(
+            self.Guide.id == guide.id,
+            self.Guide.revision == base_revision
+        ).update(values, synchronize_session=False)
+        if not claimed:
+            self.db.session.rollback()
+            current = self.db.session.get(self.Guide, guide.id)
+            raise RevisionConflict(current.revision, self.patches_since(guide.id, base_revision))
+
+        self.db.session.add(self.GuidePatch(
+            guide_id=guide.id, revision=new_revision, patch=json.dumps(patch), created_at=now
+        ))
+        if new_revision - guide.snapshot_revision >= self.snapshot_interval:
+            self._compact(guide.id, new_revision, document, now)
+        self.db.session.commit()
+
+        self._remember(guide.id, new_revision, document)
+        return new_revision, document
+
+    def replace(self, guide, base_revision, document):
+        """Save a whole document (used for imports and non-delta clients)"""
+        if base_revision is not None and base_revision != guide.revision:
+            raise RevisionConflict(guide.revision, self.patches_since(guide.id, base_revision))
+
+        new_revision = guide.revision + 1
+        now = datetime.utcnow()
+        values = {'revision': new_revision, 'updated_at': now}
+        if isinstance(document, dict) and isinstance(document.get('title'), str):
+            values['title'] = document['title'][:255]
+
+        claimed = self.Guide.query.filter(
+            self.Guide.id == guide.id,
+            self.Guide.revision == guide.revision
+        ).update(values, synchronize_session=False)
+        if not claimed:
+            self.db.session.rollback()
+            current = self.db.session.get(self.Guide, guide.id)
+            raise RevisionConflict(current.revision)
+
+        self._compact(guide.id, new_revision, document, now)
+        self.db.session.commit()
+        self._remember(guide.id, new_revision, document)
+        return new_revision
+
+    def _compact(self, guide_id, revision, document, now):
+        """Write a snapshot at ``revision`` and prune what it supersedes"""
+        self.db.session.add(self.GuideSnapshot(
+            guide_id=guide_id, revision=revision, document=json.dumps(document), created_at=now
+        ))
+        self.Guide.query.filter(self.Guide.id == guide_id).update(
+            {'snapshot_revision': revision}, synchronize_session=False
+        )
+        self.GuidePatch.query.filter(
+            self.GuidePatch.guide_id == guide_id,
+            self.GuidePatch.revision <= revision
+        ).delete(synchronize_session=False)
+
+        kept = self.GuideSnapshot.query.filter(self.GuideSnapshot.guide_id == guide_id) \
+            .order_by(self.GuideSnapshot.revision.desc()).offset(self.snapshots_kept).all()
+        for snapshot in kept:
+            self.db.session.delete(snapshot)
+        logger.info(f"Compacted guide {guide_id} at revision {revision}")
+
+    def delete(self, guide):
+        self.GuidePatch.query.filter(self.GuidePatch.guide_id == guide.id).delete(synchronize_session=False)
+        self.GuideSnapshot.query.filter(self.GuideSnapshot.guide_id == guide.id).delete(synchronize_session=False)
+        self.db.session.delete(guide)
+        self.db.session.commit()
+        self._forget(guide.id)
@@ -0,0 +1,66 @@
+"""
+Gunicorn configuration for the Pocket Guide API.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is imported once in the master (``preload_app``) so workers fork with
+the code already loaded and share its memory pages. Anything holding sockets
+or threads must not cross the fork: the post_fork hook drops the SQLAlchemy
+connection pool, and the PDF job worker and preview process pool are started
+lazily per process (they check os.getpid()).
+
+Every setting below can be overridden with an environment variable.
+"""
+
+import multiprocessing
+import os
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Requests are mostly short SQL reads plus JSON encoding: a process per core
+# (plus one to cover a worker blocked on I/O) with a few threads each keeps
+# every core busy while a thread waits on the database.
+workers = _env_int('GUNICORN_WORKERS', cpu_count + 1)
+threads = _env_int('GUNICORN_THREADS', max(2, min(8, 2 * cpu_count)))
+worker_class = 'gthread'
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Keep connections from the frontend proxy open between requests
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+# PDF renders can take a while; anything slower than this is stuck
+timeout = _env_int('GUNICORN_TIMEOUT', 60)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+
+# Recycle workers periodically so slow leaks (fragment caches, fonts, images)
+# can't grow without bound; the jitter stops them all restarting at once.
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 2000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 200)
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    """Give each worker its own database connections, to the primary and every replica"""
+    from app import app
+    from models import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            try:
+                # close=False: leave the parent's connections alone, just forget them
+                engine.dispose(close=False)
+            except TypeError:  # SQLAlchemy < 1.4.33
+                engine.dispose()
+    server.log.info(f"Worker {worker.pid} started with fresh database pools")
@@ -1,15 +1,14 @@
-import pandas as pd
 import os
-from sqlalchemy import create_engine
-from app import db, Species, Illustrations, Names, Frequency
+import time
+from models import db, Species, Illustrations, Names, Frequency, bump_data_version, species_ids
 from dotenv import load_dotenv
 from utils import convert_google_drive_link
+from fuzzy_index import TrigramIndex
 
 load_dotenv()
 
 class DataIngestion:
     def __init__(self):
-        self.engine = create_engine(os.getenv('DATABASE_URL', 'sqlite:///pocketguide.db'))
         self.bird_types = {
             'default': 'Arboreal Birds',
             'water': ['Duck', 'Goose', 'Grebe', 'Cormorant', 'Heron', 'Egret', 'Stork', 'Ibis', 'Flamingo', 'Watercock', 'Waterhen'],
@@ -17,6 +16,19 @@ class DataIngestion:
             'ground': ['Quail', 'Partridge', 'Francolin', 'Peafowl', 'Junglefowl', 'Pipit', 'Lark', 'Babbler', 'Dove', 'Pigeon', 'Bulbul'],
             'wetland': ['Kingfisher', 'Sandpiper', 'Plover', 'Lapwing', 'Snipe', 'Godwit', 'Crane', 'Heron', 'Stork', 'Duck', 'Teal']
         }
+        # Minimum fuzzy score for accepting a name that doesn't match exactly
+        self.match_threshold = float(os.getenv('INGEST_MATCH_THRESHOLD', '0.85'))
+        # Rows and time per step of the last ingest_all_data run
+        self.stage_stats = []
+
+    def _record_stage(self, stage, started, rows):
+        seconds = time.perf_counter() - started
+        self.stage_stats.append({
+            'stage': stage,
+            'rows': rows,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(rows / seconds, 1) if seconds else None
+        })
 
     def categorize_bird(self, bird_name, scientific_name=None):
         """Categorize bird based on its name and scientific name"""
@@ -70,9 +82,13 @@ class DataIngestion:
     def ingest_all_data(self, species_csv, frequency_csv, google_drive_csv=None):
         """Main ingestion function that processes all CSV files"""
         # Note: We're already in the app context from the calling function
+        import pandas as pd  # only ingestion needs it; keeps importing this module cheap
         
+        self.stage_stats = []
+
         # Step 1: Load all CSV files
         print("Loading CSV files...")
+        started = time.perf_counter()
         species_df = pd.read_csv(species_csv)
         frequency_df = pd.read_csv(frequency_csv)
 
@@ -86,8 +102,17 @@ class DataIngestion:
                 drive_inventory[filename] = link
             print(f"Loaded {len(drive_inventory)} images from Google Drive inventory")
 
+        self._record_stage('load_csv', started, len(species_df) + len(frequency_df) + len(drive_inventory))
+
+        # Index filenames without extensions so 'Blue throated barbet.png'
+        # still pairs with 'Blue-throated Barbet'
+        drive_index = TrigramIndex()
+        for filename in drive_inventory:
+            drive_index.add(os.path.splitext(filename)[0], filename)
+
         # Step 2: Process species and create master species records
         print("Processing species data...")
+        started = time.perf_counter()
         processed_species = set()
         missing_scientific_names = []
 
@@ -134,9 +159,15 @@ class DataIngestion:
         # Commit species first to ensure foreign key constraints are met
         db.session.commit()
         print("Species data committed.")
+        self._record_stage('species', started, len(processed_species))
+
+        # Child rows reference species by id; map every name once instead of per row
+        species_id_by_name = species_ids()
 
         # Step 3: Process illustrations
         print("\nProcessing illustrations...")
+        started = time.perf_counter()
+        illustration_count = 0
         species_without_images = []
         
         for _, row in species_df.iterrows():
@@ -164,11 +195,13 @@ class DataIngestion:
             
             # Try to find the image by English name if no direct match
             if not image_link or image_link == '':
-                for filename, link in drive_inventory.items():
-                    if english_name in filename:
-                        image_name = filename
-                        image_link = link
-                        break
+                match = drive_index.best(english_name, min_score=self.match_threshold)
+                if match:
+                    score, _, filename = match
+                    image_name = filename
+                    image_link = drive_inventory[filename]
+                    if score < 1:
+                        print(f"Matched image '{filename}' to {english_name} (score {score:.2f})")
             
             # If we found an image link, create an illustration
             if image_link and str(image_link).lower() not in ['nan', 'none', ''] and image_name and str(image_name).lower() not in ['nan', 'none', '']:
@@ -184,13 +217,14 @@ class DataIngestion:
                 illustration = Illustrations(
                     image_name=clean_value(image_name),
                     image_link=clean_value(direct_link),
-                    species_english_name=clean_value(english_name),
+                    species_id=species_id_by_name.get(english_name),
                     sex=clean_value(row.get('Sex', '')),
                     breeding_status=clean_value(row.get('Breeding Status', '')),
                     subspecies=clean_value(row.get('Subspecies', '')),
                     is_default=True  # Making the first image the default
                 )
                 db.session.add(illustration)
+                illustration_count += 1
                 print(f"Added illustration for: {english_name}")
             else:
                 species_without_images.append(english_name)
@@ -203,8 +237,12 @@ class DataIngestion:
             if len(species_without_images) > 5:
                 print(f"  - ...and {len(species_without_images) - 5} more")
 
+        self._record_stage('illustrations', started, illustration_count)
+
         # Step 4: Process local names (Mizo names)
         print("\nProcessing local names...")
+        started = time.perf_counter()
+        name_count = 0
         for _, row in species_df.iterrows():
             english_name = row['English Name'].strip() if 'English Name' in row else None
             if not english_name:
@@ -215,15 +253,24 @@ class DataIngestion:
                 mizo_name = str(row['Mizo Name'])
                 if mizo_name and mizo_name != 'nan':
                     name = Names(
-                        species_english_name=str(english_name) if english_name else "",
+                        species_id=species_id_by_name.get(english_name),
                         language='Mizo',
                         name=mizo_name
                     )
-                db.session.add(name)
-                print(f"Added Mizo name for: {english_name}")
+                    db.session.add(name)
+                    name_count += 1
+                    print(f"Added Mizo name for: {english_name}")
+
+        self._record_stage('names', started, name_count)
 
         # Step 5: Process frequency data
         print("\nProcessing frequency data...")
+        started = time.perf_counter()
+        frequency_count = 0
+        species_index = TrigramIndex()
+        for english_name in processed_species:
+            species_index.add(english_name, english_name)
+
         for _, row in frequency_df.iterrows():
             if 'English Name' not in row or not row['English Name']:
                 print("Warning: Found frequency entry with missing English Name, skipping")
@@ -231,11 +278,14 @@ class DataIngestion:
             
             english_name = row['English Name'].strip()
             
-            # Check if this species exists in our database
-            species = Species.query.filter_by(english_name=english_name).first()
-            if not species:
-                print(f"Warning: Frequency data for unknown species: {english_name}, skipping")
-                continue
+            # Check if this species exists, reconciling spelling differences
+            if english_name not in processed_species:
+                match = species_index.best(english_name, min_score=self.match_threshold)
+                if not match:
+                    print(f"Warning: Frequency data for unknown species: {english_name}, skipping")
+                    continue
+                print(f"Reconciled frequency name '{english_name}' to '{match[2]}' (score {match[0]:.2f})")
+                english_name = match[2]
             
             state = row['State'] if 'State' in row else 'Unknown'
             district = row.get('District', 'Statewide') if 'District' in row else 'Statewide'
@@ -254,7 +304,7 @@ class DataIngestion:
             seasonality = row.get('Seasonality', '') if 'Seasonality' in row else ''
             
             frequency = Frequency(
-                english_name=str(english_name) if english_name else "",
+                species_id=species_id_by_name[english_name],
                 state=str(state) if state and state != 'nan' else "Unknown",
                 district=str(district) if district and district != 'nan' else "Statewide",
                 frequency_rank=frequency_rank,
@@ -262,11 +312,14 @@ class DataIngestion:
                 seasonality=str(seasonality) if seasonality and not pd.isna(seasonality) else ""
             )
             db.session.add(frequency)
+            frequency_count += 1
             print(f"Added frequency data for: {english_name} in {district}, {state}")
 
-        # Final commit
+        # Final commit (illustrations and names are flushed with the frequency rows)
         db.session.commit()
-        print("All data ingestion completed successfully!")
+        self._record_stage('frequency', started, frequency_count)
+        data_version = bump_data_version()
+        print(f"All data ingestion completed successfully! (data version {data_version})")
 
         # Print summary
         total_species = Species.query.count()
@@ -5,11 +5,13 @@ from pathlib import Path
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db, Species, Illustrations, Names, Frequency
+from app import create_app
+from models import db, Species, Illustrations, Names, Frequency
 
 def check_database_and_fix():
     """Check which database is actually being used and show data"""
     
+    app = create_app()
     with app.app_context():
         print("="*60)
         print("🔍 DATABASE INSPECTION")
@@ -74,7 +76,7 @@ def check_database_and_fix():
                 # Get sample frequency data
                 sample_freq = Frequency.query.limit(3).all()
                 for i, freq in enumerate(sample_freq, 1):
-                    print(f"   {i}. {freq.english_name} in {freq.state}, {freq.district} (rank: {freq.frequency_rank})")
+                    print(f"   {i}. {freq.species.english_name} in {freq.state}, {freq.district} (rank: {freq.frequency_rank})")
                     
             else:
                 print("⚠️  No frequency data found")
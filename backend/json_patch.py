@@ -0,0 +1,159 @@
+"""
+Minimal JSON Patch (RFC 6902) implementation for guide autosave.
+
+Supports the add, remove, replace, move, copy and test operations with
+JSON Pointer (RFC 6901) paths. Patches are applied to a copy of the document,
+so a failing operation leaves the original untouched.
+"""
+
+import copy
+
+
+class JsonPatchError(ValueError):
+    """Raised when a patch is malformed or can't be applied to the document"""
+
+
+def _parse_pointer(pointer):
+    if not isinstance(pointer, str):
+        raise JsonPatchError(f"Path must be a string, got {pointer!r}")
+    if pointer == '':
+        return []
+    if not pointer.startswith('/'):
+        raise JsonPatchError(f"Path must start with '/': {pointer}")
+    return [part.replace('~1', '/').replace('~0', '~') for part in pointer[1:].split('/')]
+
+
+def _list_index(container, token, allow_end=False):
+    if allow_end and token == '-':
+        return len(container)
+    if not token.isdigit() or (token != '0' and token.startswith('0')):
+        raise JsonPatchError(f"Invalid array index: {token}")
+    index = int(token)
+    limit = len(container) if allow_end else len(container) - 1
+    if index > limit:
+        raise JsonPatchError(f"Array index out of range: {token}")
+    return index
+
+
+def _resolve_parent(document, parts, pointer):
+    """Walk to the container holding the last path segment"""
+    node = document
+    for token in parts[:-1]:
+        if isinstance(node, dict):
+            if token not in node:
+                raise JsonPatchError(f"Path not found: {pointer}")
+            node = node[token]
+        elif isinstance(node, list):
+            node = node[_list_index(node, token)]
+        else:
+            raise JsonPatchError(f"Path not found: {pointer}")
+    return node
+
+
+def _get(document, pointer):
+    parts = _parse_pointer(pointer)
+    if not parts:
+        return document
+    parent = _resolve_parent(document, parts, pointer)
+    token = parts[-1]
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f"Path not found: {pointer}")
+        return parent[token]
+    if isinstance(parent, list):
+        return parent[_list_index(parent, token)]
+    raise JsonPatchError(f"Path not found: {pointer}")
+
+
+def _add(document, pointer, value):
+    parts = _parse_pointer(pointer)
+    if not parts:
+        return value
+    parent = _resolve_parent(document, parts, pointer)
+    token = parts[-1]
+    if isinstance(parent, dict):
+        parent[token] = value
+    elif isinstance(parent, list):
+        parent.insert(_list_index(parent, token, allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Path not found: {pointer}")
+    return document
+
+
+def _remove(document, pointer):
+    parts = _parse_pointer(pointer)
+    if not parts:
+        raise JsonPatchError("Can't remove the whole document")
+    parent = _resolve_parent(document, parts, pointer)
+    token = parts[-1]
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f"Path not found: {pointer}")
+        return parent.pop(token)
+    if isinstance(parent, list):
+        return parent.pop(_list_index(parent, token))
+    raise JsonPatchError(f"Path not found: {pointer}")
+
+
+def _json_equal(left, right):
+    """Equality by JSON type (RFC 6902 section 4.6): 1 and 1.0 match, but neither matches true"""
+    if isinstance(left, bool) or isinstance(right, bool):
+        return isinstance(left, bool) and isinstance(right, bool) and left == right
+    if isinstance(left, (int, float)) or isinstance(right, (int, float)):
+        return isinstance(left, (int, float)) and isinstance(right, (int, float)) and left == right
+    if isinstance(left, list) or isinstance(right, list):
+        return (isinstance(left, list) and isinstance(right, list) and len(left) == len(right)
+                and all(_json_equal(a, b) for a, b in zip(left, right)))
+    if isinstance(left, dict) or isinstance(right, dict):
+        return (isinstance(left, dict) and isinstance(right, dict) and left.keys() == right.keys()
+                and all(_json_equal(value, right[key]) for key, value in left.items()))
+    return type(left) is type(right) and left == right
+
+
+def apply_patch(document, patch):
+    """
+    Apply a list of JSON Patch operations and return the patched document.
+
+    Raises JsonPatchError if any operation fails; the input is never modified.
+    """
+    if not isinstance(patch, list):
+        raise JsonPatchError("Patch must be a list of operations")
+
+    result = copy.deepcopy(document)
+    for operation in patch:
+        if not isinstance(operation, dict) or 'op' not in operation or 'path' not in operation:
+            raise JsonPatchError(f"Invalid operation: {operation!r}")
+        op = operation['op']
+        path = operation['path']
+
+        if op in ('add', 'replace', 'test') and 'value' not in operation:
+            raise JsonPatchError(f"'{op}' operation requires a value")
+        if op in ('move', 'copy') and 'from' not in operation:
+            raise JsonPatchError(f"'{op}' operation requires 'from'")
+
+        if op == 'add':
+            result = _add(result, path, copy.deepcopy(operation['value']))
+        elif op == 'remove':
+            _remove(result, path)
+        elif op == 'replace':
+            _get(result, path)
+            if path == '':
+                result = copy.deepcopy(operation['value'])
+            else:
+                _remove(result, path)
+                result = _add(result, path, copy.deepcopy(operation['value']))
+        elif op == 'move':
+            source = operation['from']
+            if path != source and path.startswith(source + '/'):
+                raise JsonPatchError(f"Can't move {source} into its own child {path}")
+            value = _remove(result, source)
+            result = _add(result, path, value)
+        elif op == 'copy':
+            result = _add(result, path, copy.deepcopy(_get(result, operation['from'])))
+        elif op == 'test':
+            if not _json_equal(_get(result, path), operation['value']):
+                raise JsonPatchError(f"Test failed at {path}")
+        else:
+            raise JsonPatchError(f"Unknown operation: {op}")
+
+    return result
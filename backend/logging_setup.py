@@ -0,0 +1,172 @@
+"""
+Non-blocking logging: request threads put records on a bounded queue and a
+background QueueListener thread formats and writes them, so a slow disk
+never adds to response time.
+
+Environment variables:
+- LOG_LEVEL: root level (default INFO)
+- LOG_FILE: log file path (default backend.log); empty to log to stderr only
+- LOG_ROTATE: 'size' (default) or 'time'
+- LOG_MAX_BYTES / LOG_BACKUP_COUNT: size rotation threshold (10 MB) and files kept (5)
+- LOG_ROTATE_WHEN: time rotation interval, e.g. 'midnight' (default) or 'H'
+- LOG_QUEUE_SIZE: records buffered before new ones are dropped (default 10000)
+- LOG_SAMPLE: per-logger share of INFO/DEBUG records kept, e.g. 'app=0.1,werkzeug=0.05';
+  warnings and errors are always kept
+
+Each gunicorn worker rotates the same file independently; with several
+workers prefer time rotation or LOG_FILE= and let the container collect stderr.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def parse_sample_rates(value):
+    """'app=0.1,werkzeug=0.05' -> {'app': 0.1, 'werkzeug': 0.05}"""
+    rates = {}
+    for part in (value or '').split(','):
+        if '=' not in part:
+            continue
+        name, rate = part.split('=', 1)
+        rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps every Nth INFO/DEBUG record per logger (N = 1 / rate), and every
+    WARNING and above. A rate set for 'app' also applies to 'app.child'.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+        self._every = {}
+        self._seen = {}
+        self._lock = threading.Lock()
+        self.sampled_out = {}
+
+    def _every_for(self, name):
+        every = self._every.get(name)
+        if every is None:
+            rate = 1.0
+            parts = name.split('.')
+            for i in range(len(parts), 0, -1):
+                prefix = '.'.join(parts[:i])
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+            every = self._every[name] = 0 if rate <= 0 else max(1, round(1 / rate))
+        return every
+
+    def filter(self, record):
+        if record.levelno > logging.INFO:
+            return True
+        every = self._every_for(record.name)
+        if every == 1:
+            return True
+        with self._lock:
+            seen = self._seen.get(record.name, 0)
+            self._seen[record.name] = seen + 1
+            if every and seen % every == 0:
+                return True
+            self.sampled_out[record.name] = self.sampled_out.get(record.name, 0) + 1
+            return False
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room rather than fail when stopping with a full queue
+        self.queue.put(self._sentinel)
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks: when the queue is full the record is
+    dropped and counted. The listener thread is restarted in forked children,
+    since threads don't survive a fork (gunicorn preload).
+    """
+
+    def __init__(self, handlers, maxsize):
+        self.targets = handlers
+        self.maxsize = maxsize
+        self.listener = None
+        self.enqueued = {}
+        self.dropped = 0
+        self._lock = threading.Lock()
+        super().__init__(queue.Queue(maxsize))
+        self._start()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._start)
+
+    def _start(self):
+        self.queue = queue.Queue(self.maxsize)
+        self.listener = _Listener(self.queue, *self.targets, respect_handler_level=True)
+        self.listener.start()
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        with self._lock:
+            self.enqueued[record.name] = self.enqueued.get(record.name, 0) + 1
+
+    def stop(self):
+        """Write out everything still queued and stop the listener thread"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def stats(self):
+        """Records written and sampled out per logger, dropped records and the queue depth"""
+        sampled_out = {}
+        for log_filter in self.filters:
+            if isinstance(log_filter, SamplingFilter):
+                with log_filter._lock:
+                    sampled_out.update(log_filter.sampled_out)
+        with self._lock:
+            return {
+                'written': dict(self.enqueued),
+                'sampled_out': sampled_out,
+                'dropped': self.dropped,
+                'queued': self.queue.qsize()
+            }
+
+
+def configure_logging():
+    """Route all logging through an AsyncQueueHandler on the root logger; returns the handler"""
+    root = logging.getLogger()
+    for handler in root.handlers:
+        if isinstance(handler, AsyncQueueHandler):
+            return handler  # already configured
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    targets = [logging.StreamHandler()]
+    log_file = os.getenv('LOG_FILE', 'backend.log')
+    if log_file:
+        backup_count = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+        if os.getenv('LOG_ROTATE', 'size') == 'time':
+            targets.append(TimedRotatingFileHandler(
+                log_file, when=os.getenv('LOG_ROTATE_WHEN', 'midnight'), backupCount=backup_count))
+        else:
+            targets.append(RotatingFileHandler(
+                log_file, maxBytes=int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+                backupCount=backup_count))
+    for target in targets:
+        target.setFormatter(formatter)
+
+    handler = AsyncQueueHandler(targets, int(os.getenv('LOG_QUEUE_SIZE', '10000')))
+    handler.addFilter(SamplingFilter(parse_sample_rates(os.getenv('LOG_SAMPLE'))))
+    root.addHandler(handler)
+    root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+    atexit.register(handler.stop)
+    return handler
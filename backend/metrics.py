@@ -0,0 +1,216 @@
+"""
+Prometheus metrics in the text exposition format, without extra dependencies.
+
+Request and SQL metrics are recorded as they happen: a few dict updates
+under a lock per request and two clock reads per SQL statement. Everything
+else (caches, pools, job queues) is read from the owning objects only when
+/metrics is scraped, through collector callbacks.
+
+Each process keeps its own numbers; under gunicorn, scrape every worker or
+aggregate by ``instance`` in Prometheus.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labelvalues, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labelvalues -> [per-bucket counts..., +Inf count, sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labelvalues)
+            if series is None:
+                series = self._values[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[position] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labelvalues, series in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), series):
+                    cumulative += count
+                    le = _labels(self.labelnames, labelvalues, [('le', _number(float(bound)))])
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                labels = _labels(self.labelnames, labelvalues)
+                lines.append(f"{self.name}_sum{labels} {_number(round(series[-1], 6))}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Counters and histograms updated in place, plus collectors called at scrape time"""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help_text, labelnames=()):
+        metric = Counter(f"{self.prefix}_{name}", help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(f"{self.prefix}_{name}", help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, function):
+        """
+        Register ``function()`` returning ``(name, type, help, samples)``
+        tuples, where samples are ``(labels dict, value)`` pairs. Usable as a
+        decorator.
+        """
+        self._collectors.append(function)
+        return function
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            try:
+                families = list(collect())
+            except Exception as e:
+                lines.append(f"# collector {collect.__name__} failed: {_escape(e)}")
+                continue
+            for name, kind, help_text, samples in families:
+                name = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    if value is None:
+                        continue
+                    label_text = _labels(list(labels), list(labels.values()))
+                    lines.append(f"{name}{label_text} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+class RequestMetrics:
+    """
+    Per-route request counts and latency, and SQL statements and time per
+    request, for a Flask app.
+
+    Only statements on ``engines`` (the app's own) are counted, so apps in
+    one process keep separate figures; ``close()`` detaches from them.
+    """
+
+    def __init__(self, app, registry, engines):
+        self.requests = registry.counter(
+            'http_requests_total', 'HTTP requests by route, method and status', ('route', 'method', 'status'))
+        self.latency = registry.histogram(
+            'http_request_duration_seconds', 'Request latency by route', ('route', 'method'))
+        self.statements = registry.counter(
+            'db_statements_total', 'SQL statements executed', ('dialect',))
+        self.statement_seconds = registry.counter(
+            'db_statement_seconds_total', 'Time spent executing SQL statements', ('dialect',))
+        self.request_statements = registry.histogram(
+            'db_statements_per_request', 'SQL statements per request by route', ('route',), STATEMENT_BUCKETS)
+        self.request_db_seconds = registry.histogram(
+            'db_seconds_per_request', 'Time in SQL per request by route', ('route',))
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        self._engines = list(engines)
+        for engine in self._engines:
+            event.listen(engine, 'before_cursor_execute', self._before_execute)
+            event.listen(engine, 'after_cursor_execute', self._after_execute)
+
+    def close(self):
+        """Stop counting statements on the app's engines"""
+        for engine in self._engines:
+            event.remove(engine, 'before_cursor_execute', self._before_execute)
+            event.remove(engine, 'after_cursor_execute', self._after_execute)
+        self._engines = []
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_statements = 0
+        g.metrics_db_seconds = 0.0
+
+    def _after_request(self, response):
+        started = g.get('metrics_started')
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        # The URL rule keeps label cardinality bounded ('/api/guides/<int:guide_id>')
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        self.requests.inc(route, request.method, str(response.status_code))
+        self.latency.observe(elapsed, route, request.method)
+        self.request_statements.observe(g.metrics_statements, route)
+        self.request_db_seconds.observe(g.metrics_db_seconds, route)
+        return response
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('metrics_started')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        dialect = conn.dialect.name
+        self.statements.inc(dialect)
+        self.statement_seconds.inc(dialect, amount=elapsed)
+        if has_request_context() and 'metrics_statements' in g:
+            g.metrics_statements += 1
+            g.metrics_db_seconds += elapsed
@@ -0,0 +1,188 @@
+"""
+Database models and catalogue version helpers.
+
+``db`` is created without an app; create_app() in app.py, or a script with
+its own Flask app, binds it with ``db.init_app(app)``. Importing this module
+therefore creates no app, engine or log file, and several apps can share the
+models while each keeps its own engines.
+"""
+
+import json
+import logging
+from datetime import datetime
+
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.exc import SQLAlchemyError
+
+from db_routing import RoutingSession
+from pdf_engine import JOB_QUEUED, JOB_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+# GET requests may read from replicas; see db_routing.ReplicaRouter
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+class Species(db.Model):
+    __tablename__ = 'species'
+    id = db.Column(db.Integer, primary_key=True)
+    english_name = db.Column(db.String(255), nullable=False, unique=True)
+    scientific_name = db.Column(db.String(255), nullable=False)
+    type = db.Column(db.String(100), nullable=False)
+    taxa = db.Column(db.String(100), nullable=False)
+    size = db.Column(db.String(50))
+
+class Illustrations(db.Model):
+    __tablename__ = 'illustrations'
+    id = db.Column(db.Integer, primary_key=True)
+    image_name = db.Column(db.String(255), nullable=False)
+    image_link = db.Column(db.String(512), nullable=False)
+    species_id = db.Column(db.Integer, db.ForeignKey('species.id'))
+    sex = db.Column(db.String(10))
+    breeding_status = db.Column(db.String(20))
+    subspecies = db.Column(db.String(100))
+    is_default = db.Column(db.Boolean, nullable=False, default=False)
+    species = db.relationship(Species)
+    __table_args__ = (db.Index('idx_illustrations_species', 'species_id'),)
+
+class Names(db.Model):
+    __tablename__ = 'names'
+    id = db.Column(db.Integer, primary_key=True)
+    species_id = db.Column(db.Integer, db.ForeignKey('species.id'))
+    language = db.Column(db.String(50), nullable=False)
+    name = db.Column(db.String(255), nullable=False)
+    species = db.relationship(Species)
+    __table_args__ = (db.Index('idx_names_species', 'species_id'),)
+
+class Frequency(db.Model):
+    __tablename__ = 'frequency'
+    id = db.Column(db.Integer, primary_key=True)
+    species_id = db.Column(db.Integer, db.ForeignKey('species.id'))
+    state = db.Column(db.String(100), nullable=False)
+    district = db.Column(db.String(100))
+    frequency_rank = db.Column(db.Integer, nullable=False)
+    observation_count = db.Column(db.Integer)
+    seasonality = db.Column(db.String(50))
+    species = db.relationship(Species)
+    __table_args__ = (
+        db.Index('idx_frequency_state_district', 'state', 'district'),
+        # Lets rank cutoffs and LIMIT read a region's rows in rank order and stop early
+        db.Index('idx_frequency_state_district_rank', 'state', 'district', 'frequency_rank'),
+        db.Index('idx_frequency_species', 'species_id'),
+    )
+
+def species_ids(english_names=None):
+    """
+    {english_name: id} for the given species, or for all of them, in one
+    query; lets bulk loaders turn names into foreign keys without a lookup
+    per row.
+    """
+    query = db.select(Species.english_name, Species.id)
+    if english_names is not None:
+        query = query.where(Species.english_name.in_(list(english_names)))
+    return dict(db.session.execute(query).all())
+
+class DataVersion(db.Model):
+    __tablename__ = 'data_version'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+def get_data_version():
+    """Current catalogue version, used to key caches of derived data"""
+    try:
+        row = db.session.get(DataVersion, 1)
+    except SQLAlchemyError:
+        db.session.rollback()
+        return 0
+    return row.version if row else 0
+
+def bump_data_version():
+    """Mark the catalogue as changed; call after ingestion commits"""
+    DataVersion.__table__.create(bind=db.engine, checkfirst=True)
+    row = db.session.get(DataVersion, 1)
+    if row is None:
+        row = DataVersion(id=1, version=0)
+        db.session.add(row)
+    row.version += 1
+    row.updated_at = datetime.utcnow()
+    db.session.commit()
+    logger.info(f"Data version is now {row.version}")
+    return row.version
+
+class PdfJob(db.Model):
+    __tablename__ = 'pdf_jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(255))
+    status = db.Column(db.String(20), nullable=False, default=JOB_QUEUED)
+    request_data = db.Column(db.Text, nullable=False)
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    next_attempt_at = db.Column(db.DateTime)
+    worker = db.Column(db.String(100))
+    error = db.Column(db.Text)
+    log = db.Column(db.Text)
+    output_path = db.Column(db.String(512))
+    stats = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    __table_args__ = (db.Index('idx_pdf_jobs_status', 'status'),)
+
+    def append_log(self, message):
+        line = f"{datetime.utcnow().isoformat(timespec='seconds')} {message}"
+        self.log = f"{self.log}\n{line}" if self.log else line
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'title': self.title,
+            'status': self.status,
+            'progress': self.progress,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'stats': json.loads(self.stats) if self.stats else None,
+            'download_url': f"/api/pdf/jobs/{self.id}/download" if self.status == JOB_COMPLETED else None
+        }
+
+class Guide(db.Model):
+    __tablename__ = 'guides'
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(255), nullable=False)
+    revision = db.Column(db.Integer, nullable=False, default=0)
+    snapshot_revision = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'guide_id': self.id,
+            'title': self.title,
+            'revision': self.revision,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class GuideSnapshot(db.Model):
+    __tablename__ = 'guide_snapshots'
+    id = db.Column(db.Integer, primary_key=True)
+    guide_id = db.Column(db.Integer, db.ForeignKey('guides.id'), nullable=False)
+    revision = db.Column(db.Integer, nullable=False)
+    document = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    __table_args__ = (db.Index('idx_guide_snapshots_guide_revision', 'guide_id', 'revision'),)
+
+class GuidePatch(db.Model):
+    __tablename__ = 'guide_patches'
+    id = db.Column(db.Integer, primary_key=True)
+    guide_id = db.Column(db.Integer, db.ForeignKey('guides.id'), nullable=False)
+    revision = db.Column(db.Integer, nullable=False)
+    patch = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    __table_args__ = (db.UniqueConstraint('guide_id', 'revision', name='uq_guide_patches_guide_revision'),)
@@ -0,0 +1,781 @@
+"""
+Server-side PDF engine for pocket guides.
+
+PDF jobs are persisted in the ``pdf_jobs`` table. A dispatcher thread inside
+each API process claims queued jobs and hands the rendering to a bounded
+process pool, so long renders never tie up the threads serving API requests.
+Render workers report progress straight to the job row, which lets any API
+worker answer status requests.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import pickle
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+import multiprocessing
+
+from sqlalchemy import create_engine, text
+
+from utils import fetch_image
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = 'queued'
+JOB_PROCESSING = 'processing'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+PAGE_MARGIN_MM = 12
+CARDS_PER_PAGE = 2
+IMAGE_TIMEOUT_SECONDS = 10
+DEFAULT_TEMPLATE = 'card-2up'
+DEFAULT_IMAGE_DPI = int(os.getenv('PDF_IMAGE_DPI', '300'))
+JPEG_QUALITY = int(os.getenv('PDF_JPEG_QUALITY', '85'))
+FRAGMENT_FORMAT = 2
+FONT_FILES = {
+    'regular': ['DejaVuSans.ttf', 'NotoSans-Regular.ttf'],
+    'bold': ['DejaVuSans-Bold.ttf', 'NotoSans-Bold.ttf'],
+    'italic': ['DejaVuSans-Oblique.ttf', 'NotoSans-Italic.ttf']
+}
+FONT_DIRS = [
+    '/usr/share/fonts/truetype/dejavu',
+    '/usr/share/fonts/truetype/noto',
+    '/usr/share/fonts/TTF',
+    '/Library/Fonts',
+    'C:\\Windows\\Fonts'
+]
+STANDARD_FONTS = {'regular': 'Helvetica', 'bold': 'Helvetica-Bold', 'italic': 'Helvetica-Oblique'}
+FRAGMENT_CACHE_ENTRIES = int(os.getenv('PDF_FRAGMENT_CACHE_SIZE', '2000'))
+FRAGMENT_CACHE_DISK_BYTES = int(float(os.getenv('PDF_FRAGMENT_CACHE_DISK_MB', '512')) * 1024 * 1024)
+FRAGMENT_SWEEP_EVERY = 200
+
+
+def default_worker_count():
+    """Half the CPUs (at least one) so renders leave room for API workers"""
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+# ---------------------------------------------------------------------------
+# Rendering (runs inside the worker pool)
+# ---------------------------------------------------------------------------
+
+_progress_engines = {}
+_fragment_caches = {}
+_fragment_caches_lock = threading.Lock()
+_fonts = None
+
+
+def _report_progress(database_uri, job_id, progress):
+    """Write job progress from a render worker using a per-process engine"""
+    engine = _progress_engines.get(database_uri)
+    if engine is None:
+        engine = create_engine(database_uri)
+        _progress_engines[database_uri] = engine
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE pdf_jobs SET progress = :progress, updated_at = :now WHERE id = :id"),
+            {'progress': progress, 'now': datetime.utcnow(), 'id': job_id}
+        )
+
+
+class CardFragment:
+    """
+    A laid-out species card, independent of the document it ends up in.
+
+    ``ops`` are drawing operations in card-local coordinates (offsets from the
+    card's top-left corner) and ``images`` holds the encoded image data they
+    reference, so a fragment can be replayed onto any canvas. Fragments whose
+    illustration couldn't be fetched are marked incomplete and never cached.
+    """
+
+    def __init__(self, ops, images, complete=True):
+        self.ops = ops
+        self.images = images
+        self.complete = complete
+
+
+class FragmentCache:
+    """
+    Two-level cache of species card fragments.
+
+    An in-memory LRU sits in front of a directory of pickled fragments that
+    all render workers share, so a card laid out by one worker is reused by
+    the others and survives worker restarts. The directory is capped at
+    ``max_disk_bytes``: every ``FRAGMENT_SWEEP_EVERY`` writes the least
+    recently used files are deleted, which also clears out fragments keyed
+    to an old data version. Thread-safe, for the thread executor.
+    """
+
+    def __init__(self, cache_dir, max_entries=FRAGMENT_CACHE_ENTRIES, max_disk_bytes=FRAGMENT_CACHE_DISK_BYTES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.sweep()
+
+    @staticmethod
+    def make_key(bird, template, languages, data_version):
+        illustration_hash = hashlib.sha1((bird.get('image_link') or '').encode('utf-8')).hexdigest()
+        parts = [str(FRAGMENT_FORMAT), bird['english_name'], illustration_hash, template,
+                 ','.join(sorted(languages)), str(data_version)]
+        return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pickle")
+
+    def get(self, key):
+        with self._lock:
+            fragment = self._entries.get(key)
+            if fragment is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return fragment
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                fragment = pickle.load(f)
+            os.utime(path)  # recently used: keep it through the next sweep
+        except (OSError, pickle.PickleError, EOFError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self._remember(key, fragment)
+            self.hits += 1
+        return fragment
+
+    def put(self, key, fragment):
+        with self._lock:
+            self._remember(key, fragment)
+            self._writes += 1
+            sweep = self._writes % FRAGMENT_SWEEP_EVERY == 0
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(fragment, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        if sweep:
+            self.sweep()
+
+    def sweep(self):
+        """Delete the least recently used fragment files until the directory fits max_disk_bytes"""
+        files = []
+        total = 0
+        stale_tmp = time.time() - 3600
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith('.tmp') and st.st_mtime > stale_tmp:
+                    continue  # still being written
+                files.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:  # another worker got there first
+                pass
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"Fragment cache sweep removed {removed} files from {self.cache_dir}")
+        return removed
+
+    def _remember(self, key, fragment):
+        self._entries[key] = fragment
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def _get_fragment_cache(cache_dir):
+    with _fragment_caches_lock:
+        cache = _fragment_caches.get(cache_dir)
+        if cache is None:
+            cache = FragmentCache(cache_dir)
+            _fragment_caches[cache_dir] = cache
+    return cache
+
+
+def register_fonts():
+    """
+    Register the TrueType fonts used for guides, once per process.
+
+    Embedded TrueType fonts are subset by reportlab to the glyphs actually
+    drawn, so Mizo diacritics (ṭ, â, ê, î, ô, û) are available without
+    shipping whole font files. Falls back to the standard PDF fonts, which
+    need no embedding but can't show those characters. Returns a mapping of
+    style to (font name, is_subset, is_synthetic_oblique).
+    """
+    global _fonts
+    if _fonts is not None:
+        return _fonts
+
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    search_dirs = [os.getenv('PDF_FONT_DIR')] if os.getenv('PDF_FONT_DIR') else []
+    search_dirs += FONT_DIRS
+
+    def find(style):
+        for directory in search_dirs:
+            for filename in FONT_FILES[style]:
+                path = os.path.join(directory, filename)
+                if os.path.exists(path):
+                    return path
+        return None
+
+    fonts = {}
+    for style in ('regular', 'bold', 'italic'):
+        path = find(style)
+        if path:
+            name = f"GuideSans-{style}"
+            pdfmetrics.registerFont(TTFont(name, path))
+            fonts[style] = (name, True, False)
+
+    if 'regular' not in fonts:
+        logger.warning("No TrueType font found; using standard PDF fonts (no Mizo diacritics)")
+        fonts = {style: (name, False, False) for style, name in STANDARD_FONTS.items()}
+    else:
+        fonts.setdefault('bold', fonts['regular'])
+        if 'italic' not in fonts:
+            # Slant the regular face rather than lose italics for scientific names
+            fonts['italic'] = (fonts['regular'][0], True, True)
+
+    _fonts = fonts
+    return fonts
+
+
+class _Typesetter:
+    """Draws text in a logical font style and records the glyphs used per font"""
+
+    def __init__(self, pdf, fonts):
+        self.pdf = pdf
+        self.fonts = fonts
+        self.glyphs = {}
+        self._style = 'regular'
+        self._size = 10
+
+    def set_font(self, style, size):
+        self._style = style
+        self._size = size
+        self.pdf.setFont(self.fonts[style][0], size)
+
+    def draw(self, x, y, text, align='left'):
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+
+        font_name, _, synthetic_oblique = self.fonts[self._style]
+        self.glyphs.setdefault(font_name, set()).update(text)
+        if align == 'centre':
+            x -= stringWidth(text, font_name, self._size) / 2
+        elif align == 'right':
+            x -= stringWidth(text, font_name, self._size)
+
+        if synthetic_oblique:
+            self.pdf.saveState()
+            self.pdf.translate(x, y)
+            self.pdf.skew(0, 12)
+            self.pdf.drawString(0, 0, text)
+            self.pdf.restoreState()
+        else:
+            self.pdf.drawString(x, y, text)
+
+    def report(self):
+        return {
+            name: {'glyphs': len(chars), 'subset': any(f[0] == name and f[1] for f in self.fonts.values())}
+            for name, chars in self.glyphs.items()
+        }
+
+
+class _ImageRegistry:
+    """
+    Embeds each distinct image once per document as a form XObject.
+
+    Later uses only reference the existing object, so an illustration shared
+    by several cards (or repeated across pages) costs its bytes once.
+    """
+
+    def __init__(self, pdf):
+        self.pdf = pdf
+        self._names = {}
+        self.embedded_bytes = 0
+        self.references = 0
+
+    def draw(self, key, data, x, y, width, height):
+        from reportlab.lib.utils import ImageReader
+
+        name = self._names.get(key)
+        if name is None:
+            name = f"img{len(self._names)}_{key[:12]}"
+            self.pdf.beginForm(name, 0, 0, 1, 1)
+            self.pdf.drawImage(ImageReader(io.BytesIO(data)), 0, 0, width=1, height=1)
+            self.pdf.endForm()
+            self._names[key] = name
+            self.embedded_bytes += len(data)
+
+        self.references += 1
+        self.pdf.saveState()
+        self.pdf.translate(x, y)
+        self.pdf.scale(width, height)
+        self.pdf.doForm(name)
+        self.pdf.restoreState()
+
+    def report(self):
+        return {'embedded': len(self._names), 'references': self.references,
+                'embedded_bytes': self.embedded_bytes}
+
+
+def _prepare_image(data, box_width, box_height, dpi):
+    """
+    Fit an image into the box and resample it to the target print DPI.
+
+    Images are only ever scaled down. Transparency is flattened onto the white
+    card background and the result is JPEG-encoded, which reportlab embeds
+    without re-encoding. Returns (jpeg bytes, drawn width, drawn height).
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        width, height = image.size
+        scale = min(box_width / width, box_height / height)
+        drawn_width, drawn_height = width * scale, height * scale
+
+        target = (max(1, round(drawn_width / 72 * dpi)), max(1, round(drawn_height / 72 * dpi)))
+        if target[0] < width:
+            image = image.resize(target, Image.LANCZOS)
+
+        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.split()[-1])
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        output = io.BytesIO()
+        image.save(output, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+    return output.getvalue(), drawn_width, drawn_height
+
+
+def build_card_fragment(bird, options, width, height):
+    """
+    Lay out the region-independent part of a species card.
+
+    Ranks and seasonality differ between regions, so they are left out here
+    and drawn on top by ``_draw_card_details`` when the guide is assembled.
+    Text ops use logical font styles so fragments don't depend on which fonts
+    a worker has installed.
+    """
+    from reportlab.lib.units import mm
+
+    ops = [('stroke', (0.8, 0.8, 0.8)), ('roundrect', 0, 0, width, height, 3 * mm)]
+    images = {}
+
+    cursor = 7 * mm
+    ops += [('font', 'bold', 12), ('text', 4 * mm, cursor, bird['english_name'])]
+
+    if options.get('show_scientific_names', True) and bird.get('scientific_name'):
+        cursor += 5 * mm
+        ops += [('font', 'italic', 8), ('text', 4 * mm, cursor, bird['scientific_name'])]
+
+    for language in options.get('languages', []):
+        local_name = bird.get('names', {}).get(language)
+        if local_name:
+            cursor += 4.5 * mm
+            ops += [('font', 'regular', 8), ('text', 4 * mm, cursor, f"{language}: {local_name}")]
+
+    image_top = cursor + 3 * mm
+    box_width = width - 8 * mm
+    box_height = height - image_top - 18 * mm
+    drawn = False
+    wants_image = options.get('include_images', True) and bool(bird.get('image_link'))
+    if wants_image:
+        data = fetch_image(bird['image_link'], IMAGE_TIMEOUT_SECONDS)
+        if data:
+            try:
+                dpi = int(options.get('image_dpi', DEFAULT_IMAGE_DPI))
+                prepared, image_width, image_height = _prepare_image(data, box_width, box_height, dpi)
+                image_key = hashlib.sha1(prepared).hexdigest()
+                images[image_key] = prepared
+                ops.append(('image', image_key,
+                            4 * mm + (box_width - image_width) / 2,
+                            image_top + (box_height - image_height) / 2,
+                            image_width, image_height))
+                drawn = True
+            except Exception as e:
+                logger.warning(f"Could not lay out image for {bird['english_name']}: {str(e)}")
+        if not drawn:
+            ops += [('font', 'regular', 8), ('fill', (0.8, 0, 0)),
+                    ('text', 4 * mm, image_top + 5 * mm, "Image not available"),
+                    ('fill', (0, 0, 0))]
+
+    return CardFragment(ops, images, complete=drawn or not wants_image)
+
+
+def _draw_fragment(pdf, typesetter, image_registry, fragment, x, y):
+    """Replay a card fragment with its top-left corner at (x, y)"""
+    for op in fragment.ops:
+        kind = op[0]
+        if kind == 'font':
+            typesetter.set_font(op[1], op[2])
+        elif kind == 'text':
+            typesetter.draw(x + op[1], y - op[2], op[3])
+        elif kind == 'stroke':
+            pdf.setStrokeColorRGB(*op[1])
+        elif kind == 'fill':
+            pdf.setFillColorRGB(*op[1])
+        elif kind == 'roundrect':
+            pdf.roundRect(x + op[1], y - op[2] - op[4], op[3], op[4], op[5])
+        elif kind == 'image':
+            image_registry.draw(op[1], fragment.images[op[1]], x + op[2], y - op[3] - op[5], op[4], op[5])
+
+
+def _draw_card_details(typesetter, bird, x, y, height):
+    """Draw the per-region lines at the bottom of a card"""
+    from reportlab.lib.units import mm
+
+    details = []
+    if bird.get('type'):
+        details.append(f"Type: {bird['type']}")
+    if bird.get('size'):
+        details.append(f"Size: {bird['size']}")
+    if bird.get('seasonality'):
+        details.append(f"Seasonality: {bird['seasonality']}")
+    if bird.get('frequency_rank'):
+        details.append(f"Frequency rank: {bird['frequency_rank']}")
+
+    typesetter.set_font('regular', 8)
+    detail_y = y - height + 4 * mm + 4 * mm * (len(details) - 1)
+    for line in details:
+        typesetter.draw(x + 4 * mm, detail_y, line)
+        detail_y -= 4 * mm
+
+
+def _draw_cover(typesetter, payload, page_width, page_height):
+    from reportlab.lib.units import mm
+
+    centre = page_width / 2
+    typesetter.set_font('bold', 16)
+    typesetter.draw(centre, page_height - 40 * mm, "Pocket Bird Guide", align='centre')
+    typesetter.set_font('bold', 12)
+    typesetter.draw(centre, page_height - 50 * mm, payload.get('title') or 'Untitled Guide', align='centre')
+
+    if payload.get('location'):
+        typesetter.set_font('regular', 10)
+        typesetter.draw(centre, page_height - 60 * mm, payload['location'], align='centre')
+
+    creation_text = f"Created: {datetime.utcnow().strftime('%d %b %Y')}"
+    if payload.get('creator'):
+        creation_text += f" by {payload['creator']}"
+    typesetter.set_font('italic', 8)
+    typesetter.draw(centre, 20 * mm, creation_text, align='centre')
+    typesetter.set_font('regular', 8)
+    typesetter.draw(centre, 15 * mm, "Generated with NCF Pocket Guide Creator", align='centre')
+
+
+def render_guide_pdf(payload, output_path, progress_callback=None, fragment_cache=None):
+    """
+    Render a pocket guide to ``output_path``.
+
+    ``payload`` is a plain dict (title, location, creator, options, data
+    version and a list of bird dicts in the grouped-endpoint shape), so it can
+    cross a process boundary. Species cards come from ``fragment_cache`` when
+    possible, so assembling a guide is mostly replaying cached fragments.
+    Returns a summary dict with page, byte, font, image and cache statistics.
+    """
+    from reportlab.lib.pagesizes import A5
+    from reportlab.lib.units import mm
+    from reportlab.pdfgen import canvas
+
+    birds = payload.get('birds', [])
+    options = payload.get('options', {})
+    template = options.get('template', DEFAULT_TEMPLATE)
+    template_variant = (f"{template}:sci={int(options.get('show_scientific_names', True))}"
+                        f":img={int(options.get('include_images', True))}"
+                        f":dpi={int(options.get('image_dpi', DEFAULT_IMAGE_DPI))}")
+    languages = options.get('languages', [])
+    data_version = payload.get('data_version', 0)
+
+    page_width, page_height = A5
+    margin = PAGE_MARGIN_MM * mm
+    card_width = page_width - 2 * margin
+    card_height = (page_height - 2 * margin - (CARDS_PER_PAGE - 1) * 5 * mm) / CARDS_PER_PAGE
+
+    started = time.monotonic()
+    pdf = canvas.Canvas(output_path, pagesize=A5, pageCompression=1)
+    pdf.setTitle(payload.get('title') or 'Pocket Bird Guide')
+    pdf.setAuthor(payload.get('creator') or 'NCF Pocket Guide Creator')
+    typesetter = _Typesetter(pdf, register_fonts())
+    image_registry = _ImageRegistry(pdf)
+
+    _draw_cover(typesetter, payload, page_width, page_height)
+    pdf.showPage()
+
+    hits = misses = 0
+    last_reported = 0
+    for index, bird in enumerate(birds):
+        slot = index % CARDS_PER_PAGE
+        if index and slot == 0:
+            pdf.showPage()
+        top = page_height - margin - slot * (card_height + 5 * mm)
+
+        fragment = None
+        if fragment_cache is not None:
+            key = FragmentCache.make_key(bird, template_variant, languages, data_version)
+            fragment = fragment_cache.get(key)
+        if fragment is None:
+            misses += 1
+            fragment = build_card_fragment(bird, options, card_width, card_height)
+            if fragment_cache is not None and fragment.complete:
+                fragment_cache.put(key, fragment)
+        else:
+            hits += 1
+
+        _draw_fragment(pdf, typesetter, image_registry, fragment, margin, top)
+        _draw_card_details(typesetter, bird, margin, top, card_height)
+
+        if slot == CARDS_PER_PAGE - 1 or index == len(birds) - 1:
+            typesetter.set_font('regular', 8)
+            typesetter.draw(page_width - margin, margin / 2,
+                            f"{index // CARDS_PER_PAGE + 1} of {(len(birds) + CARDS_PER_PAGE - 1) // CARDS_PER_PAGE}",
+                            align='right')
+
+        progress = int((index + 1) * 95 / len(birds))
+        if progress_callback and progress - last_reported >= 5:
+            progress_callback(progress)
+            last_reported = progress
+
+    pdf.showPage()
+    pdf.save()
+
+    return {
+        'pages': pdf.getPageNumber() - 1,
+        'species': len(birds),
+        'bytes': os.path.getsize(output_path),
+        'render_seconds': round(time.monotonic() - started, 3),
+        'fonts': typesetter.report(),
+        'images': image_registry.report(),
+        'fragment_cache': {'hits': hits, 'misses': misses}
+    }
+
+
+def render_job(job_id, payload, output_path, database_uri, cache_dir):
+    """Process pool entry point: render one job and report progress"""
+    def report(progress):
+        _report_progress(database_uri, job_id, progress)
+
+    tmp_path = f"{output_path}.part"
+    summary = render_guide_pdf(payload, tmp_path, progress_callback=report,
+                               fragment_cache=_get_fragment_cache(cache_dir))
+    os.replace(tmp_path, output_path)
+    return summary
+
+
+# ---------------------------------------------------------------------------
+# Job queue (runs inside the API process)
+# ---------------------------------------------------------------------------
+
+class PdfJobQueue:
+    """
+    Dispatches persisted PDF jobs to a worker pool.
+
+    The dispatcher is started lazily (and again after a fork), so importing
+    the app never spawns threads or processes. Jobs are claimed with a
+    conditional UPDATE, which keeps several API processes from rendering the
+    same job twice.
+    """
+
+    def __init__(self, app, db, job_model, build_payload):
+        self.app = app
+        self.db = db
+        self.job_model = job_model
+        self.build_payload = build_payload
+
+        self.workers = int(os.getenv('PDF_WORKERS', default_worker_count()))
+        self.executor_kind = os.getenv('PDF_EXECUTOR', 'process')
+        self.max_attempts = int(os.getenv('PDF_MAX_ATTEMPTS', '3'))
+        self.retry_backoff = float(os.getenv('PDF_RETRY_BACKOFF_SECONDS', '10'))
+        self.stale_after = float(os.getenv('PDF_JOB_TIMEOUT_SECONDS', '600'))
+        self.poll_interval = float(os.getenv('PDF_POLL_SECONDS', '2'))
+        self.output_dir = os.getenv('PDF_OUTPUT_DIR', os.path.join(app.instance_path, 'pdf'))
+        self.fragment_dir = os.getenv('PDF_FRAGMENT_CACHE_DIR', os.path.join(self.output_dir, 'fragments'))
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._active = {}
+        self._executor = None
+        self._thread = None
+        self._pid = None
+
+    @property
+    def worker_id(self):
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def ensure_started(self):
+        """Start the dispatcher for this process if it isn't running yet"""
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            os.makedirs(self.output_dir, exist_ok=True)
+            with self.app.app_context():
+                self.job_model.__table__.create(bind=self.db.engine, checkfirst=True)
+
+            if self.executor_kind == 'thread':
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='pdf-render')
+            else:
+                # Spawned workers don't inherit the API's threads or DB connections
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            self._active = {}
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='pdf-dispatcher', daemon=True)
+            self._thread.start()
+            logger.info(f"PDF dispatcher started with {self.workers} {self.executor_kind} workers")
+
+    def notify(self):
+        """Wake the dispatcher after a job was queued"""
+        self.ensure_started()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            # The app context tears down the scoped session after each pass
+            with self.app.app_context():
+                try:
+                    self._requeue_stale_jobs()
+                    while len(self._active) < self.workers:
+                        if not self._dispatch_next():
+                            break
+                except Exception as e:
+                    logger.error(f"PDF dispatcher error: {str(e)}", exc_info=True)
+                    self.db.session.rollback()
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _requeue_stale_jobs(self):
+        """Put back jobs whose worker stopped reporting, e.g. after a crash"""
+        Job = self.job_model
+        cutoff = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        stale = Job.query.filter(Job.status == JOB_PROCESSING, Job.updated_at < cutoff).all()
+        for job in stale:
+            if job.id in self._active:
+                continue
+            logger.warning(f"Requeueing stale PDF job {job.id} (worker {job.worker})")
+            self._fail_attempt(job, 'Worker stopped reporting progress')
+        if stale:
+            self.db.session.commit()
+
+    def _dispatch_next(self):
+        Job = self.job_model
+        now = datetime.utcnow()
+        candidate = Job.query.filter(
+            Job.status == JOB_QUEUED,
+            (Job.next_attempt_at == None) | (Job.next_attempt_at <= now)
+        ).order_by(Job.created_at).first()
+        if not candidate:
+            return False
+
+        claimed = Job.query.filter(Job.id == candidate.id, Job.status == JOB_QUEUED).update({
+            'status': JOB_PROCESSING,
+            'worker': self.worker_id,
+            'attempts': Job.attempts + 1,
+            'progress': 0,
+            'started_at': now,
+            'updated_at': now
+        }, synchronize_session=False)
+        self.db.session.commit()
+        if not claimed:
+            return True
+
+        job = self.db.session.get(Job, candidate.id)
+        try:
+            payload = self.build_payload(job)
+        except Exception as e:
+            logger.error(f"Could not build payload for PDF job {job.id}: {str(e)}", exc_info=True)
+            job.status = JOB_FAILED
+            job.error = str(e)
+            job.append_log(f"Payload error: {str(e)}")
+            job.finished_at = datetime.utcnow()
+            self.db.session.commit()
+            return True
+
+        output_path = os.path.join(self.output_dir, f"guide_{job.id}.pdf")
+        database_uri = self.db.engine.url.render_as_string(hide_password=False)
+        job.append_log(f"Attempt {job.attempts} started on {self.worker_id}")
+        self.db.session.commit()
+
+        future = self._executor.submit(render_job, job.id, payload, output_path,
+                                       database_uri, self.fragment_dir)
+        self._active[job.id] = future
+        future.add_done_callback(lambda f, job_id=job.id, path=output_path, started=time.monotonic():
+                                 self._on_done(job_id, path, started, f))
+        logger.info(f"Dispatched PDF job {job.id} ({len(payload['birds'])} species)")
+        return True
+
+    def _on_done(self, job_id, output_path, started, future):
+        elapsed = time.monotonic() - started
+        try:
+            with self.app.app_context():
+                job = self.db.session.get(self.job_model, job_id)
+                error = future.exception()
+                if error is None:
+                    summary = future.result()
+                    job.status = JOB_COMPLETED
+                    job.progress = 100
+                    job.output_path = output_path
+                    job.stats = json.dumps(dict(summary, wall_seconds=round(elapsed, 3)))
+                    job.error = None
+                    job.finished_at = datetime.utcnow()
+                    job.updated_at = job.finished_at
+                    cache = summary['fragment_cache']
+                    job.append_log(f"Completed in {elapsed:.1f}s (render {summary['render_seconds']:.1f}s): "
+                                   f"{summary['pages']} pages, {summary['bytes']} bytes, "
+                                   f"{summary['images']['embedded']} images embedded once for "
+                                   f"{summary['images']['references']} uses, "
+                                   f"{cache['hits']} cached cards, {cache['misses']} new cards")
+                    logger.info(f"PDF job {job_id} completed in {elapsed:.1f}s")
+                else:
+                    logger.error(f"PDF job {job_id} failed: {error}")
+                    self._fail_attempt(job, str(error))
+                self.db.session.commit()
+        except Exception as e:
+            logger.error(f"Error recording PDF job {job_id} result: {str(e)}", exc_info=True)
+        finally:
+            self._active.pop(job_id, None)
+            self._wakeup.set()
+
+    def _fail_attempt(self, job, message):
+        """Schedule a retry with exponential backoff, or mark the job failed"""
+        now = datetime.utcnow()
+        job.error = message
+        job.updated_at = now
+        if job.attempts < job.max_attempts:
+            delay = self.retry_backoff * (2 ** (job.attempts - 1))
+            job.status = JOB_QUEUED
+            job.next_attempt_at = now + timedelta(seconds=delay)
+            job.append_log(f"Attempt {job.attempts} failed: {message}; retrying in {delay:.0f}s")
+        else:
+            job.status = JOB_FAILED
+            job.finished_at = now
+            job.append_log(f"Attempt {job.attempts} failed: {message}; giving up")
@@ -0,0 +1,303 @@
+"""
+Page thumbnails for guide previews and the "My Guides" grid.
+
+Pages are rasterized with Pillow in a pool of worker processes, never in the
+request path. Each thumbnail is stored under a hash of the page's content (its
+elements plus the guide settings that affect drawing), so after an edit only
+the pages whose content actually changed get a new hash and are re-rendered;
+every other page is served straight from the cache.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from pdf_engine import default_worker_count, FONT_DIRS, FONT_FILES, IMAGE_TIMEOUT_SECONDS
+from utils import fetch_image
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_FORMAT = 1
+PAGE_ASPECT = 210 / 148  # A5 portrait, matching the rendered PDF
+PREVIEW_READY = 'ready'
+PREVIEW_PENDING = 'pending'
+PREVIEW_FAILED = 'failed'
+
+
+def document_pages(document):
+    """The editor's page list, wherever this version of the document keeps it"""
+    if not isinstance(document, dict):
+        return []
+    layout = document.get('layout')
+    if isinstance(layout, dict) and isinstance(layout.get('pages'), list):
+        return layout['pages']
+    pages = document.get('pages')
+    return pages if isinstance(pages, list) else []
+
+
+def page_hash(page, settings, width):
+    """Content hash of a page; element ids are left out since they don't show"""
+    elements = []
+    for element in (page or {}).get('elements', []) if isinstance(page, dict) else []:
+        if isinstance(element, dict):
+            elements.append({k: v for k, v in element.items() if k != 'id'})
+    canonical = json.dumps(
+        [PREVIEW_FORMAT, width, settings or {}, elements],
+        sort_keys=True, separators=(',', ':'), default=str
+    )
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Rasterization (runs inside the worker pool)
+# ---------------------------------------------------------------------------
+
+_preview_fonts = {}
+
+
+def _font(size, bold=False):
+    from PIL import ImageFont
+
+    key = (size, bold)
+    if key not in _preview_fonts:
+        font = None
+        font_dirs = [os.getenv('PDF_FONT_DIR')] if os.getenv('PDF_FONT_DIR') else []
+        for directory in font_dirs + FONT_DIRS:
+            for filename in FONT_FILES['bold' if bold else 'regular']:
+                path = os.path.join(directory, filename)
+                if os.path.exists(path):
+                    font = ImageFont.truetype(path, size)
+                    break
+            if font:
+                break
+        _preview_fonts[key] = font or ImageFont.load_default()
+    return _preview_fonts[key]
+
+
+def _wrap(draw, text, font, max_width):
+    lines = []
+    for paragraph in str(text).splitlines() or ['']:
+        line = ''
+        for word in paragraph.split():
+            candidate = f"{line} {word}".strip()
+            if line and draw.textlength(candidate, font=font) > max_width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return lines
+
+
+def _species_fields(content):
+    """Pick names and image out of a species card, whatever shape the editor sent"""
+    if isinstance(content, str):
+        return content, None, None
+    if not isinstance(content, dict):
+        return 'Species', None, None
+    name = content.get('english_name') or content.get('commonName') or content.get('name') or 'Species'
+    scientific = content.get('scientific_name') or content.get('scientificName')
+    image = content.get('image_link') or content.get('imageUrl') or content.get('image')
+    return name, scientific, image if isinstance(image, str) else None
+
+
+def _paste_image(canvas, url, box):
+    from PIL import Image
+
+    data = fetch_image(url, IMAGE_TIMEOUT_SECONDS)
+    if not data:
+        return False
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert('RGBA')
+        image.thumbnail((max(1, box[2] - box[0]), max(1, box[3] - box[1])))
+        x = box[0] + (box[2] - box[0] - image.width) // 2
+        y = box[1] + (box[3] - box[1] - image.height) // 2
+        canvas.paste(image, (x, y), image)
+    return True
+
+
+def rasterize_page(page, settings, width):
+    """Draw one editor page as a PNG thumbnail and return its bytes"""
+    from PIL import Image, ImageDraw
+
+    height = round(width * PAGE_ASPECT)
+    canvas = Image.new('RGB', (width, height), (255, 255, 255))
+    draw = ImageDraw.Draw(canvas)
+    scale = width / 360
+    show_scientific = (settings or {}).get('showScientificNames', True)
+
+    for element in page.get('elements', []) if isinstance(page, dict) else []:
+        if not isinstance(element, dict):
+            continue
+        position = element.get('position') or {}
+        size = element.get('size') or {}
+        left = round(float(position.get('x', 0)) / 100 * width)
+        top = round(float(position.get('y', 0)) / 100 * height)
+        right = left + round(float(size.get('width', 25)) / 100 * width)
+        bottom = top + round(float(size.get('height', 15)) / 100 * height)
+        padding = max(2, round(4 * scale))
+        kind = element.get('type')
+        content = element.get('content')
+
+        if kind == 'divider':
+            middle = (top + bottom) // 2
+            draw.line([(left, middle), (right, middle)], fill=(120, 120, 120), width=max(1, round(scale)))
+        elif kind in ('text', 'heading'):
+            font = _font(max(6, round((14 if kind == 'heading' else 9) * scale)), bold=kind == 'heading')
+            y = top + padding
+            for line in _wrap(draw, content or '', font, right - left - 2 * padding):
+                if y + font.size > bottom:
+                    break
+                draw.text((left + padding, y), line, fill=(0, 0, 0), font=font)
+                y += round(font.size * 1.25)
+        elif kind == 'species-card':
+            name, scientific, image = _species_fields(content)
+            draw.rounded_rectangle([left, top, right, bottom], radius=round(6 * scale), outline=(200, 200, 200))
+            title_font = _font(max(6, round(10 * scale)), bold=True)
+            draw.text((left + padding, top + padding), name, fill=(0, 0, 0), font=title_font)
+            image_top = top + padding + round(title_font.size * 1.3)
+            if scientific and show_scientific:
+                small = _font(max(5, round(8 * scale)))
+                draw.text((left + padding, image_top), scientific, fill=(90, 90, 90), font=small)
+                image_top += round(small.size * 1.3)
+            if image:
+                _paste_image(canvas, image, (left + padding, image_top, right - padding, bottom - padding))
+        elif kind == 'image':
+            url = content.get('url') if isinstance(content, dict) else content
+            box = (left, top, right, bottom)
+            if not (isinstance(url, str) and _paste_image(canvas, url, box)):
+                draw.rectangle(box, fill=(235, 235, 235), outline=(200, 200, 200))
+        else:
+            draw.rectangle([left, top, right, bottom], outline=(200, 200, 200))
+
+    output = io.BytesIO()
+    canvas.save(output, 'PNG', optimize=True)
+    return output.getvalue()
+
+
+def render_preview(page, settings, width, output_path):
+    """Worker entry point: rasterize a page and atomically publish the PNG"""
+    data = rasterize_page(page, settings, width)
+    partial_path = f"{output_path}.{os.getpid()}.part"
+    with open(partial_path, 'wb') as f:
+        f.write(data)
+    os.replace(partial_path, output_path)
+    return len(data)
+
+
+# ---------------------------------------------------------------------------
+# Scheduling (runs in the API process)
+# ---------------------------------------------------------------------------
+
+class PreviewRenderer:
+    """
+    Schedules page thumbnails onto a worker pool and reports their status.
+
+    Thumbnails are content-addressed files, so any API process (or a restart)
+    sees what earlier renders produced. Only pages without a file, and not
+    already being rendered, are submitted. Failures are remembered for the
+    most recent ``PREVIEW_FAILED_CACHE_SIZE`` pages; older ones are retried.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.width = int(os.getenv('PREVIEW_WIDTH', '360'))
+        self.workers = int(os.getenv('PREVIEW_WORKERS', default_worker_count()))
+        self.executor_kind = os.getenv('PREVIEW_EXECUTOR', 'process')
+
+        # Re-entrant: a future that is already done runs its callback in submit()
+        self._lock = threading.RLock()
+        self._pending = {}
+        self._failed = OrderedDict()
+        self._failed_max = int(os.getenv('PREVIEW_FAILED_CACHE_SIZE', '1000'))
+        self._executor = None
+        self._pid = None
+        self.rendered = 0
+        self.reused = 0
+
+    def _ensure_executor(self):
+        if self._pid == os.getpid() and self._executor is not None:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.executor_kind == 'thread':
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='preview-render')
+        else:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        self._pending = {}
+        self._pid = os.getpid()
+        logger.info(f"Preview renderer started with {self.workers} {self.executor_kind} workers")
+
+    def path_for(self, content_hash):
+        return os.path.join(self.output_dir, f"{content_hash}.png")
+
+    def previews(self, document, pages=None, retry_failed=False):
+        """
+        Status of each page's thumbnail, submitting the ones that are missing.
+
+        ``pages`` optionally limits the result to some page indexes (the guide
+        grid only needs the first page). Pages that failed stay failed until
+        ``retry_failed`` is set, so polling clients don't loop on a bad page.
+        Returns a list of dicts with index, hash and status.
+        """
+        settings = document.get('settings') if isinstance(document, dict) else None
+        all_pages = document_pages(document)
+        indexes = [i for i in (pages if pages is not None else range(len(all_pages))) if 0 <= i < len(all_pages)]
+
+        result = []
+        with self._lock:
+            self._ensure_executor()
+            for index in indexes:
+                page = all_pages[index]
+                content_hash = page_hash(page, settings, self.width)
+                entry = {'index': index, 'hash': content_hash}
+
+                if os.path.exists(self.path_for(content_hash)):
+                    entry['status'] = PREVIEW_READY
+                    self.reused += 1
+                elif content_hash in self._pending:
+                    entry['status'] = PREVIEW_PENDING
+                elif content_hash in self._failed and not retry_failed:
+                    entry['status'] = PREVIEW_FAILED
+                    entry['error'] = self._failed[content_hash]
+                else:
+                    self._failed.pop(content_hash, None)
+                    self._submit(content_hash, page, settings)
+                    entry['status'] = PREVIEW_PENDING
+                result.append(entry)
+        return result
+
+    def _submit(self, content_hash, page, settings):
+        future = self._executor.submit(render_preview, page, settings, self.width, self.path_for(content_hash))
+        self._pending[content_hash] = future
+        future.add_done_callback(lambda f, h=content_hash: self._on_done(h, f))
+
+    def _on_done(self, content_hash, future):
+        with self._lock:
+            self._pending.pop(content_hash, None)
+            try:
+                future.result()
+                self.rendered += 1
+            except Exception as e:
+                self._failed[content_hash] = str(e)
+                self._failed.move_to_end(content_hash)
+                while len(self._failed) > self._failed_max:
+                    self._failed.popitem(last=False)
+                logger.error(f"Preview render failed for page {content_hash}: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'width': self.width,
+                'pending': len(self._pending),
+                'failed': len(self._failed),
+                'rendered': self.rendered,
+                'reused': self.reused
+            }
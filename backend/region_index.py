@@ -0,0 +1,221 @@
+"""
+Species x region bitmap index for multi-region set queries.
+
+Each region (state/district pair) holds one bitset over the species catalogue,
+stored as a Python int with bit ``i`` set when species ``i`` is recorded there.
+Union, intersection and difference of regions are then single big-int OR / AND
+/ AND-NOT operations, which CPython runs a machine word at a time, instead of
+row-by-row merges. The index is rebuilt whenever the data version changes.
+"""
+
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"""\s*(?:([()|&-])|"([^"]*)"|'([^']*)'|([\w./]+))""", re.UNICODE)
+
+
+class RegionExpressionError(ValueError):
+    """Raised when a set expression can't be parsed or names an unknown region"""
+
+
+def _tokenize(expression):
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = TOKEN_PATTERN.match(expression, position)
+        if not match or match.end() == position:
+            raise RegionExpressionError(f"Unexpected character at {position}: {expression[position:position + 10]!r}")
+        operator, double_quoted, single_quoted, bare = match.groups()
+        if operator:
+            tokens.append(('op', operator))
+        else:
+            name = next(part for part in (double_quoted, single_quoted, bare) if part is not None)
+            tokens.append(('region', name))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive-descent parser for region set expressions.
+
+    Grammar (``&`` binds tighter than ``|`` and ``-``, which are left-associative)::
+
+        expression := term (('|' | '-') term)*
+        term       := factor ('&' factor)*
+        factor     := region | '(' expression ')'
+    """
+
+    def __init__(self, tokens, resolve):
+        self.tokens = tokens
+        self.position = 0
+        self.resolve = resolve
+
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def _take(self):
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise RegionExpressionError("Expression is empty")
+        value = self._expression()
+        if self.position != len(self.tokens):
+            raise RegionExpressionError(f"Unexpected {self._peek()[1]!r}")
+        return value
+
+    def _expression(self):
+        value = self._term()
+        while self._peek() in (('op', '|'), ('op', '-')):
+            _, operator = self._take()
+            right = self._term()
+            value = value | right if operator == '|' else value & ~right
+        return value
+
+    def _term(self):
+        value = self._factor()
+        while self._peek() == ('op', '&'):
+            self._take()
+            value &= self._factor()
+        return value
+
+    def _factor(self):
+        kind, text = self._take()
+        if kind == 'region':
+            return self.resolve(text)
+        if (kind, text) == ('op', '('):
+            value = self._expression()
+            if self._take() != ('op', ')'):
+                raise RegionExpressionError("Missing closing parenthesis")
+            return value
+        raise RegionExpressionError(f"Expected a region name, got {text!r}" if text else "Expression ended early")
+
+
+class RegionBitmapIndex:
+    """
+    Evaluates set expressions over regions, e.g. ``"Aizawl" | "Lunglei"``.
+
+    ``load_rows`` is called with no arguments on rebuild and must return
+    ``(species, frequency)``: species dicts (ordered, one per species) and
+    ``(english_name, state, district, frequency_rank, observation_count,
+    seasonality)`` tuples.
+    """
+
+    def __init__(self, load_rows):
+        self.load_rows = load_rows
+        self.version = None
+        self._lock = threading.Lock()
+        # Swapped as one tuple so queries never see half a rebuild
+        self._data = ([], {}, {})
+
+    def ensure_current(self, data_version):
+        """Rebuild the bitsets if the catalogue changed since they were built"""
+        if self.version == data_version:
+            return
+        with self._lock:
+            if self.version == data_version:
+                return
+            self._build(*self.load_rows())
+            self.version = data_version
+
+    def _build(self, species_rows, frequency_rows):
+        species = list(species_rows)
+        positions = {row['english_name']: i for i, row in enumerate(species)}
+        bitsets = {}
+        details = {}
+
+        for english_name, state, district, rank, observations, seasonality in frequency_rows:
+            position = positions.get(english_name)
+            if position is None:
+                continue
+            region = (state, district)
+            bitsets[region] = bitsets.get(region, 0) | (1 << position)
+            details.setdefault(region, {})[position] = (rank, observations, seasonality)
+
+        self._data = (species, bitsets, details)
+        logger.info(f"Built region bitmap index: {len(species)} species x {len(bitsets)} regions")
+
+    def _statewide(self, state):
+        """A state's statewide regions: '<State> (Statewide)', or any district of it naming itself statewide"""
+        _, bitsets, _ = self._data
+        lowered = state.strip().lower()
+        in_state = [r for r in bitsets if r[0].lower() == lowered and r[1]]
+        exact = [r for r in in_state if r[1].lower() == f"{r[0]} (statewide)".lower()]
+        return exact or [r for r in in_state if 'statewide' in r[1].lower()]
+
+    def regions_for(self, name):
+        """
+        Regions a name refers to: 'State/District', 'State/Statewide', a
+        district name, or a state name (its statewide records).
+        """
+        _, bitsets, _ = self._data
+        if '/' in name:
+            state, district = (part.strip() for part in name.split('/', 1))
+            if district.lower() == 'statewide':
+                found = self._statewide(state)
+            else:
+                found = [r for r in bitsets
+                         if r[0].lower() == state.lower() and (r[1] or '').lower() == district.lower()]
+        else:
+            lowered = name.strip().lower()
+            found = [r for r in bitsets if (r[1] or '').lower() == lowered] or self._statewide(name)
+        if not found:
+            raise RegionExpressionError(f"Unknown region: {name}")
+        if '/' not in name and len({r[0] for r in found}) > 1:
+            raise RegionExpressionError(f"Ambiguous region {name!r}; use 'State/District'")
+        return found
+
+    def evaluate(self, expression):
+        """
+        Evaluate an expression and return (bitset, regions it names).
+
+        Raises RegionExpressionError for syntax errors and unknown regions.
+        """
+        _, bitsets, _ = self._data
+        referenced = []
+
+        def resolve(name):
+            bits = 0
+            for region in self.regions_for(name):
+                referenced.append(region)
+                bits |= bitsets[region]
+            return bits
+
+        bits = _Parser(_tokenize(expression), resolve).parse()
+        return bits, referenced
+
+    def query(self, expression):
+        """
+        Species matching ``expression``, ordered by their best rank across the
+        regions named in it. Each result is the species dict plus its best
+        frequency_rank, observation_count and seasonality, and ``regions``, the
+        named regions it was recorded in.
+        """
+        species, _, details = self._data
+        bits, referenced = self.evaluate(expression)
+        referenced = list(dict.fromkeys(referenced))
+
+        results = []
+        while bits:
+            # Walk set bits lowest first: isolate, locate, clear
+            lowest = bits & -bits
+            position = lowest.bit_length() - 1
+            bits ^= lowest
+
+            found_in = [region for region in referenced if position in details[region]]
+            best = min((details[region][position] for region in found_in),
+                       key=lambda d: d[0], default=(None, None, None))
+            result = dict(species[position])
+            result['frequency_rank'], result['observation_count'], result['seasonality'] = best
+            result['regions'] = [f"{state}/{district}" for state, district in found_in]
+            results.append(result)
+
+        results.sort(key=lambda r: (r['frequency_rank'] is None, r['frequency_rank'] or 0, r['english_name']))
+        return results
@@ -0,0 +1,76 @@
+"""
+Response shaping for the bird and species endpoints.
+
+- ``fields=a,b,c`` projects records down to the listed keys.
+- ``format=table`` sends a list of records as column names once plus rows of
+  values, instead of repeating every key in every record.
+- ``Accept: application/x-msgpack`` returns MessagePack instead of JSON when
+  the msgpack package is installed.
+"""
+
+from flask import jsonify, request, Response
+
+try:
+    import msgpack
+except ImportError:  # optional; JSON is always available
+    msgpack = None
+
+MSGPACK_TYPES = ('application/x-msgpack', 'application/msgpack', 'application/vnd.msgpack')
+
+
+def requested_fields(allowed, args=None):
+    """
+    Fields named in the ``fields`` query parameter, in the order given.
+
+    ``args`` defaults to the Flask request's query parameters; the ASGI app
+    passes its own. Returns None when no projection was requested. Raises
+    ValueError for unknown fields so typos don't silently produce empty
+    records.
+    """
+    value = (request.args if args is None else args).get('fields', '').strip()
+    if not value:
+        return None
+    fields = list(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(allowed)}")
+    return fields
+
+
+def requested_layout(args=None):
+    """'table' or 'records', from the ``format`` query parameter"""
+    layout = (request.args if args is None else args).get('format', 'records')
+    if layout not in ('records', 'table'):
+        raise ValueError("format must be 'records' or 'table'")
+    return layout
+
+
+def shape(records, fields, layout):
+    """Project a list of record dicts and lay it out as records or a table"""
+    if layout == 'table':
+        columns = fields or (list(records[0].keys()) if records else [])
+        return {'columns': columns, 'rows': [[record.get(c) for c in columns] for record in records]}
+    if fields:
+        return [{f: record.get(f) for f in fields} for record in records]
+    return records
+
+
+def wants_msgpack(accept_mimetypes=None):
+    """Whether the client prefers MessagePack (the Flask request's Accept header by default)"""
+    if msgpack is None:
+        return False
+    accept = request.accept_mimetypes if accept_mimetypes is None else accept_mimetypes
+    best = accept.best_match(('application/json',) + MSGPACK_TYPES)
+    return best in MSGPACK_TYPES
+
+
+def encode(payload, status=200):
+    """Serialize as MessagePack or JSON depending on the Accept header"""
+    if wants_msgpack():
+        response = Response(msgpack.packb(payload, use_bin_type=True), status=status,
+                            mimetype='application/x-msgpack')
+    else:
+        response = jsonify(payload)
+        response.status_code = status
+    response.vary.add('Accept')
+    return response
@@ -0,0 +1,41 @@
+"""
+Small thread-safe LRU cache for computed API results.
+
+Keys should include the data version so entries for an old catalogue are
+never served; they simply age out of the LRU.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    """LRU mapping with hit/miss counters, safe to share between request threads"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'hits': self.hits, 'misses': self.misses}
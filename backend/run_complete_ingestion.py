@@ -5,7 +5,8 @@ os.environ['DATABASE_URL'] = 'sqlite:///pocketguide.db'
 
 # Now import app after setting environment variables
 from ingest_data_complete import DataIngestion
-from app import app, db
+from app import create_app
+from models import db
 
 def reset_database():
     """Optional: Reset database before ingestion"""
@@ -17,6 +18,8 @@ def reset_database():
             print("Database reset completed.")
 
 if __name__ == "__main__":
+    app = create_app()
+
     # File paths
     DATA_DIR = os.path.join("backend", "data", "real")
     species_csv = os.path.join(DATA_DIR, "species.csv")
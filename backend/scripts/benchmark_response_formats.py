@@ -0,0 +1,108 @@
+"""
+Compare payload size and encode time of the bird endpoint response formats.
+
+Only the formatting step is timed: ``shape()`` (projection and table layout)
+followed by JSON or MessagePack encoding, on one fixed grouped payload, so
+routing and SQL don't drown out the differences. The payload is fetched once
+from /api/birds/grouped, or read from a file saved with --save-payload. Run
+from the backend directory:
+
+    python scripts/benchmark_response_formats.py --state Mizoram --district Statewide
+    python scripts/benchmark_response_formats.py --payload /tmp/grouped.json
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from response_format import msgpack, shape
+
+PROJECTION = ['english_name', 'names', 'image_link', 'frequency_rank']
+VARIANTS = [
+    ('records (default)', None, 'records'),
+    ('projection', PROJECTION, 'records'),
+    ('table', None, 'table'),
+    ('table + projection', PROJECTION, 'table'),
+]
+
+
+def fetch_payload(app, state, district):
+    """The grouped records for one region, as the endpoint returns them by default"""
+    response = app.test_client().get('/api/birds/grouped', query_string={'state': state, 'district': district},
+                                     headers={'Accept': 'application/json'})
+    if response.status_code != 200:
+        raise SystemExit(f"/api/birds/grouped returned {response.status_code}: {response.data[:200]!r}")
+    return response.get_json()
+
+
+def encoders(app):
+    # The app's JSON provider, so output matches what jsonify() sends
+    yield 'json', lambda payload: app.json.dumps(payload).encode('utf-8')
+    if msgpack is not None:
+        yield 'msgpack', lambda payload: msgpack.packb(payload, use_bin_type=True)
+
+
+def measure(grouped, fields, layout, encode, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = encode({bird_type: shape(birds, fields, layout) for bird_type, birds in grouped.items()})
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {
+        'bytes': len(body),
+        'gzip_bytes': len(gzip.compress(body)),
+        'median_us': round(timings[len(timings) // 2] * 1e6, 1),
+        'p95_us': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1e6, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--state', default='Mizoram')
+    parser.add_argument('--district', default='Statewide')
+    parser.add_argument('--payload', help='Read the grouped payload from this JSON file instead of the database')
+    parser.add_argument('--save-payload', help='Write the fetched payload to this file for later runs')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    app = create_app()
+    if args.payload:
+        with open(args.payload) as f:
+            grouped = json.load(f)
+    else:
+        grouped = fetch_payload(app, args.state, args.district)
+    if args.save_payload:
+        with open(args.save_payload, 'w') as f:
+            json.dump(grouped, f)
+
+    results = []
+    with app.app_context():
+        for encoding, encode in encoders(app):
+            for name, fields, layout in VARIANTS:
+                result = measure(grouped, fields, layout, encode, args.repeat)
+                results.append(dict(result, variant=name, encoding=encoding))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    records = sum(len(birds) for birds in grouped.values())
+    print(f"{records} records in {len(grouped)} groups, {args.repeat} runs each; shape() + encode only")
+    baseline = results[0]['bytes']
+    print(f"{'variant':<22} {'encoding':<8} {'bytes':>9} {'gzip':>8} {'vs default':>10} "
+          f"{'median us':>10} {'p95 us':>9}")
+    for r in results:
+        print(f"{r['variant']:<22} {r['encoding']:<8} {r['bytes']:>9} {r['gzip_bytes']:>8} "
+              f"{r['bytes'] / baseline:>9.0%} {r['median_us']:>10} {r['p95_us']:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,429 @@
+"""
+Benchmark the API endpoints and ingestion on the synthetic catalogue.
+
+Builds a synthetic database with scripts/generate_synthetic_data.py in a
+temporary directory, then measures:
+
+- endpoints: each endpoint is called in-process through the Flask test client
+  over a mix of regions and names, recording p50/p95/p99 latency, SQL
+  statements per request and payload bytes. This covers the bird, species
+  and admin reads (with MessagePack variants when msgpack is installed),
+  guide autosave, GET and since= replay, polling of already rendered
+  guide previews, the PDF job list and stats over seeded jobs, and /metrics
+- ingestion: rows per second for the bulk load and for each stage of
+  DataIngestion on the generated CSVs
+
+Run from the backend directory. Save a baseline, then compare later runs
+against it; --compare exits with status 1 if anything regressed past the
+thresholds:
+
+    python scripts/benchmark_suite.py --save benchmarks/baseline.json
+    python scripts/benchmark_suite.py --compare benchmarks/baseline.json
+
+Not measured: creating PDF jobs and rendering previews, which hand the work
+to background worker pools (and fetch bird images over the network), so a
+request's latency says nothing about the render; PDF downloads and preview
+PNGs, which are static file sends; and the admin write endpoints.
+
+Baselines are only comparable on the same machine, Python version and
+dataset size: the recorded baseline ran on Python 3.11, while Dockerfile.prod
+ships 3.9. --compare refuses a different dataset and warns about a different
+Python version.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from urllib.parse import quote, urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Per-request INFO lines would drown the report; set LOG_LEVEL to measure with them
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from generate_synthetic_data import generate, write_csvs, load_database
+
+SIZES = {
+    'full': {'states': 36, 'districts': 750, 'species': 1300, 'species_per_district': 300},
+    'small': {'states': 8, 'districts': 60, 'species': 300, 'species_per_district': 80},
+}
+
+# Regression if latency or ingestion throughput is worse than the baseline by
+# more than this share (timings on a shared machine vary by ~30% run to run)...
+DEFAULT_THRESHOLD = 0.5
+# ...and, for latency, by more than this many milliseconds
+DEFAULT_MIN_MS = 5.0
+# Payload sizes are deterministic for a dataset, so they get a tighter bound;
+# SQL statements per request must not grow at all
+DEFAULT_BYTES_THRESHOLD = 0.05
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(Engine, 'before_cursor_execute', self._count)
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def guide_document(species, pages):
+    """A guide of species card pages with no images, so previews render offline"""
+    cards = [{'type': 'species-card', 'position': {'x': (k % 2) * 50, 'y': 15 + (k // 2) * 40},
+              'size': {'width': 50, 'height': 40}, 'content': {'english_name': name}}
+             for k, name in enumerate(species)]
+    return {
+        'settings': {'showScientificNames': True},
+        'pages': [{'elements': [{'type': 'heading', 'position': {'x': 0, 'y': 0},
+                                 'size': {'width': 100, 'height': 10}, 'content': f"Page {number + 1}"}]
+                   + cards[(number * 4) % len(cards):][:4]}
+                  for number in range(pages)]
+    }
+
+
+def seed_pdf_jobs(app, rng, count=200):
+    """Finished jobs with render stats, for the PDF list and stats endpoints (none queued for the dispatcher)"""
+    from models import db, PdfJob
+    from pdf_engine import JOB_COMPLETED, JOB_FAILED
+
+    with app.app_context():
+        PdfJob.__table__.create(bind=db.engine, checkfirst=True)
+        now = datetime.utcnow()
+        jobs = []
+        for k in range(count):
+            status = JOB_FAILED if k % 10 == 0 else JOB_COMPLETED
+            created = now - timedelta(minutes=count - k)
+            stats = {'render_seconds': round(rng.uniform(0.5, 20), 3), 'bytes': rng.randint(200000, 20000000),
+                     'fragment_cache': {'hits': rng.randint(0, 300), 'misses': rng.randint(0, 50)},
+                     'images': {'embedded': rng.randint(0, 80), 'references': rng.randint(80, 300)}}
+            jobs.append(PdfJob(title=f"Benchmark {k}", status=status, request_data='{}', progress=100,
+                               attempts=1, created_at=created, updated_at=created,
+                               finished_at=created + timedelta(seconds=stats['render_seconds']),
+                               stats=json.dumps(stats) if status == JOB_COMPLETED else None))
+        db.session.add_all(jobs)
+        db.session.commit()
+
+
+def endpoint_cases(data, seed):
+    """(name, request function) pairs; each function takes the client and an iteration number"""
+    from response_format import msgpack
+
+    rng = random.Random(seed)
+    frequency = data['frequency']
+    states = sorted({f['state'] for f in frequency})
+    districts = sorted({(f['state'], f['district']) for f in frequency if not f['district'].endswith('(Statewide)')})
+    species = [s['english_name'] for s in data['species']]
+    picked_states = rng.sample(states, min(6, len(states)))
+    picked_districts = rng.sample(districts, min(12, len(districts)))
+    picked_species = rng.sample(species, min(20, len(species)))
+    types = sorted({s['type'] for s in data['species']})
+
+    def get(path_for, headers=None):
+        def request(client, i):
+            return client.get(path_for(i), headers=headers)
+        return request
+
+    def pick(values, i):
+        return values[i % len(values)]
+
+    def grouped(i, **extra):
+        state, district = pick(picked_districts, i)
+        return '/api/birds/grouped?' + urlencode(dict({'state': state, 'district': district}, **extra))
+
+    def ranked(i):
+        regions = [f"{s}/{d}" for s, d in (pick(picked_districts, i + k) for k in range(3))]
+        return '/api/birds/ranked?' + urlencode([('region', r) for r in regions])
+
+    def region_expression(i):
+        (_, a), (_, b), (_, c) = (pick(picked_districts, i + k) for k in range(3))
+        return '/api/birds/regions/query?' + urlencode({'expr': f'("{a}" | "{b}") - "{c}"'})
+
+    def explore(i):
+        state, district = pick(picked_districts, i)
+        return '/api/birds/explore?' + urlencode({'type': pick(types, i), 'region': f"{state}/{district}", 'limit': 50})
+
+    def misspelled(i):
+        name = pick(picked_species, i).lower().replace('-', ' ')
+        position = rng.randrange(1, len(name) - 1)
+        return name[:position] + name[position + 1:]
+
+    guide = {}
+
+    def autosave(client, i):
+        if 'id' not in guide:
+            created = client.post('/api/guides', json={'title': 'Benchmark', 'document': {'pages': [], 'settings': {}}})
+            guide.update(id=created.get_json()['guide_id'], revision=created.get_json()['revision'])
+        response = client.patch(f"/api/guides/{guide['id']}", json={
+            'base_revision': guide['revision'],
+            'patch': [{'op': 'add', 'path': '/settings/zoom', 'value': i}]
+        })
+        if response.status_code == 200:
+            guide['revision'] = response.get_json()['revision']
+        return response
+
+    reading = {}
+
+    def reading_guide(client):
+        """A 12-page guide a few revisions in, with every page preview rendered"""
+        if 'id' not in reading:
+            created = client.post('/api/guides', json={
+                'title': 'Benchmark reading', 'document': guide_document(picked_species, 12)}).get_json()
+            guide_id, revision = created['guide_id'], created['revision']
+            for k in range(3):
+                revision = client.patch(f"/api/guides/{guide_id}", json={
+                    'base_revision': revision,
+                    'patch': [{'op': 'replace', 'path': f'/pages/{k}/elements/0/content', 'value': f"Edited {k}"}]
+                }).get_json()['revision']
+            deadline = time.monotonic() + 120
+            while not client.get(f"/api/guides/{guide_id}/previews").get_json()['complete']:
+                if time.monotonic() > deadline:
+                    raise RuntimeError('Guide previews did not render within 120 s')
+                time.sleep(0.1)
+            reading.update(id=guide_id, revision=revision)
+        return reading
+
+    def guide_get(client, i):
+        return client.get(f"/api/guides/{reading_guide(client)['id']}")
+
+    def guide_since(client, i):
+        guide = reading_guide(client)
+        return client.get(f"/api/guides/{guide['id']}?since={guide['revision'] - 2}")
+
+    def guide_previews(client, i):
+        return client.get(f"/api/guides/{reading_guide(client)['id']}/previews")
+
+    msgpack_cases = [
+        ('grouped_msgpack', get(lambda i: grouped(i), headers={'Accept': 'application/x-msgpack'})),
+        ('species_list_msgpack', get(lambda i: '/api/admin/species', headers={'Accept': 'application/x-msgpack'})),
+    ] if msgpack is not None else []
+
+    return [
+        ('locations', get(lambda i: '/api/birds/locations')),
+        ('grouped_statewide', get(lambda i: '/api/birds/grouped?' + urlencode(
+            {'state': pick(picked_states, i), 'district': 'Statewide'}))),
+        ('grouped_district', get(lambda i: grouped(i))),
+        ('grouped_per_type', get(lambda i: '/api/birds/grouped?' + urlencode(
+            {'state': pick(picked_states, i), 'district': 'Statewide', 'per_type': 5}))),
+        ('grouped_table', get(lambda i: grouped(i, format='table', fields='english_name,names,frequency_rank'))),
+        ('ranked', get(ranked)),
+        ('regions_query', get(region_expression)),
+        ('explore', get(explore)),
+        ('explore_catalogue', get(lambda i: f'/api/birds/explore?limit=50&offset={(i % 5) * 50}')),
+        ('search', get(lambda i: '/api/species/search?' + urlencode({'q': pick(picked_species, i).split()[-1][:4]}))),
+        ('match', get(lambda i: '/api/species/match?' + urlencode({'q': misspelled(i)}))),
+        ('species_list', get(lambda i: '/api/admin/species')),
+        ('species_detail', get(lambda i: '/api/admin/species/' + quote(pick(picked_species, i)))),
+        ('statistics', get(lambda i: '/api/admin/statistics')),
+        ('guide_autosave', autosave),
+        ('guide_get', guide_get),
+        ('guide_since', guide_since),
+        ('guide_previews', guide_previews),
+        ('pdf_jobs', get(lambda i: '/api/pdf/jobs' + ('?status=failed' if i % 2 else ''))),
+        ('pdf_stats', get(lambda i: '/api/pdf/stats')),
+        ('metrics', get(lambda i: '/metrics')),
+    ] + msgpack_cases
+
+
+def run_endpoints(app, cases, repeat, warmup):
+    counter = StatementCounter()
+    client = app.test_client()
+    results = {}
+    for name, request in cases:
+        for i in range(warmup):
+            request(client, i)
+        latencies, statements, sizes, errors = [], [], [], 0
+        for i in range(warmup, warmup + repeat):
+            counter.count = 0
+            started = time.perf_counter()
+            response = request(client, i)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statements.append(counter.count)
+            sizes.append(len(response.get_data()))
+            errors += response.status_code >= 400
+        results[name] = {
+            'requests': repeat,
+            'errors': errors,
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'statements_per_request': round(sum(statements) / repeat, 2),
+            'bytes': round(sum(sizes) / repeat)
+        }
+    return results
+
+
+def run_ingestion(data, workdir):
+    """Rows per second for the bulk load and for each DataIngestion stage"""
+    from app import create_app
+    from models import db
+    from ingest_data_complete import DataIngestion
+
+    rows = sum(len(rows) for rows in data.values())
+    started = time.perf_counter()
+    load_database(data, f"sqlite:///{os.path.join(workdir, 'bulk.db')}")
+    seconds = time.perf_counter() - started
+    stages = {'bulk_load': {'rows': rows, 'seconds': round(seconds, 3), 'rows_per_second': round(rows / seconds, 1)}}
+
+    csv_dir = os.path.join(workdir, 'csv')
+    started = time.perf_counter()
+    write_csvs(data, csv_dir)
+    seconds = time.perf_counter() - started
+    stages['write_csv'] = {'rows': rows, 'seconds': round(seconds, 3), 'rows_per_second': round(rows / seconds, 1)}
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'ingest.db')}"})
+    with app.app_context():
+        db.create_all()
+        ingestion = DataIngestion()
+        with contextlib.redirect_stdout(io.StringIO()):  # it prints a line per row
+            ingestion.ingest_all_data(os.path.join(csv_dir, 'species.csv'),
+                                      os.path.join(csv_dir, 'frequency_birds.csv'),
+                                      os.path.join(csv_dir, 'google_drive_inventory.csv'))
+    for stage in ingestion.stage_stats:
+        stages[f"ingest_{stage['stage']}"] = {k: v for k, v in stage.items() if k != 'stage'}
+    return stages
+
+
+def compare(baseline, current, threshold, min_ms, bytes_threshold):
+    """Human-readable regressions of current against baseline"""
+    regressions = []
+    for name, base in baseline.get('endpoints', {}).items():
+        now = current['endpoints'].get(name)
+        if now is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            if now[metric] > base[metric] * (1 + threshold) and now[metric] - base[metric] > min_ms:
+                regressions.append(f"{name} {metric}: {base[metric]} -> {now[metric]}")
+        if now['statements_per_request'] > base['statements_per_request'] + 0.01:
+            regressions.append(f"{name} statements/request: {base['statements_per_request']} -> "
+                               f"{now['statements_per_request']}")
+        if now['bytes'] > base['bytes'] * (1 + bytes_threshold):
+            regressions.append(f"{name} bytes: {base['bytes']} -> {now['bytes']}")
+        if now['errors'] > base['errors']:
+            regressions.append(f"{name} errors: {base['errors']} -> {now['errors']}")
+    for stage, base in baseline.get('ingestion', {}).items():
+        now = current.get('ingestion', {}).get(stage)
+        if now is None or not base['rows_per_second'] or not now['rows_per_second']:
+            continue
+        if now['rows_per_second'] < base['rows_per_second'] / (1 + threshold):
+            regressions.append(f"{stage} rows/s: {base['rows_per_second']} -> {now['rows_per_second']}")
+    return regressions
+
+
+def print_report(result, baseline=None):
+    base_endpoints = (baseline or {}).get('endpoints', {})
+    print(f"{'endpoint':<20} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'SQL/req':>8} {'bytes':>9} {'err':>4}"
+          + (f" {'p95 vs base':>12}" if baseline else ''))
+    for name, r in result['endpoints'].items():
+        line = (f"{name:<20} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} "
+                f"{r['statements_per_request']:>8} {r['bytes']:>9} {r['errors']:>4}")
+        if name in base_endpoints and base_endpoints[name]['p95_ms']:
+            line += f" {r['p95_ms'] / base_endpoints[name]['p95_ms'] - 1:>+12.0%}"
+        print(line)
+    if result.get('ingestion'):
+        base_stages = (baseline or {}).get('ingestion', {})
+        print(f"\n{'ingestion stage':<22} {'rows':>8} {'seconds':>9} {'rows/s':>10}"
+              + (f" {'vs base':>9}" if baseline else ''))
+        for stage, r in result['ingestion'].items():
+            line = f"{stage:<22} {r['rows']:>8} {r['seconds']:>9} {r['rows_per_second'] or '-':>10}"
+            if stage in base_stages and base_stages[stage]['rows_per_second'] and r['rows_per_second']:
+                line += f" {r['rows_per_second'] / base_stages[stage]['rows_per_second'] - 1:>+9.0%}"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', choices=sorted(SIZES), default='full', help='Synthetic dataset size')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=30, help='Measured requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per endpoint first')
+    parser.add_argument('--endpoint', action='append', help='Only this endpoint case (repeatable)')
+    parser.add_argument('--skip-ingestion', action='store_true')
+    parser.add_argument('--save', help='Write the results to this JSON baseline')
+    parser.add_argument('--compare', help='Compare against this JSON baseline; exit 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Allowed slowdown as a share of the baseline (default 0.5)')
+    parser.add_argument('--min-ms', type=float, default=DEFAULT_MIN_MS,
+                        help='Ignore latency changes smaller than this (default 5 ms)')
+    parser.add_argument('--bytes-threshold', type=float, default=DEFAULT_BYTES_THRESHOLD,
+                        help='Allowed payload growth as a share of the baseline (default 0.05)')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline['dataset'] != dict(SIZES[args.size], seed=args.seed):
+            print(f"Baseline {args.compare} was recorded on a different dataset: {baseline['dataset']}")
+            sys.exit(2)
+        recorded_python = baseline.get('machine', {}).get('python', '')
+        if recorded_python.rsplit('.', 1)[0] != platform.python_version().rsplit('.', 1)[0]:
+            print(f"Warning: baseline {args.compare} was recorded on Python {recorded_python}, this is "
+                  f"{platform.python_version()}; timings across Python versions aren't comparable\n")
+
+    from app import create_app
+
+    dataset = dict(SIZES[args.size], seed=args.seed)
+    data = generate(**dataset)
+    result = {
+        'recorded_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'dataset': dataset,
+        'endpoints': {},
+        'ingestion': {}
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        database_url = f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+        load_database(data, database_url)
+        # Keep rendered previews and PDF output out of the instance folder
+        os.environ['PREVIEW_OUTPUT_DIR'] = os.path.join(workdir, 'previews')
+        os.environ['PDF_OUTPUT_DIR'] = os.path.join(workdir, 'pdf')
+        app = create_app({'SQLALCHEMY_DATABASE_URI': database_url})
+        seed_pdf_jobs(app, random.Random(args.seed))
+        cases = [case for case in endpoint_cases(data, args.seed) if not args.endpoint or case[0] in args.endpoint]
+        result['endpoints'] = run_endpoints(app, cases, args.repeat, args.warmup)
+        if not args.skip_ingestion:
+            result['ingestion'] = run_ingestion(data, workdir)
+        logging.shutdown()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result, baseline)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(result, f, indent=2)
+            f.write('\n')
+        print(f"\nSaved baseline to {args.save}")
+
+    if baseline is not None:
+        regressions = compare(baseline, result, args.threshold, args.min_ms, args.bytes_threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
-from app import app, db, Species, Illustrations, Names, Frequency
+from app import create_app
+from models import db, Species, Illustrations, Names, Frequency, bump_data_version
 
 def create_test_data():
     """Create minimal test data for development"""
@@ -56,6 +57,7 @@ def create_test_data():
         }
     ]
 
+    app = create_app()
     with app.app_context():
         # Clear existing data
         db.session.query(Frequency).delete()
@@ -81,14 +83,14 @@ def create_test_data():
             illustration = Illustrations(
                 image_name=f"{bird['english_name']}.png",
                 image_link=bird['image_link'],
-                species_english_name=bird['english_name'],
+                species=species,
                 is_default=True
             )
             db.session.add(illustration)
 
             # Create name record
             name = Names(
-                species_english_name=bird['english_name'],
+                species=species,
                 language='Mizo',
                 name=bird['mizo_name']
             )
@@ -97,7 +99,7 @@ def create_test_data():
             # Create frequency records for multiple regions
             # Statewide
             frequency = Frequency(
-                english_name=bird['english_name'],
+                species=species,
                 state='Mizoram',
                 district='Statewide',
                 frequency_rank=bird['frequency_rank'],
@@ -108,7 +110,7 @@ def create_test_data():
 
             # Aizawl district
             frequency = Frequency(
-                english_name=bird['english_name'],
+                species=species,
                 state='Mizoram',
                 district='Aizawl',
                 frequency_rank=bird['frequency_rank'],
@@ -119,6 +121,7 @@ def create_test_data():
 
         # Commit all changes
         db.session.commit()
+        bump_data_version()
         print(f"✅ Added {len(test_birds)} test birds to the database")
 
 if __name__ == "__main__":
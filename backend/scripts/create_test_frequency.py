@@ -1,15 +1,17 @@
-from app import app, db, Species, Frequency
+from app import create_app
+from models import db, Species, Frequency
 from datetime import datetime
 
 def create_test_frequency_data():
     """Create frequency data for existing species without frequency data"""
+    app = create_app()
     with app.app_context():
         print("=== Creating Test Frequency Data ===\n")
 
         # Find species without frequency data
         species_without_frequency = db.session.query(Species).outerjoin(
             Frequency,
-            Species.english_name == Frequency.english_name
+            Species.id == Frequency.species_id
         ).filter(Frequency.id == None).all()
         
         if not species_without_frequency:
@@ -23,7 +25,7 @@ def create_test_frequency_data():
         for i, species in enumerate(species_without_frequency):
             # Create frequency for Mizoram statewide
             frequency = Frequency(
-                english_name=species.english_name,
+                species=species,
                 state='Mizoram',
                 district='Statewide',
                 frequency_rank=i + 1000,  # Use high rank to avoid conflicts
@@ -0,0 +1,344 @@
+"""
+Generate a deterministic, all-India-scale synthetic catalogue.
+
+The same seed and sizes always produce the same data. Each district
+observes a subset of the species, with observation counts falling off
+with rank as a Zipf curve, and every state also gets a "(Statewide)" list
+summed over its districts, like the real frequency data. Species have names
+in several languages and up to a few illustrations each.
+
+Write CSVs in the ingestion formats, load straight into a database, or both:
+
+    python scripts/generate_synthetic_data.py --out data/synthetic
+    python scripts/generate_synthetic_data.py --load --database-url sqlite:////tmp/synthetic.db
+
+species.csv, frequency_birds.csv and google_drive_inventory.csv can be fed to
+ingest_data_complete.DataIngestion, which takes only the Mizo names and one
+illustration per species. names.csv and illustrations.csv hold the full sets
+that --load inserts.
+"""
+
+import argparse
+import csv
+import hashlib
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STATES = [
+    'Andhra Pradesh', 'Arunachal Pradesh', 'Assam', 'Bihar', 'Chhattisgarh', 'Goa', 'Gujarat', 'Haryana',
+    'Himachal Pradesh', 'Jharkhand', 'Karnataka', 'Kerala', 'Madhya Pradesh', 'Maharashtra', 'Manipur',
+    'Meghalaya', 'Mizoram', 'Nagaland', 'Odisha', 'Punjab', 'Rajasthan', 'Sikkim', 'Tamil Nadu', 'Telangana',
+    'Tripura', 'Uttar Pradesh', 'Uttarakhand', 'West Bengal', 'Andaman and Nicobar Islands', 'Chandigarh',
+    'Dadra and Nagar Haveli and Daman and Diu', 'Delhi', 'Jammu and Kashmir', 'Ladakh', 'Lakshadweep',
+    'Puducherry'
+]
+
+# Share of species with a name in each language
+LANGUAGES = {
+    'Hindi': 0.9, 'Bengali': 0.6, 'Marathi': 0.5, 'Tamil': 0.5, 'Telugu': 0.5, 'Kannada': 0.4,
+    'Malayalam': 0.4, 'Gujarati': 0.4, 'Assamese': 0.3, 'Odia': 0.3, 'Punjabi': 0.25, 'Mizo': 0.3
+}
+
+# Bird groups by habitat, weighted to give a realistic mix; the species type
+# itself comes from DataIngestion.categorize_bird, as it does on ingestion
+GROUPS = {
+    'Arboreal Birds': ['Warbler', 'Flycatcher', 'Barbet', 'Drongo', 'Sunbird', 'Woodpecker', 'Minivet', 'Leafbird',
+                       'Tit', 'Oriole', 'Cuckoo', 'Parakeet', 'Hornbill', 'Thrush', 'Shrike', 'Fantail'],
+    'Ground Birds': ['Babbler', 'Bulbul', 'Dove', 'Pigeon', 'Lark', 'Pipit', 'Partridge', 'Quail', 'Francolin'],
+    'Water Birds': ['Duck', 'Goose', 'Grebe', 'Cormorant', 'Egret', 'Ibis', 'Waterhen'],
+    'Raptors': ['Eagle', 'Hawk', 'Kite', 'Falcon', 'Harrier', 'Buzzard', 'Owl', 'Vulture'],
+    'Wetland Birds': ['Kingfisher', 'Sandpiper', 'Plover', 'Lapwing', 'Snipe', 'Godwit', 'Crane', 'Teal'],
+}
+GROUP_WEIGHTS = {'Arboreal Birds': 5, 'Ground Birds': 2, 'Water Birds': 1, 'Raptors': 1, 'Wetland Birds': 1}
+
+ADJECTIVES = ['Ashy', 'Black', 'Blue', 'Brown', 'Dusky', 'Golden', 'Great', 'Green', 'Grey', 'Indian', "Jerdon's",
+              'Large', 'Lesser', 'Little', 'Oriental', 'Pale', 'Pied', 'Plain', 'Red', 'Rufous', 'Slaty', 'Small',
+              'Spotted', 'Streaked', "Tickell's", 'White', 'Yellow', 'Himalayan', 'Nilgiri', 'Malabar', 'Sikkim',
+              'Andaman', 'Common', 'Eastern', 'Mountain', 'Jungle', 'Forest', 'Crested']
+COLOURS = ['Black', 'Blue', 'Brown', 'Buff', 'Chestnut', 'Crimson', 'Golden', 'Green', 'Grey', 'Orange', 'Purple',
+           'Red', 'Rufous', 'Rusty', 'Scarlet', 'Slaty', 'Velvet', 'White', 'Yellow', 'Olive']
+FEATURES = ['throated', 'breasted', 'bellied', 'headed', 'winged', 'tailed', 'capped', 'crested', 'backed',
+            'eyed', 'billed', 'rumped', 'vented', 'naped', 'browed']
+SYLLABLES = ['ka', 'ra', 'ma', 'la', 'ta', 'pa', 'ni', 'ri', 'si', 'ti', 'vu', 'ko', 'lo', 'no', 'go', 'chu',
+             'ba', 'da', 'ja', 'ha', 'sa', 'ke', 'le', 'me', 'pe', 'ro', 'zo', 'thi', 'khi', 'dhu']
+DISTRICT_SUFFIXES = ['pur', 'garh', 'abad', 'nagar', 'ganj', 'pet', 'kot', 'wadi', 'halli', 'gaon', '']
+SIZES = ['10-13 cm', '13-16 cm', '16-20 cm', '20-25 cm', '25-30 cm', '30-40 cm', '40-55 cm', '55-80 cm',
+         '80-120 cm']
+SEASONALITY = [('Resident', 6), ('Winter visitor', 2), ('Summer visitor', 1), ('Passage migrant', 1)]
+
+
+def _word(rng, syllables, capitalize=True):
+    word = ''.join(rng.choice(SYLLABLES) for _ in range(syllables))
+    return word.capitalize() if capitalize else word
+
+
+def _drive_link(key):
+    file_id = hashlib.sha1(key.encode('utf-8')).hexdigest()[:33]
+    return f"https://drive.google.com/file/d/{file_id}/view?usp=drivesdk"
+
+
+def _weighted_sample(rng, items, weights, k):
+    """k distinct items, each drawn with probability proportional to its weight (Efraimidis-Spirakis)"""
+    keyed = sorted(((rng.random() ** (1 / w), item) for item, w in zip(items, weights)), reverse=True)
+    return [item for _, item in keyed[:k]]
+
+
+def generate_species(rng, count):
+    from ingest_data_complete import DataIngestion
+
+    categorize = DataIngestion().categorize_bird
+    groups = list(GROUPS)
+    group_weights = [GROUP_WEIGHTS[g] for g in groups]
+    genera = {}
+    species = []
+    seen = set()
+    while len(species) < count:
+        group = rng.choice(GROUPS[rng.choices(groups, group_weights)[0]])
+        if rng.random() < 0.5:
+            english_name = f"{rng.choice(ADJECTIVES)} {group}"
+        else:
+            english_name = f"{rng.choice(COLOURS)}-{rng.choice(FEATURES)} {group}"
+            if rng.random() < 0.2:
+                english_name = f"{rng.choice(ADJECTIVES)} {english_name}"
+        if english_name in seen:
+            continue
+        seen.add(english_name)
+        genus = genera.setdefault(group, _word(rng, 3) + rng.choice(['us', 'a', 'is', 'ops']))
+        scientific_name = f"{genus} {_word(rng, 3, capitalize=False)}{rng.choice(['us', 'a', 'is', 'ii'])}"
+        species.append({
+            'english_name': english_name,
+            'scientific_name': scientific_name,
+            'type': categorize(english_name, scientific_name),
+            'taxa': 'Birds',
+            'size': rng.choice(SIZES),
+            'seasonality': rng.choices([s for s, _ in SEASONALITY], [w for _, w in SEASONALITY])[0],
+        })
+    species.sort(key=lambda s: s['english_name'])
+    return species
+
+
+def generate_names(rng, species):
+    names = []
+    for s in species:
+        for language, share in LANGUAGES.items():
+            if rng.random() < share:
+                names.append({'species_english_name': s['english_name'], 'language': language,
+                              'name': ' '.join(_word(rng, rng.randint(2, 3)) for _ in range(rng.randint(1, 2)))})
+    return names
+
+
+def generate_illustrations(rng, species, max_per_species):
+    illustrations = []
+    for s in species:
+        variants = [('', '', '')]
+        for _ in range(rng.randint(1, max_per_species) - 1):
+            variants.append((rng.choice(['Male', 'Female']), rng.choice(['', 'Breeding', 'Non-breeding']),
+                             rng.choice(['', '', f"{s['scientific_name']} {_word(rng, 2, capitalize=False)}"])))
+        image_names = set()
+        for i, (sex, breeding_status, subspecies) in enumerate(dict.fromkeys(variants)):
+            image_name = ' '.join(p for p in (s['english_name'], sex, breeding_status) if p)
+            if image_name in image_names:
+                image_name = f"{image_name} {i + 1}"
+            image_names.add(image_name)
+            image_name = f"{image_name}.png"
+            illustrations.append({
+                'species_english_name': s['english_name'],
+                'image_name': image_name,
+                'image_link': _drive_link(image_name),
+                'sex': sex,
+                'breeding_status': breeding_status,
+                'subspecies': subspecies,
+                'is_default': i == 0
+            })
+    return illustrations
+
+
+def generate_regions(rng, state_count, district_count):
+    states = STATES[:state_count] + [f"State {_word(rng, 3)}" for _ in range(state_count - len(STATES))]
+    # Every state gets a district; the rest go to states in proportion to a random size
+    sizes = [rng.uniform(0.3, 3) for _ in states]
+    counts = [1] * len(states)
+    for i in rng.choices(range(len(states)), sizes, k=max(0, district_count - len(states))):
+        counts[i] += 1
+    used = set()
+    regions = {}
+    for state, n in zip(states, counts):
+        districts = []
+        while len(districts) < n:
+            name = _word(rng, rng.randint(2, 3)) + rng.choice(DISTRICT_SUFFIXES)
+            if name not in used:
+                used.add(name)
+                districts.append(name)
+        regions[state] = districts
+    return regions
+
+
+def generate_frequency(rng, species, regions, species_per_district, zipf_exponent):
+    """Per-district rows with Zipfian observation counts, plus summed statewide rows"""
+    names = [s['english_name'] for s in species]
+    # How common each species is across the country: a few everywhere, most local
+    commonness = [1 / (r + 1) ** 0.8 for r in range(len(names))]
+    rng.shuffle(commonness)
+    rows = []
+    for state, districts in regions.items():
+        statewide = {}
+        for district in districts:
+            k = min(len(names), max(10, int(rng.gauss(species_per_district, species_per_district / 4))))
+            present = _weighted_sample(rng, names, commonness, k)  # most common first
+            effort = math.exp(rng.gauss(8, 0.8))  # checklists submitted from the district
+            for rank, name in enumerate(present, start=1):
+                count = max(1, round(effort / rank ** zipf_exponent * rng.uniform(0.8, 1.2)))
+                rows.append((state, district, name, count))
+                statewide[name] = statewide.get(name, 0) + count
+        for name, count in statewide.items():
+            rows.append((state, f"{state} (Statewide)", name, count))
+
+    # Rank within each region by observation count
+    rows.sort(key=lambda r: (r[0], r[1], -r[3], r[2]))
+    frequency = []
+    previous = None
+    for state, district, name, count in rows:
+        rank = rank + 1 if (state, district) == previous else 1
+        previous = (state, district)
+        frequency.append({'english_name': name, 'state': state, 'district': district,
+                          'frequency_rank': rank, 'observation_count': count})
+    return frequency
+
+
+def generate(seed=42, states=36, districts=750, species=1300, species_per_district=300,
+             zipf_exponent=1.1, max_illustrations=3):
+    """The whole dataset as lists of row dicts keyed by model column"""
+    rng = random.Random(seed)
+    species_rows = generate_species(rng, species)
+    seasonality = {s['english_name']: s.pop('seasonality') for s in species_rows}
+    frequency = generate_frequency(rng, species_rows, generate_regions(rng, states, districts),
+                                   species_per_district, zipf_exponent)
+    for row in frequency:
+        row['seasonality'] = seasonality[row['english_name']]
+    return {
+        'species': species_rows,
+        'names': generate_names(rng, species_rows),
+        'illustrations': generate_illustrations(rng, species_rows, max_illustrations),
+        'frequency': frequency
+    }
+
+
+def _write_csv(path, header, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def write_csvs(data, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    default_image = {i['species_english_name']: i for i in data['illustrations'] if i['is_default']}
+    mizo = {n['species_english_name']: n['name'] for n in data['names'] if n['language'] == 'Mizo'}
+    scientific = {s['english_name']: s['scientific_name'] for s in data['species']}
+
+    _write_csv(os.path.join(out_dir, 'species.csv'),
+               ['English Name', 'Scientific Name', 'Image File Name', 'Mizo Name', 'Image Link', 'Category', 'Size'],
+               [(s['english_name'], s['scientific_name'], default_image[s['english_name']]['image_name'],
+                 mizo.get(s['english_name'], ''), default_image[s['english_name']]['image_link'], s['type'], s['size'])
+                for s in data['species']])
+    _write_csv(os.path.join(out_dir, 'frequency_birds.csv'),
+               ['State', 'District', 'English Name', 'Scientific Name', 'Observation Count', 'Frequency Rank',
+                'Seasonality'],
+               [(f['state'], f['district'], f['english_name'], scientific[f['english_name']], f['observation_count'],
+                 f['frequency_rank'], f['seasonality']) for f in data['frequency']])
+    _write_csv(os.path.join(out_dir, 'google_drive_inventory.csv'), ['FileName', 'ShareableLink'],
+               [(i['image_name'], i['image_link']) for i in data['illustrations']])
+    _write_csv(os.path.join(out_dir, 'names.csv'), ['English Name', 'Language', 'Name'],
+               [(n['species_english_name'], n['language'], n['name']) for n in data['names']])
+    _write_csv(os.path.join(out_dir, 'illustrations.csv'),
+               ['English Name', 'Image File Name', 'Image Link', 'Sex', 'Breeding Status', 'Subspecies', 'Default'],
+               [(i['species_english_name'], i['image_name'], i['image_link'], i['sex'], i['breeding_status'],
+                 i['subspecies'], int(i['is_default'])) for i in data['illustrations']])
+
+
+def load_database(data, database_url=None, replace=False, batch_size=5000):
+    """Bulk insert the dataset, replacing the catalogue tables' rows; returns False if they weren't empty"""
+    from app import create_app
+    from models import db, Species, Illustrations, Names, Frequency, bump_data_version, species_ids
+    from utils import convert_google_drive_link
+
+    def insert(model, rows):
+        for start in range(0, len(rows), batch_size):
+            db.session.execute(model.__table__.insert(), rows[start:start + batch_size])
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_url} if database_url else None)
+    with app.app_context():
+        db.create_all()
+        if Species.query.first() is not None:
+            if not replace:
+                return False
+            for model in (Frequency, Names, Illustrations, Species):
+                db.session.query(model).delete()
+
+        insert(Species, data['species'])
+        # The generated rows name their species; the tables reference it by id
+        ids = species_ids()
+        insert(Illustrations, [
+            {**{k: v for k, v in i.items() if k != 'species_english_name'},
+             'species_id': ids[i['species_english_name']],
+             'image_link': convert_google_drive_link(i['image_link'])}
+            for i in data['illustrations']
+        ])
+        insert(Names, [
+            {'species_id': ids[n['species_english_name']], 'language': n['language'], 'name': n['name']}
+            for n in data['names']
+        ])
+        insert(Frequency, [
+            {**{k: v for k, v in f.items() if k != 'english_name'}, 'species_id': ids[f['english_name']]}
+            for f in data['frequency']
+        ])
+        db.session.commit()
+        bump_data_version()
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--states', type=int, default=36)
+    parser.add_argument('--districts', type=int, default=750, help='Districts across all states')
+    parser.add_argument('--species', type=int, default=1300)
+    parser.add_argument('--species-per-district', type=int, default=300, help='Mean species observed per district')
+    parser.add_argument('--zipf', type=float, default=1.1, help='Exponent of the observation count falloff')
+    parser.add_argument('--max-illustrations', type=int, default=3, help='Illustrations per species, at most')
+    parser.add_argument('--out', help='Directory to write the CSVs to')
+    parser.add_argument('--load', action='store_true', help='Insert into the database')
+    parser.add_argument('--database-url', help='Database to load (default: DATABASE_URL)')
+    parser.add_argument('--replace', action='store_true', help='Delete existing catalogue rows before loading')
+    args = parser.parse_args()
+    if not args.out and not args.load:
+        parser.error('nothing to do: pass --out and/or --load')
+
+    started = time.perf_counter()
+    data = generate(args.seed, args.states, args.districts, args.species, args.species_per_district,
+                    args.zipf, args.max_illustrations)
+    regions = {(f['state'], f['district']) for f in data['frequency']}
+    print(f"Generated {len(data['species'])} species, {len(data['names'])} names, "
+          f"{len(data['illustrations'])} illustrations and {len(data['frequency'])} frequency rows "
+          f"in {len(regions)} regions ({time.perf_counter() - started:.1f}s)")
+
+    if args.out:
+        started = time.perf_counter()
+        write_csvs(data, args.out)
+        print(f"Wrote CSVs to {args.out} ({time.perf_counter() - started:.1f}s)")
+
+    if args.load:
+        started = time.perf_counter()
+        if not load_database(data, args.database_url, args.replace):
+            print("The database already has species; pass --replace to overwrite the catalogue")
+            sys.exit(1)
+        print(f"Loaded into the database ({time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
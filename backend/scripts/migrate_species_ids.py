@@ -0,0 +1,124 @@
+"""
+Move an existing database to integer species ids.
+
+Species used to be keyed by english_name, with illustrations, names and
+frequency referring to them by name. This rebuilds those four tables with an
+integer species.id and species_id foreign keys, keeping every row, in one
+transaction. It also renames the pdf_jobs status index from the
+ix_pdf_jobs_status that older models created to idx_pdf_jobs_status, as in
+database/schema.sql. Stop the app first, then run from the backend directory:
+
+    python scripts/migrate_species_ids.py
+    python scripts/migrate_species_ids.py --database-url sqlite:////tmp/other.db
+
+Databases that are already migrated are left alone.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import MetaData, inspect, text
+
+# Legacy column naming the species, per child table
+LEGACY_NAME_COLUMNS = {'illustrations': 'species_english_name', 'names': 'species_english_name',
+                       'frequency': 'english_name'}
+
+
+def migrate(database_url=None, batch_size=5000):
+    """Rebuild the catalogue tables with integer species ids; returns False if there was nothing to do"""
+    from app import create_app
+    from models import bump_data_version
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_url} if database_url else None)
+    with app.app_context():
+        migrated = _migrate_species(batch_size)
+        _rename_pdf_job_index()
+        if migrated:
+            bump_data_version()
+    return migrated
+
+
+def _migrate_species(batch_size):
+    from models import db, Species, Illustrations, Names, Frequency
+
+    inspector = inspect(db.engine)
+    if 'species' not in inspector.get_table_names():
+        print("No species table; nothing to migrate")
+        return False
+    if 'id' in {column['name'] for column in inspector.get_columns('species')}:
+        print("Species already have integer ids; nothing to migrate")
+        return False
+
+    tables = ['species'] + [t for t in LEGACY_NAME_COLUMNS if inspector.has_table(t)]
+    legacy = MetaData()
+    legacy.reflect(bind=db.engine, only=tables)
+    new_tables = [Species.__table__, Illustrations.__table__, Names.__table__, Frequency.__table__]
+
+    with db.engine.begin() as connection:
+        rows = {name: [dict(row._mapping) for row in connection.execute(legacy.tables[name].select())]
+                for name in tables}
+        legacy.drop_all(connection)
+        db.metadata.create_all(connection, tables=new_tables)
+
+        # Keep the old row order: unordered listings such as /api/admin/species follow it
+        species = rows['species']
+        for start in range(0, len(species), batch_size):
+            connection.execute(Species.__table__.insert(), species[start:start + batch_size])
+        ids = dict(connection.execute(db.select(Species.english_name, Species.id)).all())
+
+        for table in (Illustrations.__table__, Names.__table__, Frequency.__table__):
+            name_column = LEGACY_NAME_COLUMNS[table.name]
+            children = [
+                dict({k: v for k, v in row.items() if k != name_column and k in table.c},
+                     species_id=ids.get(row[name_column]))
+                for row in rows.get(table.name, [])
+            ]
+            orphans = sum(1 for row in children if row['species_id'] is None)
+            if orphans:
+                print(f"Warning: {orphans} {table.name} rows name no known species; kept with no species")
+            for start in range(0, len(children), batch_size):
+                connection.execute(table.insert(), children[start:start + batch_size])
+            print(f"Migrated {len(children)} {table.name} rows")
+
+        # Copied rows keep their ids, which on PostgreSQL leaves the SERIAL sequences behind
+        if connection.dialect.name == 'postgresql':
+            for table in new_tables:
+                connection.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                    f"COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM {table.name}"
+                ))
+
+    print(f"Migrated {len(species)} species to integer ids")
+    return True
+
+
+def _rename_pdf_job_index():
+    """Rename ix_pdf_jobs_status (from index=True) to idx_pdf_jobs_status, as in schema.sql"""
+    from models import db, PdfJob
+
+    inspector = inspect(db.engine)
+    if not inspector.has_table('pdf_jobs'):
+        return
+    indexes = {index['name'] for index in inspector.get_indexes('pdf_jobs')}
+    if 'ix_pdf_jobs_status' not in indexes:
+        return
+    with db.engine.begin() as connection:
+        connection.execute(text('DROP INDEX ix_pdf_jobs_status'))
+        for index in PdfJob.__table__.indexes:
+            if index.name not in indexes:
+                index.create(connection)
+    print("Renamed index ix_pdf_jobs_status to idx_pdf_jobs_status")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-url', help='Database to migrate (default: DATABASE_URL or the app default)')
+    args = parser.parse_args()
+    migrate(args.database_url)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+In-memory species search over English, scientific and local names.
+
+The index is a prefix trie over normalized name tokens. Every trie node keeps
+the set of species reachable below it, so a prefix lookup is a walk of
+len(prefix) steps and never scans the catalogue. It is rebuilt whenever the
+data version changes, i.e. after each ingestion.
+"""
+
+import logging
+import re
+import threading
+
+from fuzzy_index import TrigramIndex
+from utils import normalize_name
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+", re.UNICODE)
+
+# Lower is better; English names outrank local names, which outrank Latin ones
+FIELD_WEIGHTS = {'english': 0, 'local': 1, 'scientific': 2}
+MATCH_EXACT = 0
+MATCH_NAME_PREFIX = 10
+MATCH_WORD_PREFIX = 20
+
+
+def tokenize(text):
+    """Split a name into words, treating hyphens and punctuation as breaks"""
+    return TOKEN_PATTERN.findall(normalize_name(text))
+
+
+def _name_entry(field, language, name):
+    return (field, language, name, normalize_name(name), tokenize(name))
+
+
+class _TrieNode:
+    __slots__ = ('children', 'species')
+
+    def __init__(self):
+        self.children = {}
+        self.species = set()
+
+
+class SpeciesSearchIndex:
+    """
+    Prefix search across every name of every species.
+
+    ``load_rows`` is called with no arguments on rebuild and must return
+    ``(species, names, regions)``: species dicts, ``(english_name, language,
+    name)`` tuples and ``(english_name, state, district)`` tuples.
+    """
+
+    def __init__(self, load_rows):
+        self.load_rows = load_rows
+        self.version = None
+        self._lock = threading.Lock()
+        # Swapped as one tuple so searches never see half a rebuild
+        self._data = (_TrieNode(), [], [], {}, TrigramIndex())
+
+    def ensure_current(self, data_version):
+        """Rebuild the index if the catalogue changed since it was built"""
+        if self.version == data_version:
+            return
+        with self._lock:
+            if self.version == data_version:
+                return
+            self._build(*self.load_rows())
+            self.version = data_version
+
+    def _build(self, species_rows, name_rows, region_rows):
+        root = _TrieNode()
+        species = []
+        names = []
+        positions = {}
+
+        for row in species_rows:
+            positions[row['english_name']] = len(species)
+            species.append(dict(row, names={'English': row['english_name']}))
+            entries = [_name_entry('english', 'English', row['english_name'])]
+            # Ingestion stores 'Unknown' for missing scientific names
+            if row.get('scientific_name') and row['scientific_name'] != 'Unknown':
+                entries.append(_name_entry('scientific', None, row['scientific_name']))
+            names.append(entries)
+
+        for english_name, language, name in name_rows:
+            position = positions.get(english_name)
+            if position is None or not name:
+                continue
+            species[position]['names'][language] = name
+            names[position].append(_name_entry('local', language, name))
+
+        for position, entries in enumerate(names):
+            for entry in entries:
+                for token in entry[4]:
+                    node = root
+                    node.species.add(position)
+                    for char in token:
+                        node = node.children.setdefault(char, _TrieNode())
+                        node.species.add(position)
+
+        fuzzy = TrigramIndex()
+        for position, entries in enumerate(names):
+            for entry in entries:
+                fuzzy.add(entry[2], position)
+
+        regions = {}
+        for english_name, state, district in region_rows:
+            position = positions.get(english_name)
+            if position is None:
+                continue
+            regions.setdefault((state, district), set()).add(position)
+
+        self._data = (root, species, names, regions, fuzzy)
+        logger.info(f"Built species search index: {len(species)} species, "
+                    f"{sum(len(n) for n in names)} names, {len(regions)} regions")
+
+    @staticmethod
+    def _prefix(root, token):
+        node = root
+        for char in token:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+        return node.species
+
+    def region_species(self, state, district=None):
+        """Species positions recorded for a region ('Statewide' or None = whole state)"""
+        regions = self._data[3]
+        if district and district != 'Statewide':
+            return regions.get((state, district), set())
+        found = set()
+        for (region_state, region_district), positions in regions.items():
+            if region_state == state and region_district and 'Statewide' in region_district:
+                found |= positions
+        return found
+
+    @staticmethod
+    def _score(entries, query, tokens):
+        """Best (score, length, field, language, name) over a species' names"""
+        best = None
+        for field, language, name, normalized, name_tokens in entries:
+            if not all(any(t.startswith(q) for t in name_tokens) for q in tokens):
+                continue
+            if normalized == query:
+                match = MATCH_EXACT
+            elif normalized.startswith(query) or ' '.join(name_tokens).startswith(' '.join(tokens)):
+                match = MATCH_NAME_PREFIX
+            else:
+                match = MATCH_WORD_PREFIX
+            candidate = (match + FIELD_WEIGHTS[field], len(name), field, language, name)
+            if best is None or candidate < best:
+                best = candidate
+        return best
+
+    def search(self, query, limit=20, state=None, district=None):
+        """
+        Ranked species matching every word of ``query`` as a prefix.
+
+        A species matches if all query words prefix-match words of one of its
+        names, or are spread across its names. Returns (total, results).
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return 0, []
+
+        root, species, names, _, _ = self._data
+        candidates = None
+        for token in sorted(tokens, key=len, reverse=True):
+            matched = self._prefix(root, token)
+            candidates = set(matched) if candidates is None else candidates & matched
+            if not candidates:
+                return 0, []
+        if state:
+            candidates &= self.region_species(state, district)
+
+        normalized_query = normalize_name(query).strip()
+        ranked = []
+        for position in candidates:
+            best = self._score(names[position], normalized_query, tokens)
+            if best is None:
+                # Words matched different names; rank below single-name matches
+                best = (MATCH_WORD_PREFIX + len(FIELD_WEIGHTS), 0, 'mixed', None, None)
+            ranked.append((best, species[position]['english_name'], position))
+        ranked.sort()
+
+        results = []
+        for (score, _, field, language, name), _, position in ranked[:limit]:
+            result = dict(species[position])
+            result['score'] = score
+            result['matched'] = {'field': field, 'language': language, 'name': name}
+            results.append(result)
+        return len(ranked), results
+
+    def match(self, query, limit=5, min_score=0.3, state=None, district=None):
+        """
+        Typo-tolerant lookup, for names typed phonetically or with different
+        hyphenation. Returns (score, matched name, species) tuples, best first.
+        """
+        _, species, names, _, fuzzy = self._data
+        allowed = self.region_species(state, district) if state else None
+        # Over-fetch when filtering so the region still gets ``limit`` results
+        matches = fuzzy.search(query, limit=limit if allowed is None else len(species), min_score=min_score)
+
+        results = []
+        for score, name, position in matches:
+            if allowed is not None and position not in allowed:
+                continue
+            language = next(entry[1] for entry in names[position] if entry[2] == name)
+            results.append((score, {'name': name, 'language': language}, species[position]))
+            if len(results) == limit:
+                break
+        return results
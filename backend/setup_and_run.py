@@ -4,7 +4,10 @@ import os
 os.environ['DATABASE_URL'] = 'sqlite:///pocketguide.db'
 
 # Now import app after setting environment variables
-from app import app, db
+from app import create_app
+from models import db
+
+app = create_app()
 
 # Set up the database
 with app.app_context():
@@ -15,6 +15,7 @@ print("="*80)
 # Get 10 complete bird records with all related data
 cursor.execute("""
     SELECT 
+        s.id,
         s.english_name,
         s.scientific_name,
         s.type,
@@ -27,7 +28,7 @@ cursor.execute("""
 birds = cursor.fetchall()
 
 for i, bird in enumerate(birds, 1):
-    english_name, scientific_name, bird_type, taxa, size = bird
+    species_id, english_name, scientific_name, bird_type, taxa, size = bird
     
     print(f"\n{'='*80}")
     print(f"🐦 BIRD #{i}: {english_name}")
@@ -38,7 +39,7 @@ for i, bird in enumerate(birds, 1):
     print(f"   Size: {size if size else 'Not specified'}")
     
     # Get local names
-    cursor.execute("SELECT language, name FROM names WHERE species_english_name=?", (english_name,))
+    cursor.execute("SELECT language, name FROM names WHERE species_id=?", (species_id,))
     local_names = cursor.fetchall()
     if local_names:
         print(f"\n   🌐 Local Names:")
@@ -46,7 +47,7 @@ for i, bird in enumerate(birds, 1):
             print(f"      • {lang}: {name}")
     
     # Get images
-    cursor.execute("SELECT image_name, image_link, sex, breeding_status FROM illustrations WHERE species_english_name=?", (english_name,))
+    cursor.execute("SELECT image_name, image_link, sex, breeding_status FROM illustrations WHERE species_id=?", (species_id,))
     images = cursor.fetchall()
     if images:
         print(f"\n   📸 Images: {len(images)} available")
@@ -59,7 +60,7 @@ for i, bird in enumerate(birds, 1):
                 print(f"        Breeding Status: {breeding}")
     
     # Get frequency data
-    cursor.execute("SELECT state, district, frequency_rank, observation_count FROM frequency WHERE english_name=?", (english_name,))
+    cursor.execute("SELECT state, district, frequency_rank, observation_count FROM frequency WHERE species_id=?", (species_id,))
     freq_data = cursor.fetchall()
     if freq_data:
         print(f"\n   📊 Frequency Data:")
@@ -94,9 +95,9 @@ print(f"   • {total_freq} frequency records")
 # Top 10 most frequently observed birds
 print(f"\n🏆 TOP 10 MOST OBSERVED BIRDS:")
 cursor.execute("""
-    SELECT f.english_name, f.observation_count, s.type
+    SELECT s.english_name, f.observation_count, s.type
     FROM frequency f
-    JOIN species s ON f.english_name = s.english_name
+    JOIN species s ON f.species_id = s.id
     ORDER BY f.observation_count DESC
     LIMIT 10
 """)
@@ -137,10 +137,10 @@ def check_sqlite_database():
                 SELECT 
                     COUNT(DISTINCT s.english_name) as species_count,
                     COUNT(DISTINCT i.image_name) as image_count,
-                    COUNT(DISTINCT f.english_name) as freq_species_count
+                    COUNT(DISTINCT f.species_id) as freq_species_count
                 FROM species s
                 LEFT JOIN illustrations i ON s.english_name = i.image_name
-                LEFT JOIN frequency f ON s.english_name = f.english_name
+                LEFT JOIN frequency f ON s.id = f.species_id
             """)
             completeness = cursor.fetchone()
             if completeness:
@@ -11,7 +11,7 @@ from flask_cors import CORS
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app import db, Species, Illustrations, Names, Frequency
+from models import db, Species, Illustrations, Names, Frequency
 
 # Create a simple Flask app
 simple_app = Flask(__name__)
@@ -70,10 +70,10 @@ def get_grouped_birds():
             Illustrations.breeding_status,
             Illustrations.subspecies
         ).join(
-            Species, Frequency.english_name == Species.english_name
+            Species, Frequency.species_id == Species.id
         ).outerjoin(
             Illustrations,
-            (Species.english_name == Illustrations.species_english_name) &
+            (Species.id == Illustrations.species_id) &
             (Illustrations.is_default == True)
         ).filter(
             Frequency.state == state
@@ -91,7 +91,7 @@ def get_grouped_birds():
         
         for result in results:
             # Get local names
-            names_query = Names.query.filter_by(species_english_name=result.english_name).all()
+            names_query = Names.query.join(Names.species).filter(Species.english_name == result.english_name).all()
             names_dict = {'English': result.english_name}
             for name in names_query:
                 names_dict[name.language] = name.name
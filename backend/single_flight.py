@@ -0,0 +1,139 @@
+"""
+Single-flight request coalescing.
+
+Concurrent calls with the same key share one computation: the first caller
+(the leader) runs it and every caller that arrives while it is running
+waits for and receives the same result, or the same exception. Within a
+process nothing is kept once the flight lands: a later call computes afresh.
+
+With ``lock_dir`` set, flights are also shared between worker processes on
+one host: the leader of each process takes an exclusive lock file for the
+key, and the process that gets it first writes its result next to the lock.
+The others, having blocked on the lock, read that result instead of
+recomputing. That result file is a short-lived cache: any call with the same
+key in the next ``result_ttl`` seconds gets it, even one that arrives after
+the flight has landed, and nothing else invalidates it. Keys must therefore
+include the data version, so a data change is never answered from an older
+result. Expired result files are deleted when next read. Lock files need
+fcntl, so this is skipped on Windows.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: coalesce within a process only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls by key; values must be JSON-serializable when lock_dir is set"""
+
+    def __init__(self, lock_dir=None, timeout=30, result_ttl=5):
+        self.lock_dir = lock_dir if lock_dir and fcntl is not None else None
+        self.timeout = timeout
+        self.result_ttl = result_ttl
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+        self.shared_results = 0
+        if lock_dir and fcntl is None:
+            logger.warning("fcntl is unavailable; coalescing requests within each process only")
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def do(self, key, compute):
+        """Return ``compute()``, or the result of an identical call already in flight"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not leader:
+            if not flight.done.wait(self.timeout):
+                logger.warning(f"Coalesced call {key!r} still running after {self.timeout}s; computing separately")
+                return compute()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = self._compute_shared(key, compute) if self.lock_dir else compute()
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _compute_shared(self, key, compute):
+        path = os.path.join(self.lock_dir, hashlib.sha1(repr(key).encode('utf-8')).hexdigest())
+        with open(f"{path}.lock", 'a') as lock_file:
+            # Blocks while another worker computes the same key
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                found, value = self._read_result(f"{path}.json", key)
+                if found:
+                    with self._lock:
+                        self.shared_results += 1
+                    return value
+                value = compute()
+                self._write_result(f"{path}.json", key, value)
+                return value
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_result(self, path, key):
+        try:
+            if time.time() - os.path.getmtime(path) > self.result_ttl:
+                os.remove(path)
+                return False, None
+            with open(path) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return False, None
+        if stored.get('key') != repr(key):
+            return False, None
+        return True, stored['value']
+
+    def _write_result(self, path, key, value):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({'key': repr(key), 'value': value}, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not share coalesced result for {key!r}: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._flights),
+                'leaders': self.leaders,
+                'followers': self.followers,
+                'shared_results': self.shared_results,
+                'cross_process': bool(self.lock_dir)
+            }
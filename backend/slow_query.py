@@ -0,0 +1,181 @@
+"""
+Slow-query log with EXPLAIN capture.
+
+Every SQL statement slower than the threshold is logged with its bound
+parameters and the route that ran it, and aggregated by statement shape
+(the SQL with literals and IN-list lengths normalized away). The first
+time a shape is seen, its plan is captured with ``EXPLAIN QUERY PLAN``
+(SQLite) or ``EXPLAIN`` (PostgreSQL) on the same connection and kept with
+the aggregate, so the admin report shows what each slow shape does without
+re-running anything later.
+
+Only SELECT/WITH statements are explained, and never with ANALYZE, so the
+capture never repeats a write or a statement's work.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_PREFIX = {'sqlite': 'EXPLAIN QUERY PLAN ', 'postgresql': 'EXPLAIN '}
+PARAMS_PREVIEW = 500
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement):
+    """SQL with literals, IN-list lengths and whitespace normalized"""
+    shape = _STRING.sub('?', statement)
+    shape = _NUMBER.sub('?', shape)
+    shape = _PLACEHOLDER_LIST.sub('(?...)', shape)
+    return _SPACE.sub(' ', shape).strip()
+
+
+def _caller():
+    if has_request_context():
+        rule = request.url_rule.rule if request.url_rule else request.path
+        return f"{request.method} {rule}"
+    return f"thread {threading.current_thread().name}"
+
+
+def _preview(parameters):
+    text = repr(parameters)
+    return text if len(text) <= PARAMS_PREVIEW else text[:PARAMS_PREVIEW] + '...'
+
+
+class SlowQueryLog:
+    """
+    Records statements slower than ``threshold_ms`` on ``engines``.
+
+    Pass the app's own engines so each app logs (and explains) only its own
+    statements; ``close()`` detaches from them. ``max_shapes`` bounds the
+    aggregate; the least recently seen shape is dropped first.
+    """
+
+    def __init__(self, engines, threshold_ms=200, explain=True, max_shapes=200):
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self.max_shapes = max_shapes
+        self.since = datetime.utcnow()
+        self._shapes = OrderedDict()
+        self._lock = threading.Lock()
+        self._engines = list(engines)
+        for engine in self._engines:
+            event.listen(engine, 'before_cursor_execute', self._before_execute)
+            event.listen(engine, 'after_cursor_execute', self._after_execute)
+
+    def close(self):
+        """Stop watching the engines"""
+        for engine in self._engines:
+            event.remove(engine, 'before_cursor_execute', self._before_execute)
+            event.remove(engine, 'after_cursor_execute', self._after_execute)
+        self._engines = []
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_started', []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('slow_query_started')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if elapsed < self.threshold:
+            return
+        try:
+            self._record(conn, statement, parameters, executemany, elapsed)
+        except Exception as e:  # never fail the query over its bookkeeping
+            logger.error(f"Could not record slow query: {str(e)}")
+
+    def _record(self, conn, statement, parameters, executemany, elapsed):
+        shape = statement_shape(statement)
+        fingerprint = hashlib.sha1(shape.encode('utf-8')).hexdigest()[:12]
+        caller = _caller()
+        logger.warning(f"Slow query {elapsed * 1000:.1f} ms [{fingerprint}] from {caller}: "
+                       f"{_SPACE.sub(' ', statement).strip()} params={_preview(parameters)}")
+
+        with self._lock:
+            entry = self._shapes.get(fingerprint)
+            new_shape = entry is None
+            if new_shape:
+                entry = self._shapes[fingerprint] = {
+                    'fingerprint': fingerprint,
+                    'statement': shape,
+                    'dialect': conn.dialect.name,
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'callers': Counter(),
+                    'first_seen': datetime.utcnow().isoformat(),
+                    'plan': None
+                }
+                while len(self._shapes) > self.max_shapes:
+                    self._shapes.popitem(last=False)
+            self._shapes.move_to_end(fingerprint)
+            entry['count'] += 1
+            entry['total_ms'] += elapsed * 1000
+            entry['max_ms'] = max(entry['max_ms'], elapsed * 1000)
+            entry['callers'][caller] += 1
+            entry['last_seen'] = datetime.utcnow().isoformat()
+            entry['last_params'] = _preview(parameters)
+
+        if new_shape and self.explain and not executemany:
+            plan = self._explain(conn, statement, parameters)
+            with self._lock:
+                entry['plan'] = plan
+
+    def _explain(self, conn, statement, parameters):
+        prefix = EXPLAIN_PREFIX.get(conn.dialect.name)
+        if prefix is None:
+            return None
+        if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return None
+        # The raw DBAPI cursor skips SQLAlchemy's events, so this isn't timed or logged itself
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        except Exception as e:
+            return [f"EXPLAIN failed: {e}"]
+        finally:
+            cursor.close()
+        if conn.dialect.name == 'sqlite':
+            # (id, parent, notused, detail): indent each step under its parent
+            depth = {0: -1}
+            lines = []
+            for row in rows:
+                depth[row[0]] = depth.get(row[1], -1) + 1
+                lines.append('  ' * depth[row[0]] + str(row[-1]))
+            return lines
+        return [str(row[0]) for row in rows]
+
+    def report(self, sort='total_ms', limit=50):
+        """Aggregated slow shapes, worst first by ``sort`` (total_ms, max_ms or count)"""
+        with self._lock:
+            entries = [dict(entry, callers=dict(entry['callers'].most_common()),
+                            total_ms=round(entry['total_ms'], 1), max_ms=round(entry['max_ms'], 1),
+                            mean_ms=round(entry['total_ms'] / entry['count'], 1))
+                       for entry in self._shapes.values()]
+        entries.sort(key=lambda entry: entry[sort], reverse=True)
+        return {
+            'threshold_ms': round(self.threshold * 1000, 3),
+            'since': self.since.isoformat(),
+            'shapes': len(entries),
+            'queries': entries[:limit]
+        }
+
+    def reset(self):
+        with self._lock:
+            self._shapes.clear()
+            self.since = datetime.utcnow()
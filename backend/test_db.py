@@ -1,7 +1,9 @@
 import os
-from app import app, db, Species, Frequency, Illustrations
+from app import create_app
+from models import Species, Frequency, Illustrations
 
 def test_database():
+    app = create_app()
     with app.app_context():
         # Check if tables exist and have data
         species_count = Species.query.count()
@@ -22,7 +24,7 @@ def test_database():
         mizoram_freq = Frequency.query.filter_by(state='Mizoram').limit(5).all()
         print(f"\nMizoram frequency records: {len(mizoram_freq)}")
         for freq in mizoram_freq:
-            print(f"- {freq.english_name} in {freq.district} (Rank: {freq.frequency_rank})")
+            print(f"- {freq.species.english_name} in {freq.district} (Rank: {freq.frequency_rank})")
 
 if __name__ == "__main__":
     test_database()
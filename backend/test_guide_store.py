@@ -0,0 +1,129 @@
+"""
+Check guide autosave through the API: patches, revision conflicts,
+compaction into snapshots and since= replay.
+
+    python -m pytest test_guide_store.py
+"""
+
+import os
+import tempfile
+
+import pytest
+
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('LOG_FILE', '')
+
+from app import create_app
+from models import db, GuidePatch, GuideSnapshot
+
+
+@pytest.fixture
+def app():
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, 'guides.db')}"})
+        store = app.extensions['pocketguide']['guide_store']
+        store.snapshot_interval = 3
+        store.snapshots_kept = 2
+        yield app
+        with app.app_context():
+            db.engine.dispose()
+
+
+def _create(client, document=None):
+    response = client.post('/api/guides', json={'title': 'Walk', 'document': document or {'pages': []}})
+    assert response.status_code == 201
+    return response.get_json()['guide_id']
+
+
+def _save(client, guide_id, base_revision, patch):
+    return client.patch(f"/api/guides/{guide_id}", json={'base_revision': base_revision, 'patch': patch})
+
+
+def _add_page(number):
+    return [{'op': 'add', 'path': '/pages/-', 'value': {'number': number}}]
+
+
+def test_patches_advance_the_revision(app):
+    client = app.test_client()
+    guide_id = _create(client)
+
+    saved = _save(client, guide_id, 0, _add_page(1))
+    assert saved.status_code == 200
+    assert saved.get_json()['revision'] == 1
+    retitled = _save(client, guide_id, 1, [{'op': 'add', 'path': '/title', 'value': 'Renamed'}])
+    assert retitled.get_json()['revision'] == 2
+
+    guide = client.get(f"/api/guides/{guide_id}").get_json()
+    assert guide['revision'] == 2
+    assert guide['title'] == 'Renamed'
+    assert guide['document'] == {'pages': [{'number': 1}], 'title': 'Renamed'}
+
+
+def test_invalid_patch_is_rejected_without_a_new_revision(app):
+    client = app.test_client()
+    guide_id = _create(client)
+
+    assert _save(client, guide_id, 0, [{'op': 'remove', 'path': '/missing'}]).status_code == 400
+    assert _save(client, guide_id, 0, [{'op': 'test', 'path': '/pages', 'value': {}}]).status_code == 400
+    assert client.patch(f"/api/guides/{guide_id}", json={'patch': []}).status_code == 400
+    assert client.get(f"/api/guides/{guide_id}").get_json()['revision'] == 0
+
+
+def test_stale_base_revision_conflicts_with_catch_up_patches(app):
+    client = app.test_client()
+    guide_id = _create(client)
+    _save(client, guide_id, 0, _add_page(1))
+    _save(client, guide_id, 1, _add_page(2))
+
+    stale = _save(client, guide_id, 0, _add_page(3))
+    assert stale.status_code == 409
+    body = stale.get_json()
+    assert body['current_revision'] == 2
+    assert [patch['revision'] for patch in body['patches']] == [1, 2]
+    assert body['patches'][1]['patch'] == _add_page(2)
+
+    replaced = client.put(f"/api/guides/{guide_id}", json={'base_revision': 1, 'document': {}})
+    assert replaced.status_code == 409
+    assert replaced.get_json()['current_revision'] == 2
+
+
+def test_compaction_snapshots_and_prunes_patches(app):
+    client = app.test_client()
+    guide_id = _create(client)
+    for revision in range(7):
+        assert _save(client, guide_id, revision, _add_page(revision + 1)).status_code == 200
+
+    with app.app_context():
+        snapshots = [row.revision for row in GuideSnapshot.query.filter_by(guide_id=guide_id)
+                     .order_by(GuideSnapshot.revision)]
+        patches = [row.revision for row in GuidePatch.query.filter_by(guide_id=guide_id)
+                   .order_by(GuidePatch.revision)]
+    # Snapshots at 3 and 6 (the one at 0 is pruned), patches only after the last one
+    assert snapshots == [3, 6]
+    assert patches == [7]
+
+    # With the document cache cleared, this rebuilds from snapshot 6 plus patch 7
+    app.extensions['pocketguide']['guide_store']._documents.clear()
+    document = client.get(f"/api/guides/{guide_id}").get_json()['document']
+    assert [page['number'] for page in document['pages']] == list(range(1, 8))
+
+
+def test_since_replays_patches_or_falls_back_to_the_document(app):
+    client = app.test_client()
+    guide_id = _create(client)
+    for revision in range(4):
+        _save(client, guide_id, revision, _add_page(revision + 1))
+
+    # Patch 4 is still stored, so a client at revision 3 gets just that
+    replay = client.get(f"/api/guides/{guide_id}?since=3").get_json()
+    assert replay['base_revision'] == 3
+    assert [patch['revision'] for patch in replay['patches']] == [4]
+    assert 'document' not in replay
+
+    # Patches up to 3 were compacted away: the whole document comes back
+    full = client.get(f"/api/guides/{guide_id}?since=1").get_json()
+    assert 'patches' not in full
+    assert len(full['document']['pages']) == 4
+
+    current = client.get(f"/api/guides/{guide_id}?since=4").get_json()
+    assert current['patches'] == []
@@ -0,0 +1,85 @@
+"""
+Check the JSON Patch operations used by guide autosave.
+
+    python -m pytest test_json_patch.py
+"""
+
+import pytest
+
+from json_patch import apply_patch, JsonPatchError
+
+
+def _doc():
+    return {'title': 'Guide', 'pages': [{'boxes': ['a', 'b']}], 'settings': {'columns': 2}}
+
+
+def test_add_remove_replace():
+    document = _doc()
+    patched = apply_patch(document, [
+        {'op': 'add', 'path': '/pages/0/boxes/-', 'value': 'c'},
+        {'op': 'add', 'path': '/pages/0/boxes/0', 'value': 'z'},
+        {'op': 'remove', 'path': '/pages/0/boxes/1'},
+        {'op': 'replace', 'path': '/settings/columns', 'value': 3},
+        {'op': 'add', 'path': '/a~1b', 'value': {'~': 1}},
+    ])
+    assert patched['pages'][0]['boxes'] == ['z', 'b', 'c']
+    assert patched['settings'] == {'columns': 3}
+    assert patched['a/b'] == {'~': 1}
+    # The input is never modified
+    assert document == _doc()
+
+
+def test_move_and_copy():
+    patched = apply_patch(_doc(), [
+        {'op': 'copy', 'from': '/pages/0', 'path': '/pages/-'},
+        {'op': 'move', 'from': '/title', 'path': '/settings/title'},
+    ])
+    assert patched['pages'] == [{'boxes': ['a', 'b']}, {'boxes': ['a', 'b']}]
+    assert patched['settings']['title'] == 'Guide'
+    assert 'title' not in patched
+    with pytest.raises(JsonPatchError):
+        apply_patch(_doc(), [{'op': 'move', 'from': '/pages', 'path': '/pages/0/moved'}])
+
+
+def test_failing_operation_leaves_document_untouched():
+    document = _doc()
+    with pytest.raises(JsonPatchError):
+        apply_patch(document, [
+            {'op': 'replace', 'path': '/title', 'value': 'Changed'},
+            {'op': 'remove', 'path': '/missing'},
+        ])
+    assert document == _doc()
+
+
+@pytest.mark.parametrize('patch', [
+    {'op': 'add', 'path': '/x'},
+    {'op': 'remove', 'path': 'title'},
+    {'op': 'replace', 'path': '/pages/01', 'value': 1},
+    {'op': 'add', 'path': '/pages/5', 'value': 1},
+    {'op': 'copy', 'path': '/x'},
+    {'op': 'frobnicate', 'path': '/title'},
+    'not an operation',
+])
+def test_malformed_operations(patch):
+    with pytest.raises(JsonPatchError):
+        apply_patch(_doc(), [patch])
+
+
+@pytest.mark.parametrize('value, expected, passes', [
+    (1, 1.0, True),
+    (1, True, False),
+    (0, False, False),
+    (True, 1, False),
+    (None, False, False),
+    ('1', 1, False),
+    ([1, {'a': True}], [1.0, {'a': True}], True),
+    ([1, {'a': True}], [1, {'a': 1}], False),
+    ({'a': [1]}, {'a': [1], 'b': None}, False),
+])
+def test_test_compares_json_types(value, expected, passes):
+    patch = [{'op': 'test', 'path': '/value', 'value': expected}]
+    if passes:
+        assert apply_patch({'value': value}, patch) == {'value': value}
+    else:
+        with pytest.raises(JsonPatchError):
+            apply_patch({'value': value}, patch)
@@ -0,0 +1,64 @@
+"""
+Check that two apps in one process keep separate SQL metrics.
+
+    python -m pytest test_metrics_isolation.py
+"""
+
+import os
+import re
+import tempfile
+
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('LOG_FILE', '')
+
+from app import create_app
+from models import db
+
+
+def _app(directory, name):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, name)}"})
+    with app.app_context():
+        db.create_all(bind_key=None)
+    return app
+
+
+def _statements(app):
+    text = app.test_client().get('/metrics').get_data(as_text=True)
+    match = re.search(r'^pocketguide_db_statements_total\{dialect="sqlite"\} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_statement_counters_are_per_app():
+    with tempfile.TemporaryDirectory() as directory:
+        first, second = _app(directory, 'first.db'), _app(directory, 'second.db')
+        first_before, second_before = _statements(first), _statements(second)
+
+        for _ in range(5):
+            assert first.test_client().get('/api/birds/locations').status_code == 200
+
+        # /metrics itself may run statements, so compare against a second idle read
+        second_idle = _statements(second) - second_before
+        assert _statements(first) - first_before >= 5
+        assert _statements(second) - second_before == 2 * second_idle
+
+        for app in (first, second):
+            app.extensions['pocketguide']['request_metrics'].close()
+            with app.app_context():
+                db.engine.dispose()
+
+
+def test_close_detaches_from_engines():
+    with tempfile.TemporaryDirectory() as directory:
+        app = _app(directory, 'closed.db')
+        app.extensions['pocketguide']['request_metrics'].close()
+        before = _statements(app)
+        app.test_client().get('/api/birds/locations')
+        assert _statements(app) == before
+        with app.app_context():
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    test_statement_counters_are_per_app()
+    test_close_detaches_from_engines()
+    print("Metrics isolation checks passed")
@@ -0,0 +1,113 @@
+"""
+Check region set expressions: precedence, quoting, unknown regions and the
+statewide alias.
+
+    python -m pytest test_region_index.py
+"""
+
+import pytest
+
+from region_index import RegionBitmapIndex, RegionExpressionError
+
+SPECIES = ['Bulbul', 'Drongo', 'Hornbill', 'Kingfisher', 'Myna', 'Sunbird']
+
+# (state, district): species recorded there
+REGIONS = {
+    ('Mizoram', 'Aizawl'): ['Bulbul', 'Drongo', 'Hornbill'],
+    ('Mizoram', 'Lunglei'): ['Drongo', 'Kingfisher'],
+    ('Mizoram', 'Mizoram (Statewide)'): ['Bulbul', 'Drongo', 'Hornbill', 'Kingfisher', 'Myna'],
+    # A district named like its state must not shadow the statewide list
+    ('Goa', 'Goa'): ['Sunbird'],
+    ('Goa', 'North Goa'): ['Myna', 'Sunbird'],
+    ('Goa', 'Goa (Statewide)'): ['Bulbul', 'Myna', 'Sunbird'],
+    ('Kerala', 'Central'): ['Hornbill'],
+    ('Assam', 'Central'): ['Kingfisher'],
+}
+
+
+def _load_rows():
+    species = [{'english_name': name} for name in SPECIES]
+    frequency = [(name, state, district, rank, 10 - rank, None)
+                 for (state, district), names in REGIONS.items()
+                 for rank, name in enumerate(names, start=1)]
+    return species, frequency
+
+
+@pytest.fixture(scope='module')
+def index():
+    index = RegionBitmapIndex(_load_rows)
+    index.ensure_current(1)
+    return index
+
+
+def _names(index, expression):
+    return sorted(row['english_name'] for row in index.query(expression))
+
+
+def test_intersection_binds_tighter_than_union_and_difference(index):
+    # Aizawl | (Lunglei & North Goa), not (Aizawl | Lunglei) & North Goa
+    assert _names(index, 'Aizawl | Lunglei & "North Goa"') == ['Bulbul', 'Drongo', 'Hornbill']
+    assert _names(index, '(Aizawl | Lunglei) & "North Goa"') == []
+    # Aizawl - (Lunglei & Aizawl), not (Aizawl - Lunglei) & Aizawl
+    assert _names(index, 'Aizawl - Lunglei & Aizawl') == ['Bulbul', 'Hornbill']
+
+
+def test_union_and_difference_are_left_associative(index):
+    assert _names(index, 'Aizawl - Lunglei | Lunglei') == ['Bulbul', 'Drongo', 'Hornbill', 'Kingfisher']
+    assert _names(index, 'Aizawl - (Lunglei | Lunglei)') == ['Bulbul', 'Hornbill']
+    assert _names(index, 'Mizoram - Aizawl - Lunglei') == ['Myna']
+
+
+def test_quoted_names(index):
+    assert _names(index, '"North Goa"') == ['Myna', 'Sunbird']
+    assert _names(index, "'North Goa' & Goa/Statewide") == ['Myna', 'Sunbird']
+    assert _names(index, '"Goa/North Goa"') == ['Myna', 'Sunbird']
+    assert _names(index, 'mizoram/aizawl') == ['Bulbul', 'Drongo', 'Hornbill']
+
+
+def test_statewide_alias_resolves_statewide_records(index):
+    assert index.regions_for('Goa/Statewide') == [('Goa', 'Goa (Statewide)')]
+    assert index.regions_for('Mizoram/Statewide') == [('Mizoram', 'Mizoram (Statewide)')]
+    # A bare name prefers a district of that name, then the state's statewide records
+    assert index.regions_for('Goa') == [('Goa', 'Goa')]
+    assert index.regions_for('Mizoram') == [('Mizoram', 'Mizoram (Statewide)')]
+    assert _names(index, 'Goa/Statewide - Goa') == ['Bulbul', 'Myna']
+
+
+def test_results_carry_best_rank_and_regions(index):
+    rows = {row['english_name']: row for row in index.query('Aizawl | Lunglei')}
+    assert rows['Drongo']['frequency_rank'] == 1
+    assert rows['Drongo']['regions'] == ['Mizoram/Aizawl', 'Mizoram/Lunglei']
+    assert [row['english_name'] for row in index.query('Aizawl | Lunglei')][:2] == ['Bulbul', 'Drongo']
+
+
+@pytest.mark.parametrize('expression', [
+    'Atlantis',
+    'Mizoram/Atlantis',
+    'Atlantis/Statewide',
+    'Aizawl | Atlantis',
+])
+def test_unknown_regions(index, expression):
+    with pytest.raises(RegionExpressionError, match='Unknown region'):
+        index.evaluate(expression)
+
+
+def test_ambiguous_district_needs_a_state(index):
+    with pytest.raises(RegionExpressionError, match='Ambiguous'):
+        index.evaluate('Central')
+    assert _names(index, 'Kerala/Central') == ['Hornbill']
+
+
+@pytest.mark.parametrize('expression', [
+    '',
+    '   ',
+    'Aizawl |',
+    '(Aizawl | Lunglei',
+    'Aizawl Lunglei',
+    'Aizawl ^ Lunglei',
+    '"Aizawl',
+    ')',
+])
+def test_syntax_errors(index, expression):
+    with pytest.raises(RegionExpressionError):
+        index.evaluate(expression)
@@ -0,0 +1,105 @@
+"""
+Check read-replica routing with the primary and the replica as two local
+SQLite files. The replica is a copy that doesn't follow writes, so which
+database answered is visible in the data as well as in X-DB-Route.
+
+    python -m pytest test_replica_routing.py
+"""
+
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('LOG_FILE', '')
+
+from app import create_app
+from models import db
+
+
+def _apps(directory, check_interval='15'):
+    primary = os.path.join(directory, 'primary.db')
+    replica_dir = os.path.join(directory, 'replica')
+    os.makedirs(replica_dir)
+    seed = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{primary}"})
+    with seed.app_context():
+        db.create_all(bind_key=None)
+        seed.extensions['pocketguide']['guide_store'].ensure_tables()
+        db.engine.dispose()
+    shutil.copy(primary, os.path.join(replica_dir, 'replica.db'))
+
+    previous = os.environ.get('REPLICA_CHECK_INTERVAL')
+    os.environ['REPLICA_CHECK_INTERVAL'] = check_interval
+    try:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{primary}",
+            'SQLALCHEMY_BINDS': {'replica_0': f"sqlite:///{os.path.join(replica_dir, 'replica.db')}"}
+        })
+    finally:
+        if previous is None:
+            os.environ.pop('REPLICA_CHECK_INTERVAL')
+        else:
+            os.environ['REPLICA_CHECK_INTERVAL'] = previous
+    return app, replica_dir
+
+
+def _dispose(app):
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_write_is_read_back_from_primary():
+    with tempfile.TemporaryDirectory() as directory:
+        app, _ = _apps(directory)
+        client = app.test_client()
+
+        created = client.post('/api/guides', json={'title': 'Aizawl walk', 'document': {'pages': []}})
+        assert created.status_code == 201
+        assert 'db_pin' in created.headers.get('Set-Cookie', '')
+        guide_id = created.get_json()['guide_id']
+
+        # The pin cookie keeps this client's reads on the primary, which has the guide
+        pinned = client.get(f"/api/guides/{guide_id}")
+        assert pinned.status_code == 200
+        assert pinned.headers['X-DB-Route'] == 'primary'
+
+        # Another client reads the replica, which never got the write
+        other = app.test_client().get(f"/api/guides/{guide_id}")
+        assert other.headers['X-DB-Route'] == 'replica_0'
+        assert other.status_code == 404
+
+        forced = app.test_client().get(f"/api/guides/{guide_id}", headers={'X-Read-Primary': '1'})
+        assert forced.status_code == 200
+        assert forced.headers['X-DB-Route'] == 'primary'
+        _dispose(app)
+
+
+def test_reads_fail_over_to_primary_when_replica_errors():
+    with tempfile.TemporaryDirectory() as directory:
+        # Probe the replica before every read so a failure is noticed at once
+        app, replica_dir = _apps(directory, check_interval='0')
+        router = app.extensions['pocketguide']['replica_router']
+
+        healthy = app.test_client().get('/api/birds/locations')
+        assert healthy.status_code == 200
+        assert healthy.headers['X-DB-Route'] == 'replica_0'
+
+        # Take the replica away: new connections to it fail
+        with app.app_context():
+            db.engines['replica_0'].dispose()
+        shutil.rmtree(replica_dir)
+
+        failed_over = app.test_client().get('/api/birds/locations')
+        assert failed_over.status_code == 200
+        assert failed_over.headers['X-DB-Route'] == 'primary'
+        status = router.status()
+        assert status['replicas']['replica_0']['healthy'] is False
+        assert status['primary_fallback_reads'] >= 1
+        _dispose(app)
+
+
+if __name__ == '__main__':
+    test_write_is_read_back_from_primary()
+    test_reads_fail_over_to_primary_when_replica_errors()
+    print("Replica routing checks passed")
@@ -1,3 +1,9 @@
+import logging
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+
 def convert_google_drive_link(url):
     """Convert Google Drive view URL to a direct download URL"""
     # Handle non-string inputs
@@ -45,3 +51,24 @@ def convert_google_drive_link(url):
     
     # If we can't parse it, return the original URL
     return url
+
+
+def normalize_name(text):
+    """Lowercase and strip diacritics, so 'Ṭhêng' and 'theng' compare equal"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def fetch_image(url, timeout=10):
+    """Download an illustration, returning None when it can't be fetched"""
+    if not url:
+        return None
+    import requests
+
+    try:
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        return response.content
+    except requests.RequestException as e:
+        logger.warning(f"Could not fetch image {url}: {str(e)}")
+        return None
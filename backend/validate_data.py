@@ -1,16 +1,18 @@
-from app import app, db, Species, Illustrations, Names, Frequency
+from app import create_app
+from models import db, Species, Illustrations, Names, Frequency
 from collections import defaultdict
 from sqlalchemy import func
 
 def validate_data():
     """Validates data integrity after ingestion"""
+    app = create_app()
     with app.app_context():
         print("=== Data Validation Report ===\n")
 
         # Check for species without images
         species_without_images = db.session.query(Species).outerjoin(
             Illustrations, 
-            Species.english_name == Illustrations.species_english_name
+            Species.id == Illustrations.species_id
         ).filter(Illustrations.id == None).all()
         
         if species_without_images:
@@ -41,7 +43,7 @@ def validate_data():
         # Check for species without local (Mizo) names
         species_without_local_names = db.session.query(Species).outerjoin(
             Names,
-            Species.english_name == Names.species_english_name
+            Species.id == Names.species_id
         ).filter(Names.id == None).all()
         
         if species_without_local_names:
@@ -56,7 +58,7 @@ def validate_data():
         # Check for species without frequency data
         species_without_frequency = db.session.query(Species).outerjoin(
             Frequency,
-            Species.english_name == Frequency.english_name
+            Species.id == Frequency.species_id
         ).filter(Frequency.id == None).all()
         
         if species_without_frequency:
@@ -80,7 +82,7 @@ def validate_data():
         # Bird categorization statistics
         bird_types = db.session.query(
             Species.type, 
-            func.count(Species.english_name)
+            func.count(Species.id)
         ).group_by(Species.type).all()
         
         print(f"\n🦅 Bird Type Distribution:")
@@ -89,9 +91,9 @@ def validate_data():
         
         # Images per species statistics
         multi_image_species = db.session.query(
-            Illustrations.species_english_name,
+            Species.english_name,
             func.count(Illustrations.id)
-        ).group_by(Illustrations.species_english_name).having(
+        ).join(Illustrations.species).group_by(Species.english_name).having(
             func.count(Illustrations.id) > 1
         ).all()
         
@@ -0,0 +1,10 @@
+"""
+WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from app import app
+
+if __name__ == '__main__':
+    app.run(host='127.0.0.1', port=5000)
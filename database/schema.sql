@@ -6,7 +6,8 @@ CREATE DATABASE pocketguide_db;
 
 -- Create species table
 CREATE TABLE species (
-    english_name VARCHAR(255) PRIMARY KEY,
+    id SERIAL PRIMARY KEY,
+    english_name VARCHAR(255) NOT NULL UNIQUE,
     scientific_name VARCHAR(255) NOT NULL,
     type VARCHAR(100) NOT NULL,
     taxa VARCHAR(100) NOT NULL,
@@ -18,7 +19,7 @@ CREATE TABLE illustrations (
     id SERIAL PRIMARY KEY,
     image_name VARCHAR(255) NOT NULL,
     image_link VARCHAR(512) NOT NULL,
-    species_english_name VARCHAR(255) REFERENCES species(english_name),
+    species_id INTEGER REFERENCES species(id),
     sex VARCHAR(10),
     breeding_status VARCHAR(20),
     subspecies VARCHAR(100),
@@ -28,7 +29,7 @@ CREATE TABLE illustrations (
 -- Create names table
 CREATE TABLE names (
     id SERIAL PRIMARY KEY,
-    species_english_name VARCHAR(255) REFERENCES species(english_name),
+    species_id INTEGER REFERENCES species(id),
     language VARCHAR(50) NOT NULL,
     name VARCHAR(255) NOT NULL
 );
@@ -36,7 +37,7 @@ CREATE TABLE names (
 -- Create frequency table
 CREATE TABLE frequency (
     id SERIAL PRIMARY KEY,
-    english_name VARCHAR(255) REFERENCES species(english_name),
+    species_id INTEGER REFERENCES species(id),
     state VARCHAR(100) NOT NULL,
     district VARCHAR(100),
     frequency_rank INTEGER NOT NULL,
@@ -44,7 +45,66 @@ CREATE TABLE frequency (
     seasonality VARCHAR(50)
 );
 
+-- Create data version table (single row, bumped after every ingestion)
+CREATE TABLE data_version (
+    id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create PDF jobs table (server-side guide rendering queue)
+CREATE TABLE pdf_jobs (
+    id SERIAL PRIMARY KEY,
+    title VARCHAR(255),
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    request_data TEXT NOT NULL,
+    progress INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    next_attempt_at TIMESTAMP,
+    worker VARCHAR(100),
+    error TEXT,
+    log TEXT,
+    output_path VARCHAR(512),
+    stats TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create guides tables (current revision, compacted snapshots and autosave patches)
+CREATE TABLE guides (
+    id SERIAL PRIMARY KEY,
+    title VARCHAR(255) NOT NULL,
+    revision INTEGER NOT NULL DEFAULT 0,
+    snapshot_revision INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE guide_snapshots (
+    id SERIAL PRIMARY KEY,
+    guide_id INTEGER NOT NULL REFERENCES guides(id),
+    revision INTEGER NOT NULL,
+    document TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE guide_patches (
+    id SERIAL PRIMARY KEY,
+    guide_id INTEGER NOT NULL REFERENCES guides(id),
+    revision INTEGER NOT NULL,
+    patch TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_guide_patches_guide_revision UNIQUE (guide_id, revision)
+);
+
 -- Create indexes for better performance
 CREATE INDEX idx_frequency_state_district ON frequency(state, district);
-CREATE INDEX idx_illustrations_species ON illustrations(species_english_name);
-CREATE INDEX idx_names_species ON names(species_english_name);
+CREATE INDEX idx_frequency_state_district_rank ON frequency(state, district, frequency_rank);
+CREATE INDEX idx_frequency_species ON frequency(species_id);
+CREATE INDEX idx_illustrations_species ON illustrations(species_id);
+CREATE INDEX idx_names_species ON names(species_id);
+CREATE INDEX idx_pdf_jobs_status ON pdf_jobs(status);
+CREATE INDEX idx_guide_snapshots_guide_revision ON guide_snapshots(guide_id, revision);
@@ -27,6 +27,53 @@ export const birdService = {
     }
   },
 
+  // Get birds for a set expression over regions, e.g. '"Aizawl" | "Lunglei"'
+  getBirdsForRegionSet: async (expression) => {
+    try {
+      const response = await api.get("/birds/regions/query", {
+        params: { expr: expression },
+      });
+      return response.data;
+    } catch (error) {
+      console.error("Error fetching birds for region set:", error);
+      throw error;
+    }
+  },
+
+  // Faceted explorer: facets is { type: [...], size: [...], seasonality: [...],
+  // has_image: ["true"], region: ["Mizoram/Aizawl"] }; returns results and counts
+  exploreBirds: async (facets = {}, { q, offset, limit } = {}) => {
+    try {
+      const params = new URLSearchParams();
+      Object.entries(facets).forEach(([facet, values]) =>
+        (values || []).forEach((value) => params.append(facet, value))
+      );
+      if (q) params.append("q", q);
+      if (offset) params.append("offset", offset);
+      if (limit) params.append("limit", limit);
+      const response = await api.get("/birds/explore", { params });
+      return response.data;
+    } catch (error) {
+      console.error("Error exploring birds:", error);
+      throw error;
+    }
+  },
+
+  // One combined ranking across several regions ("State/District" strings)
+  getMergedRanking: async (regions, { method = "count", limit } = {}) => {
+    try {
+      const params = new URLSearchParams();
+      regions.forEach((region) => params.append("region", region));
+      params.append("method", method);
+      if (limit) params.append("limit", limit);
+      const response = await api.get("/birds/ranked", { params });
+      return response.data;
+    } catch (error) {
+      console.error("Error fetching merged ranking:", error);
+      throw error;
+    }
+  },
+
   // Get states and districts for filtering
   getLocations: async () => {
     try {
@@ -77,6 +124,56 @@ export const adminService = {
   },
 };
 
+// Server-side PDF generation jobs
+export const pdfJobService = {
+  // Queue a guide for rendering; resolves with the queued job
+  createJob: async (guideRequest) => {
+    try {
+      const response = await api.post("/pdf/jobs", guideRequest);
+      return response.data;
+    } catch (error) {
+      console.error("Error queueing PDF job:", error);
+      throw error;
+    }
+  },
+
+  // Get status, progress and log for a job
+  getJob: async (jobId) => {
+    try {
+      const response = await api.get(`/pdf/jobs/${jobId}`);
+      return response.data;
+    } catch (error) {
+      console.error(`Error fetching PDF job ${jobId}:`, error);
+      throw error;
+    }
+  },
+
+  // List jobs for the Admin > PDF Requests table
+  listJobs: async (status = null) => {
+    try {
+      const params = status ? { status } : {};
+      const response = await api.get("/pdf/jobs", { params });
+      return response.data;
+    } catch (error) {
+      console.error("Error fetching PDF jobs:", error);
+      throw error;
+    }
+  },
+
+  // Re-queue a failed job
+  retryJob: async (jobId) => {
+    try {
+      const response = await api.post(`/pdf/jobs/${jobId}/retry`);
+      return response.data;
+    } catch (error) {
+      console.error(`Error retrying PDF job ${jobId}:`, error);
+      throw error;
+    }
+  },
+
+  getDownloadUrl: (jobId) => `/api/pdf/jobs/${jobId}/download`,
+};
+
 // Export the API instance for direct use if needed
 export default api;
 
@@ -109,6 +109,14 @@ class APIService {
     return response.json();
   }
 
+  async patch(url, data = null) {
+    const response = await this.request(url, {
+      method: "PATCH",
+      body: data ? JSON.stringify(data) : null,
+    });
+    return response.json();
+  }
+
   async delete(url) {
     const response = await this.request(url, {
       method: "DELETE",
@@ -172,6 +180,13 @@ export const speciesAPI = {
       ...filters,
     }),
 
+  // Typo-tolerant name lookup
+  match: (name, filters = {}) =>
+    apiService.get("/species/match", {
+      q: name,
+      ...filters,
+    }),
+
   // Get species by region
   getByRegion: (country, state = null, district = null) =>
     apiService.get("/species/region", { country, state, district }),
@@ -223,9 +238,21 @@ export const guidesAPI = {
   // Update existing guide
   update: (id, guideData) => apiService.put(`/guides/${id}`, guideData),
 
+  // Autosave: send a JSON Patch against the last saved revision
+  autosave: (id, baseRevision, patch) =>
+    apiService.patch(`/guides/${id}`, { base_revision: baseRevision, patch }),
+
+  // Fetch only the patches made after a known revision
+  getChangesSince: (id, revision) =>
+    apiService.get(`/guides/${id}`, { since: revision }),
+
   // Delete guide
   delete: (id) => apiService.delete(`/guides/${id}`),
 
+  // Page thumbnails (poll until complete; pages=[0] for the guide grid)
+  getPreviews: (id, pages = null) =>
+    apiService.get(`/guides/${id}/previews`, pages ? { pages: pages.join(",") } : {}),
+
   // Publishing
   publish: (id) => apiService.post(`/guides/${id}/publish`),
   unpublish: (id) => apiService.post(`/guides/${id}/unpublish`),
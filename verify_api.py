@@ -5,13 +5,27 @@ NCF Pocket Guide Creator API Verification Script
 
 This script tests all API endpoints using the requests library.
 Run it after starting the backend server to verify that all endpoints are working correctly.
+
+With --load it instead drives the server with concurrent traffic over a mix of
+regions, districts and species for a fixed duration or number of requests, and
+reports throughput, latency percentiles, error rates and cache behaviour:
+
+    python verify_api.py --load --concurrency 16 --duration 60
+    python verify_api.py --load --requests 5000 --base-url http://staging:5000/api
 """
 
+import argparse
+import random
+import re
+import threading
+import time
 import requests
 import json
 import os
 import sys
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib.parse import quote, urlencode
 try:
     from colorama import init, Fore, Style
     has_colorama = True
@@ -184,5 +198,281 @@ def main():
     print_color("\nAPI Verification Complete", "yellow", bold=True)
     print(f"Check {OUT_DIR} directory for detailed responses")
 
+# -------------------------------
+# LOAD TEST MODE
+# -------------------------------
+
+def discover_catalogue(session, base_url):
+    """Regions, bird types and species names the server knows about, for building the request mix"""
+    locations = session.get(f"{base_url}/birds/locations", timeout=30).json()
+    explore = session.get(f"{base_url}/birds/explore?limit=200", timeout=30).json()
+    regions = [(state, district) for state in locations.get("states", [])
+               for district in locations.get("districts", {}).get(state, [])]
+    return {
+        "states": locations.get("states", []),
+        "regions": regions,
+        "types": sorted(explore.get("facets", {}).get("type", {})),
+        "names": [bird["english_name"] for bird in explore.get("results", [])]
+    }
+
+def build_request_mix(catalogue, seed):
+    """
+    Weighted request generators. Regions get a skewed popularity (the first
+    of a seeded shuffle is requested most), as real traffic concentrates on a
+    few states and districts.
+    """
+    rng = random.Random(seed)
+    regions = list(catalogue["regions"])
+    rng.shuffle(regions)
+    region_weights = [1 / (rank + 1) for rank in range(len(regions))]
+    states = list(dict.fromkeys(state for state, _ in regions))
+    state_weights = [1 / (rank + 1) for rank in range(len(states))]
+    names = catalogue["names"] or ["Bulbul"]
+    types = catalogue["types"]
+
+    def region(r):
+        return r.choices(regions, region_weights)[0]
+
+    def state(r):
+        return r.choices(states, state_weights)[0]
+
+    def grouped_district(r):
+        s, d = region(r)
+        return "/birds/grouped?" + urlencode({"state": s, "district": d})
+
+    def grouped_statewide(r):
+        return "/birds/grouped?" + urlencode({"state": state(r), "district": "Statewide"})
+
+    def grouped_per_type(r):
+        return "/birds/grouped?" + urlencode({"state": state(r), "district": "Statewide", "per_type": 5})
+
+    def ranked(r):
+        picked = r.sample(regions, min(len(regions), r.randint(1, 3)))
+        return "/birds/ranked?" + urlencode([("region", f"{s}/{d}") for s, d in picked])
+
+    def explore(r):
+        s, d = region(r)
+        params = {"region": f"{s}/{d}", "limit": 50}
+        if types and r.random() < 0.5:
+            params["type"] = r.choice(types)
+        return "/birds/explore?" + urlencode(params)
+
+    def search(r):
+        word = r.choice(names).split()[-1]
+        return "/species/search?" + urlencode({"q": word[:r.randint(3, max(3, len(word)))], "limit": 10})
+
+    def match(r):
+        name = r.choice(names).lower()
+        cut = r.randrange(1, len(name) - 1) if len(name) > 2 else 0
+        return "/species/match?" + urlencode({"q": name[:cut] + name[cut + 1:]})
+
+    def species_detail(r):
+        return "/admin/species/" + quote(r.choice(names))
+
+    mix = [
+        ("grouped_district", 25, grouped_district),
+        ("grouped_statewide", 15, grouped_statewide),
+        ("grouped_per_type", 10, grouped_per_type),
+        ("locations", 5, lambda r: "/birds/locations"),
+        ("ranked", 10, ranked),
+        ("explore", 15, explore),
+        ("search", 10, search),
+        ("match", 5, match),
+        ("species_detail", 5, species_detail),
+    ]
+    if not regions:
+        mix = [entry for entry in mix if entry[0] in ("locations", "search", "match", "species_detail")]
+    return mix
+
+def read_cache_counters(session, base_url):
+    """Server-side cache hits and misses from the Prometheus endpoint, or None if unavailable"""
+    metrics_url = re.sub(r"/api/?$", "", base_url) + "/metrics"
+    try:
+        text = session.get(metrics_url, timeout=10).text
+    except requests.exceptions.RequestException:
+        return None
+    counters = {}
+    for kind, cache, value in re.findall(r'^\w+_cache_(hits|misses)_total\{cache="([^"]+)"\} (\S+)$', text, re.M):
+        counters.setdefault(cache, {"hits": 0, "misses": 0})[kind] = float(value)
+    return counters
+
+def percentiles(latencies, prefix=""):
+    if not latencies:
+        return {}
+    ordered = sorted(latencies)
+    pick = lambda p: round(ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000, 2)
+    return {f"{prefix}p50_ms": pick(0.50), f"{prefix}p90_ms": pick(0.90), f"{prefix}p95_ms": pick(0.95),
+            f"{prefix}p99_ms": pick(0.99), f"{prefix}max_ms": round(ordered[-1] * 1000, 2)}
+
+def client_session():
+    """A session with its own keep-alive connection, like a separate client"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def load_worker(base_url, mix, seed, budget, results, lock):
+    """Send requests until the shared budget runs out, revalidating with ETag/Last-Modified when offered"""
+    session = client_session()
+    r = random.Random(seed)
+    labels = [label for label, _, _ in mix]
+    weights = [weight for _, weight, _ in mix]
+    builders = {label: build for label, _, build in mix}
+    validators = {}
+    records = []
+    while budget():
+        label = r.choices(labels, weights)[0]
+        path = builders[label](r)
+        headers = {}
+        etag, last_modified = validators.get(path, (None, None))
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        started = time.perf_counter()
+        try:
+            response = session.get(f"{base_url}{path}", headers=headers, timeout=30)
+            size = len(response.content)
+        except requests.exceptions.RequestException as e:
+            records.append((label, type(e).__name__, time.perf_counter() - started, 0, None))
+            continue
+        elapsed = time.perf_counter() - started
+        if response.headers.get("ETag") or response.headers.get("Last-Modified"):
+            validators[path] = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        proxy_cache = response.headers.get("X-Cache-Status") or response.headers.get("X-Cache")
+        records.append((label, response.status_code, elapsed, size, proxy_cache))
+    session.close()
+    with lock:
+        results.extend(records)
+
+def summarize(records, elapsed, concurrency, cache_before, cache_after):
+    def failed(row):
+        return not isinstance(row[1], int) or row[1] >= 400
+
+    def stats(rows):
+        errors = [row for row in rows if failed(row)]
+        not_modified = sum(1 for row in rows if row[1] == 304)
+        proxied = [row for row in rows if row[4]]
+        status_codes = {}
+        for row in rows:
+            status_codes[str(row[1])] = status_codes.get(str(row[1]), 0) + 1
+        return dict({
+            "requests": len(rows),
+            "errors": len(errors),
+            "error_rate": round(len(errors) / len(rows), 4) if rows else 0,
+            "not_modified_ratio": round(not_modified / len(rows), 4) if rows else 0,
+            "proxy_cache_hit_ratio": round(sum(1 for row in proxied if "HIT" in row[4].upper()) / len(proxied), 4)
+            if proxied else None,
+            "mean_bytes": round(sum(row[3] for row in rows) / len(rows)) if rows else 0,
+            "status_codes": status_codes,
+        }, **percentiles([row[2] for row in rows if not failed(row)]),
+            # Failures are timed separately: fast 500s or slow timeouts would skew the success figures
+            **percentiles([row[2] for row in errors], prefix="error_"))
+
+    server_cache = None
+    if cache_before is not None and cache_after is not None:
+        server_cache = {}
+        for cache, after in cache_after.items():
+            before = cache_before.get(cache, {"hits": 0, "misses": 0})
+            hits, misses = after["hits"] - before["hits"], after["misses"] - before["misses"]
+            server_cache[cache] = {"hits": int(hits), "misses": int(misses),
+                                   "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None}
+
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "throughput_rps": round(len(records) / elapsed, 1) if elapsed else 0,
+        "overall": stats(records),
+        "endpoints": {label: stats([row for row in records if row[0] == label])
+                      for label in sorted({row[0] for row in records})},
+        # Counters come from whichever worker process served /metrics
+        "server_cache": server_cache,
+    }
+
+def run_load_test(base_url, concurrency, duration, total_requests, seed):
+    print_color("\nNCF Pocket Guide Creator API Load Test", "yellow", bold=True)
+    print("=" * 50)
+    # Each load client gets its own session and connection; this one reads the catalogue and /metrics
+    session = client_session()
+
+    try:
+        catalogue = discover_catalogue(session, base_url)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print_color(f"Could not read the catalogue from {base_url}: {str(e)}", "red")
+        return 1
+    mix = build_request_mix(catalogue, seed)
+    limit = f"{total_requests} requests" if total_requests else f"{duration}s"
+    print(f"Target: {base_url}")
+    print(f"{len(catalogue['regions'])} regions, {len(catalogue['names'])} species in the mix; "
+          f"{concurrency} concurrent clients for {limit}")
+
+    lock = threading.Lock()
+    if total_requests:
+        remaining = [total_requests]
+
+        def budget():
+            with lock:
+                remaining[0] -= 1
+                return remaining[0] >= 0
+    else:
+        deadline = time.perf_counter() + duration
+
+        def budget():
+            return time.perf_counter() < deadline
+
+    cache_before = read_cache_counters(session, base_url)
+    records = []
+    started = time.perf_counter()
+    threads = [threading.Thread(target=load_worker, args=(base_url, mix, seed + n, budget, records, lock))
+               for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    cache_after = read_cache_counters(session, base_url)
+
+    summary = summarize(records, elapsed, concurrency, cache_before, cache_after)
+    summary.update({"started_at": datetime.now().isoformat(timespec="seconds"), "base_url": base_url,
+                    "seed": seed, "mix": {label: weight for label, weight, _ in mix}})
+
+    overall = summary["overall"]
+    print(f"\n{overall['requests']} requests in {summary['duration_s']}s: {summary['throughput_rps']} req/s")
+    print(f"Latency p50 {overall.get('p50_ms')} ms, p95 {overall.get('p95_ms')} ms, "
+          f"p99 {overall.get('p99_ms')} ms, max {overall.get('max_ms')} ms")
+    print_color(f"Errors: {overall['errors']} ({overall['error_rate']:.2%})",
+                "red" if overall["errors"] else "green")
+    if overall["errors"]:
+        print(f"Failed request latency p50 {overall['error_p50_ms']} ms, max {overall['error_max_ms']} ms")
+    print(f"304 Not Modified: {overall['not_modified_ratio']:.2%}")
+    if overall["proxy_cache_hit_ratio"] is not None:
+        print(f"Proxy cache hits: {overall['proxy_cache_hit_ratio']:.2%}")
+    for cache, counts in (summary["server_cache"] or {}).items():
+        if counts["hit_ratio"] is not None:
+            print(f"Server {cache} cache: {counts['hits']} hits, {counts['misses']} misses ({counts['hit_ratio']:.2%})")
+
+    print(f"\n{'endpoint':<20} {'requests':>8} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'304':>6}")
+    for label, row in summary["endpoints"].items():
+        print(f"{label:<20} {row['requests']:>8} {row['errors']:>7} {row.get('p50_ms', '-'):>8} "
+              f"{row.get('p95_ms', '-'):>8} {row.get('p99_ms', '-'):>8} {row['not_modified_ratio']:>6.0%}")
+
+    summary_path = os.path.join(OUT_DIR, "load_test_summary.json")
+    with open(summary_path, "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"\nSummary saved to {summary_path}")
+    return 1 if overall["errors"] else 0
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify the API endpoints, or load test them with --load")
+    parser.add_argument("--base-url", default=BASE_URL, help=f"API base URL (default {BASE_URL})")
+    parser.add_argument("--load", action="store_true", help="Run the concurrent load test instead")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients (default 8)")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run (default 30)")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests instead of a duration")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the request mix")
+    args = parser.parse_args()
+    BASE_URL = args.base_url.rstrip("/")
+    if args.load:
+        sys.exit(run_load_test(BASE_URL, args.concurrency, args.duration, args.requests, args.seed))
     main()